@@ -0,0 +1,148 @@
+"""
+Online backups of a company file.
+
+backup_database copies the live database with the sqlite3 backup API a batch
+of pages at a time on its own read-only connection, sleeping between steps:
+a step holds the read lock only while it copies its batch, so voucher saves
+on the application's connection go through between steps. A save between
+two steps makes SQLite start the copy again, so a step copies enough pages
+for a typical company file to go in a few steps, and a copy restarted more
+than max_restarts times is begun again with steps STEP_GROWTH times larger,
+ending with the whole file in one step: under a steady stream of saves the
+backup still finishes, holding them up for longer only then.
+
+The copy is written to a .partial file in the backup folder, checked with
+PRAGMA quick_check and only then renamed to <stem>-YYYYmmdd-HHMMSS.db, so
+every generation list_backups finds is complete and verified. Generations
+beyond keep are deleted, oldest first. The module imports nothing but the
+standard library.
+"""
+import os
+import re
+import time
+import pathlib
+import sqlite3
+import threading
+from typing import List, NamedTuple
+
+TIMESTAMP_FORMAT = '%Y%m%d-%H%M%S'
+STEP_GROWTH = 8
+
+
+class _CopyRestarted(Exception):
+    pass
+
+
+class BackupInfo(NamedTuple):
+    path: str
+    taken: float  # time.time() the copy was started, to the second
+    size: int  # bytes
+
+
+def backup_folder(db_path: str, folder: str) -> str:
+    """folder, relative folders being taken from the company file's folder."""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), folder)
+
+
+def _generation_pattern(db_path: str):
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    return re.compile(re.escape(stem) + r'-(\d{8}-\d{6})\.db$')
+
+
+def list_backups(db_path: str, folder: str) -> List[BackupInfo]:
+    """The verified generations of db_path in folder, newest first."""
+    folder = backup_folder(db_path, folder)
+    pattern = _generation_pattern(db_path)
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return []
+    backups = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            path = os.path.join(folder, name)
+            taken = time.mktime(time.strptime(match.group(1), TIMESTAMP_FORMAT))
+            backups.append(BackupInfo(path, taken, os.path.getsize(path)))
+    backups.sort(key=lambda backup: backup.taken, reverse=True)
+    return backups
+
+
+def last_modified(db_path: str) -> float:
+    """When the database last changed on disk (its -wal file included)."""
+    times = [os.path.getmtime(path) for path in (db_path, db_path + '-wal') if os.path.exists(path)]
+    return max(times, default=0.0)
+
+
+def rotate_backups(db_path: str, folder: str, keep: int) -> List[str]:
+    """Deletes all but the keep newest generations; returns the deleted paths."""
+    removed = []
+    for backup in list_backups(db_path, folder)[max(keep, 1):]:
+        try:
+            os.remove(backup.path)
+            removed.append(backup.path)
+        except OSError as e:
+            print(f"Removing old backup {backup.path} failed: {e}")
+    return removed
+
+
+def _copy(source: sqlite3.Connection, dest: sqlite3.Connection, pages: int, sleep: float, max_restarts: int,
+          stop: threading.Event = None):
+    restarts = 0
+    remaining_before = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, remaining_before
+        if stop is not None and stop.is_set():
+            raise InterruptedError("backup stopped")
+        if status in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED):
+            return
+        # A save between steps makes the next step begin the copy again, so it ends no further on
+        if remaining_before is not None and remaining >= remaining_before:
+            restarts += 1
+        remaining_before = remaining
+        if restarts > max_restarts:
+            raise _CopyRestarted()
+
+    source.backup(dest, pages=pages, progress=progress, sleep=sleep)
+
+
+def backup_database(db_path: str, folder: str, keep: int = 7, pages: int = 1024, sleep: float = 0.01,
+                    max_restarts: int = 3, stop: threading.Event = None) -> BackupInfo:
+    """
+    Copies db_path into a new generation in folder while the application keeps
+    writing, verifies it and rotates the old ones out. Raises ValueError if the
+    copy fails, is stopped or does not pass quick_check.
+    """
+    folder = backup_folder(db_path, folder)
+    os.makedirs(folder, exist_ok=True)
+    taken = float(int(time.time()))  # to the second, as the file name keeps it
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    path = os.path.join(folder, f"{stem}-{time.strftime(TIMESTAMP_FORMAT, time.localtime(taken))}.db")
+    partial_path = path + '.partial'
+
+    source = sqlite3.connect(pathlib.Path(os.path.abspath(db_path)).as_uri() + "?mode=ro", uri=True)
+    dest = sqlite3.connect(partial_path)
+    try:
+        page_count = source.execute("PRAGMA page_count").fetchone()[0]
+        while True:
+            try:
+                _copy(source, dest, pages, sleep, max_restarts, stop)
+                break
+            except _CopyRestarted:
+                pages = -1 if pages < 0 or pages * STEP_GROWTH >= page_count else pages * STEP_GROWTH
+        dest.execute("PRAGMA journal_mode=DELETE")  # a single self-contained file, whatever the source uses
+        result = [row[0] for row in dest.execute("PRAGMA quick_check")]
+        if result != ['ok']:
+            raise ValueError("; ".join(result[:5]))
+        dest.close()
+        os.replace(partial_path, path)
+    except (sqlite3.Error, OSError, InterruptedError, ValueError) as e:
+        dest.close()
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise ValueError(f"Backup of {db_path} failed: {e}")
+    finally:
+        source.close()
+    rotate_backups(db_path, folder, keep)
+    return BackupInfo(path, taken, os.path.getsize(path))
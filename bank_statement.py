@@ -0,0 +1,158 @@
+"""
+Bank statement import and matching for bank reconciliation.
+
+read_statement_csv() reads the CSV export of a bank statement. Header names
+vary between banks, so columns are found by name: date, description
+(narration / particulars), reference (cheque / ref / UTR), and either
+separate withdrawal/deposit (debit/credit) columns or one amount column with an
+optional Dr/Cr column. Preamble lines before the header row are skipped.
+
+match_entries() pairs statement lines with book entries without comparing
+every pair: book entries are hashed by (amount, reference) and by amount
+alone, each bucket sorted by date, and every statement line looks up its
+bucket and bisects to the date window. Sorting dominates, so a run is
+O(n log n).
+"""
+import re
+import csv
+import hashlib
+import datetime
+from bisect import bisect_left
+from collections import defaultdict
+from typing import List, NamedTuple, Optional
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y', '%d-%b-%Y', '%d %b %Y', '%d/%m/%y', '%d-%b-%y')
+DEFAULT_WINDOW_DAYS = 7
+
+COLUMN_NAMES = {  # first matching header (case-insensitive substring) wins
+    'date': ('value date', 'txn date', 'transaction date', 'date'),
+    'description': ('description', 'narration', 'particulars', 'remarks', 'details'),
+    'ref': ('cheque', 'chq', 'ref', 'utr', 'instrument'),
+    'withdrawal': ('withdrawal', 'debit', 'paid out'),
+    'deposit': ('deposit', 'credit', 'paid in'),
+    'amount': ('amount',),
+    'dr_cr': ('dr/cr', 'cr/dr', 'type'),
+}
+
+
+class StatementEntry(NamedTuple):
+    date: str  # ISO
+    description: str
+    ref_no: str
+    amount: float  # deposit +, withdrawal -
+    row_hash: str
+
+
+def _parse_date(text: str) -> str:
+    text = text.strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            pass
+    raise ValueError(f"Unrecognised statement date '{text}'.")
+
+
+def _parse_amount(text: str) -> float:
+    text = text.replace(',', '').strip()
+    return float(text) if text else 0.0
+
+
+def _find_columns(header: List[str]) -> Optional[dict]:
+    lowered = [cell.strip().lower() for cell in header]
+    columns = {}
+    for key, names in COLUMN_NAMES.items():
+        for name in names:
+            match = next((i for i, cell in enumerate(lowered) if name in cell and i not in columns.values()), None)
+            if match is not None:
+                columns[key] = match
+                break
+    if 'date' in columns and ('amount' in columns or ('withdrawal' in columns and 'deposit' in columns)):
+        return columns
+    return None
+
+
+def read_statement_csv(path: str) -> List[StatementEntry]:
+    """Reads a bank statement CSV. Each entry carries a hash that is stable across re-imports of the same rows."""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        rows = list(csv.reader(f))
+    for start, header in enumerate(rows):
+        columns = _find_columns(header)
+        if columns:
+            break
+    else:
+        raise ValueError(f"{path}: no header row with date and amount columns.")
+
+    cell = lambda row, key: row[columns[key]].strip() if key in columns and columns[key] < len(row) else ''
+    entries = []
+    seen = defaultdict(int)  # identical rows (e.g. two charges on one day) stay distinct
+    for row in rows[start + 1:]:
+        if not row or not cell(row, 'date'):
+            continue
+        try:
+            date = _parse_date(cell(row, 'date'))
+        except ValueError:
+            continue  # footer lines such as closing balance / totals
+        if 'withdrawal' in columns and 'deposit' in columns:
+            amount = _parse_amount(cell(row, 'deposit')) - _parse_amount(cell(row, 'withdrawal'))
+        else:
+            raw = cell(row, 'amount')
+            amount = _parse_amount(re.sub(r'(?i)\s*(cr|dr)\.?$', '', raw))
+            kind = (cell(row, 'dr_cr') or raw[-2:]).strip().lower()
+            if kind.startswith('dr'):
+                amount = -abs(amount)
+        if not amount:
+            continue
+        description, ref_no = cell(row, 'description'), cell(row, 'ref')
+        key = f"{date}|{round(amount * 100)}|{ref_no}|{description}"
+        seen[key] += 1
+        row_hash = hashlib.sha1(f"{key}|{seen[key]}".encode('utf-8')).hexdigest()
+        entries.append(StatementEntry(date, description, ref_no, round(amount, 2), row_hash))
+    return entries
+
+
+def normalise_ref(ref: str) -> str:
+    """Reference as compared: the cheque/UTR digits ('CHQ NO. 000123' -> '123') if any, else upper-case alphanumerics."""
+    ref = re.sub(r'[^0-9A-Za-z]', '', ref or '').upper()
+    digits = re.search(r'\d{4,}', ref)
+    return (digits.group(0) if digits else ref).lstrip('0')
+
+
+def match_entries(statement, book, window_days: int = DEFAULT_WINDOW_DAYS) -> List[tuple]:
+    """
+    Pairs statement lines with book entries. Both are iterables of
+    (id, iso_date, amount, ref). A pair must have the same amount and dates at
+    most window_days apart. Pairs whose references also agree are made first,
+    then the rest by amount alone. Within a bucket the nearest date wins.
+    Returns [(statement_id, book_id)].
+    """
+    def prepare(entries):
+        return sorted((datetime.date.fromisoformat(date).toordinal(), round(amount * 100), normalise_ref(ref), entry_id)
+                      for entry_id, date, amount, ref in entries)
+
+    statement, book = prepare(statement), prepare(book)
+    pairs = []
+    used_statement, used_book = set(), set()
+    for with_ref in (True, False):
+        buckets = defaultdict(list)  # key -> [(day, book_id)] in date order
+        for day, paise, ref, book_id in book:
+            if book_id not in used_book and (ref or not with_ref):
+                buckets[(paise, ref) if with_ref else paise].append((day, book_id))
+        for day, paise, ref, statement_id in statement:
+            if statement_id in used_statement or (with_ref and not ref):
+                continue
+            candidates = buckets.get((paise, ref) if with_ref else paise)
+            if not candidates:
+                continue
+            best = None
+            for i in range(bisect_left(candidates, (day - window_days,)), len(candidates)):
+                book_day, book_id = candidates[i]
+                if book_day > day + window_days:
+                    break
+                if book_id not in used_book and (best is None or abs(book_day - day) < abs(best[0] - day)):
+                    best = (book_day, book_id)
+            if best:
+                used_statement.add(statement_id)
+                used_book.add(best[1])
+                pairs.append((statement_id, best[1]))
+    return pairs
@@ -0,0 +1,84 @@
+"""
+Debtors ageing over a large party ledger.
+
+Builds a throw-away database with PARTIES debtors, BILLS sales bills each and
+receipts settling most of them (in full, in part, or on account), then times
+get_ageing() and get_outstanding_bills() for the whole group. Fails if the
+ageing report takes longer than MAX_SECONDS.
+
+    python benchmarks/bench_ageing.py [--parties 10000] [--bills 20]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zfx19 import DBManager
+
+MAX_SECONDS = 5.0
+
+
+def build_ledger(db: DBManager, parties: int, bills: int):
+    rnd = random.Random(36)
+    db.add_master_entry('account', {'name': 'Cash', 'group_or_hsn': 'Cash-in-Hand'})
+    cash_id = db.get_id_by_name('Cash', 'account')
+    with db.conn:
+        db.conn.executemany("INSERT INTO account_master (master_name, group_type) VALUES (?, 'Sundry Debtors')",
+                            ((f"Debtor {p:05d}",) for p in range(parties)))
+        first_party = db.get_id_by_name("Debtor 00000", 'account')
+        sales = sorted((f"2025-{rnd.randint(4, 12):02d}-{rnd.randint(1, 28):02d}", f"S{p:05d}-{b:03d}",
+                        first_party + p, rnd.randint(100, 50000) + 0.5)
+                       for p in range(parties) for b in range(bills))
+        # Receipts on the bill date, so vouchers go in day by day as they would be entered:
+        # in full or in part against the bill, or on account.
+        receipts, lines = [], []
+        for day, bill_no, party_id, amount in sales:
+            settle = rnd.random()
+            if settle >= 0.7:
+                continue
+            receipt_id = len(receipts) + 1
+            paid = amount if settle < 0.5 else round(amount * 0.4, 2)
+            receipts.append((receipt_id, day, f"R{receipt_id:07d}", paid))
+            lines.append((receipt_id, 'Cr', party_id, paid, bill_no if settle < 0.65 else ''))
+            lines.append((receipt_id, 'Dr', cash_id, paid, ''))
+        db.conn.executemany(
+            "INSERT INTO sales_header (trans_date, vouch_no, party_mas_id, final_bill_amt, total_tax_amt) VALUES (?, ?, ?, ?, 0)",
+            sales)
+        db.conn.executemany("INSERT INTO receipt_header (id, vouch_date, vouch_no, total_amount) VALUES (?, ?, ?, ?)", receipts)
+        db.conn.executemany(
+            "INSERT INTO receipt_lines (vouch_header_id, dr_cr, master_account_id, amount, against_ref_no) VALUES (?, ?, ?, ?, ?)",
+            lines)
+    return len(sales), len(receipts)
+
+
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return result, time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--parties', type=int, default=10000)
+    parser.add_argument('--bills', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(os.path.join(tmp, 'bench.db'))
+        (bill_count, receipt_count), build_time = timed(lambda: build_ledger(db, args.parties, args.bills))
+        ageing, ageing_time = timed(lambda: db.get_ageing('2026-01-31'))
+        open_bills, bills_time = timed(lambda: db.get_outstanding_bills('2026-01-31'))
+        db.conn.close()
+
+    print(f"parties / bills    : {args.parties:,} / {bill_count:,} ({receipt_count:,} receipts, built in {build_time:.1f} s)")
+    print(f"ageing report      : {len(ageing):,} parties in {ageing_time:6.2f} s (limit {MAX_SECONDS:.0f} s)")
+    print(f"open bills         : {len(open_bills):,} bills in {bills_time:6.2f} s")
+    return 0 if ageing_time <= MAX_SECONDS else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Scheduled backup: voucher saves while a generation is copied.
+
+Builds a throw-away database with VOUCHERS payment vouchers, then saves a
+setting on the application's connection over and over, TYPING_INTERVAL or
+BULK_INTERVAL seconds apart:
+
+  * with no backup running (the baseline);
+  * while DBManager.backup_now copies the file in BACKUP_PAGES_PER_STEP
+    page steps on another thread, at both rates (at the bulk rate nearly
+    every step is followed by a save, so the copy restarts and its steps
+    grow, see backup.py);
+  * while the whole file is copied in a single step, as a plain
+    Connection.backup() would, for comparison.
+
+and records the slowest save of each run. It then takes KEEP + 2
+generations, checks that only the KEEP newest are left and that each opens
+and passes PRAGMA quick_check with every voucher in it, and that a stopped
+backup leaves no file behind.
+
+Fails if a save waits longer than MAX_COMMIT_MS while the stepped backup
+runs at the typing rate, or any generation is missing, extra or bad.
+
+    python benchmarks/bench_backup.py [--vouchers 300000]
+"""
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zfx19 import DBManager, date_key
+from backup import backup_database
+
+MAX_COMMIT_MS = 100.0
+TYPING_INTERVAL = 0.25
+BULK_INTERVAL = 0.02
+KEEP = 3
+
+
+def build_vouchers(db: DBManager, vouchers: int):
+    """Payment vouchers of two lines each, day by day so the running-balance triggers only append."""
+    days = [f"2025-{m:02d}-{d:02d}" for m in range(1, 13) for d in range(1, 29)]
+    with db.conn:
+        db.conn.executemany("INSERT INTO account_master (master_name, group_type) VALUES (?, ?)",
+                            [("Bench Cash", 'Cash-in-hand'), ("Bench Expenses", 'Indirect Expenses')])
+        cash, expenses = [row[0] for row in db.conn.execute(
+            "SELECT id FROM account_master WHERE master_name IN ('Bench Cash', 'Bench Expenses') ORDER BY master_name")]
+        for day_no, day in enumerate(days):
+            ids = range(day_no * vouchers // len(days) + 1, (day_no + 1) * vouchers // len(days) + 1)
+            db.conn.executemany("INSERT INTO payment_header (id, vouch_date, vouch_day, vouch_no, total_amount, narrative) "
+                                "VALUES (?, ?, ?, ?, ?, ?)",
+                                ((i, day, date_key(day), f"PA{i:07d}", 100.0 + i % 997, f"Payment {i}") for i in ids))
+            db.conn.executemany("INSERT INTO payment_lines (vouch_header_id, dr_cr, master_account_id, amount) VALUES (?, ?, ?, ?)",
+                                ((i, dr_cr, expenses if dr_cr == 'Dr' else cash, 100.0 + i % 997)
+                                 for i in ids for dr_cr in ('Dr', 'Cr')))
+
+
+def write_while(db: DBManager, interval: float, background=None) -> tuple:
+    """Saves a setting every interval until background (run on a thread) returns: (slowest save ms, saves, seconds)."""
+    done = threading.Event()
+    errors = []
+
+    def run():
+        try:
+            background()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    start = time.perf_counter()
+    if background is None:
+        threading.Timer(3.0, done.set).start()
+    else:
+        threading.Thread(target=run).start()
+    slowest, commits = 0.0, 0
+    while not done.is_set():
+        begin = time.perf_counter()
+        db.save_setting("BenchWrite", str(commits))
+        slowest = max(slowest, (time.perf_counter() - begin) * 1000)
+        commits += 1
+        done.wait(interval)
+    if errors:
+        raise errors[0]
+    return slowest, commits, time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vouchers', type=int, default=300_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(os.path.join(tmp, 'bench.db'))
+        build_vouchers(db, args.vouchers)
+        size_mb = os.path.getsize(db.db_path) / 2**20
+
+        runs = [("no backup", write_while(db, BULK_INTERVAL))]
+        for label, interval in (("typing", TYPING_INTERVAL), ("bulk", BULK_INTERVAL)):
+            runs.append((f"stepped, {label} rate", write_while(db, interval, lambda: db.backup_now(keep=KEEP))))
+            time.sleep(1.0)  # generations are named to the second
+        runs.append(("single step, bulk", write_while(
+            db, BULK_INTERVAL, lambda: backup_database(db.db_path, os.path.join(tmp, 'single'), pages=-1, sleep=0))))
+
+        for _ in range(KEEP):
+            db.backup_now(keep=KEEP)
+            time.sleep(1.0)
+        generations = db.get_backups()
+        good = 0
+        for backup in generations:
+            conn = sqlite3.connect(backup.path)
+            checked = conn.execute("PRAGMA quick_check").fetchone()[0]
+            count = conn.execute("SELECT COUNT(*) FROM payment_header").fetchone()[0]
+            conn.close()
+            good += checked == 'ok' and count == args.vouchers
+
+        stop = threading.Event()
+        stop.set()
+        try:
+            backup_database(db.db_path, os.path.join(tmp, 'stopped'), stop=stop)
+            stopped = False
+        except ValueError:
+            stopped = not os.listdir(os.path.join(tmp, 'stopped'))
+        db.close()
+
+    print(f"database              : {args.vouchers:,} vouchers, {size_mb:.0f} MB")
+    for label, (slowest_ms, saves, seconds) in runs:
+        print(f"{label:<22}: slowest save {slowest_ms:7.1f} ms, {saves:4d} saves over {seconds:5.2f} s")
+    print(f"stepped limit         : {MAX_COMMIT_MS:.0f} ms at the typing rate ({DBManager.BACKUP_PAGES_PER_STEP} pages/step)")
+    print(f"generations           : {len(generations)} kept of {KEEP + 2} taken (keep {KEEP}), {good} verified")
+    print(f"stopped backup        : {'aborted, no file left' if stopped else 'NOT CLEANED UP'}")
+    ok = dict(runs)["stepped, typing rate"][0] <= MAX_COMMIT_MS and len(generations) == KEEP and good == KEEP and stopped
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Voucher date filters: ISO TEXT dates vs integer day keys.
+
+Builds a throw-away database with ROWS journal vouchers spread over a year,
+then indexes the headers both ways on the same table: the ISO vouch_date
+(the old idx_journal_header_date) and the vouch_day key. Compares the pages
+each index takes and the time for month-by-month range scans through each.
+Fails if the day-key index is not smaller.
+
+    python benchmarks/bench_date_keys.py [--rows 1000000] [--repeat 5]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zfx19 import DBManager, date_key
+
+MONTHS = [(f"{year}-{month:02d}-01", f"{year}-{month:02d}-31") for year, month in
+          [(2025, m) for m in range(4, 13)] + [(2026, m) for m in range(1, 4)]]
+
+
+def build_headers(db: DBManager, rows: int):
+    with db.conn:
+        db.conn.executemany(
+            "INSERT INTO journal_header (id, vouch_date, vouch_no, total_amount, narrative) VALUES (?, ?, ?, ?, '')",
+            ((i, f"{MONTHS[i % 12][0][:8]}{1 + i % 28:02d}", f"JNL{i:07d}", (i % 9973) + 0.25)
+             for i in range(1, rows + 1)))
+
+
+def used_pages(db: DBManager) -> int:
+    return db.conn.execute("PRAGMA page_count").fetchone()[0] - db.conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+
+def index_pages(db: DBManager, name: str, column: str) -> int:
+    before = used_pages(db)
+    db.conn.execute(f"CREATE INDEX {name} ON journal_header({column})")
+    db.conn.commit()
+    return used_pages(db) - before
+
+
+def scan(db: DBManager, select: str, predicate: str, bounds, repeat: int) -> float:
+    query = f"SELECT {select} FROM journal_header WHERE {predicate} BETWEEN ? AND ?"
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for low, high in bounds:
+            db.conn.execute(query, (low, high)).fetchone()
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(os.path.join(tmp, 'bench.db'))
+        build_headers(db, args.rows)
+        page_size = db.conn.execute("PRAGMA page_size").fetchone()[0]
+        db.conn.execute("DROP INDEX idx_journal_header_day")
+        text_pages = index_pages(db, 'idx_journal_header_date', 'vouch_date')
+        key_pages = index_pages(db, 'idx_journal_header_day', 'vouch_day')
+
+        key_bounds = [(date_key(low), date_key(high)) for low, high in MONTHS]
+        # COUNT(*) reads the index alone; SUM() also fetches every matching row from the table.
+        times = {(select, predicate): scan(db, select, predicate, bounds, args.repeat)
+                 for select in ('COUNT(*)', 'SUM(total_amount)')
+                 for predicate, bounds in (('vouch_date', MONTHS), ('vouch_day', key_bounds))}
+        db.conn.close()
+
+    print(f"voucher headers    : {args.rows:,} ({len(MONTHS)} month scans x {args.repeat})")
+    for label, pages, predicate in (("ISO date index", text_pages, 'vouch_date'), ("day key index", key_pages, 'vouch_day')):
+        print(f"{label:<19}: {pages * page_size / 2**20:8.1f} MiB  index-only {times['COUNT(*)', predicate]:6.2f} s"
+              f"  with rows {times['SUM(total_amount)', predicate]:6.2f} s")
+    print(f"index size         : {key_pages / text_pages:.0%} of the ISO index")
+    return 0 if key_pages < text_pages else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+Voucher dialog opening time and memory over many open/close cycles.
+
+Builds a throw-away database with ACCOUNTS accounts and ITEMS items, then:
+
+  * times opening a Payment and a Sales dialog the old way (a new
+    VoucherEntryDialog each time) against a DialogPool reset;
+  * runs CYCLES open/close cycles through DialogPool.exec_voucher and
+    DialogPool.exec_report (Payment, Sales and Day Book in turn, with a few
+    voucher lines entered each time) and compares the QObject count under the
+    main window and the process RSS after a warm-up with the figures at the end.
+
+Fails if objects pile up under the window or RSS grows by more than
+MAX_RSS_GROWTH_MB. Runs on the offscreen Qt platform unless QT_QPA_PLATFORM
+is set; --unpooled also shows the figures for never-deleted dialogs.
+
+    python benchmarks/bench_dialog_pool.py [--accounts 5000] [--items 3000] [--cycles 1000] [--unpooled]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if 'QT_QPA_PLATFORM' not in os.environ:
+    os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+    os.environ.setdefault('QT_LOGGING_RULES', '*.warning=false')  # the offscreen plugin warns about every dialog shown
+
+from PySide6.QtCore import QEvent, QObject, QTimer
+from PySide6.QtWidgets import QApplication, QWidget
+
+from zfx19 import DBManager, DayBookReport, DialogPool, VoucherEntryDialog
+
+MAX_RSS_GROWTH_MB = 5.0
+WARMUP_CYCLES = 100
+CYCLE = [('voucher', 'PAY'), ('voucher', 'SAL'), ('report', DayBookReport)]
+
+
+def rss_mb() -> float:
+    """Resident set size from /proc (Linux); 0 where it is not available."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return 0.0
+
+
+def flush_deletes(app: QApplication):
+    app.processEvents()
+    QApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+
+
+def fill_and_close():
+    """Runs inside the dialog's exec(): enters a few lines, then closes it."""
+    dialog = QApplication.activeModalWidget()
+    if isinstance(dialog, VoucherEntryDialog):
+        for _ in range(3):
+            if dialog.is_item_voucher:
+                dialog._add_item_row()
+            else:
+                dialog._add_account_row()
+    dialog.reject()
+
+
+def run_cycles(app: QApplication, window: QWidget, cycles: int, open_dialog) -> tuple:
+    """(QObjects, RSS MB) after the warm-up and after all cycles."""
+    marks = []
+    for cycle in range(cycles):
+        if cycle == WARMUP_CYCLES or cycle == cycles - 1:
+            flush_deletes(app)
+            marks.append((len(window.findChildren(QObject)), rss_mb()))
+        QTimer.singleShot(0, fill_and_close)
+        open_dialog(*CYCLE[cycle % len(CYCLE)])
+    return marks[0], marks[-1]
+
+
+def build_masters(db: DBManager, accounts: int, items: int):
+    with db.conn:
+        db.conn.executemany("INSERT INTO account_master (master_name, group_type) VALUES (?, ?)",
+                            ((f"Account {a:05d}", 'Sundry Debtors' if a % 3 else 'Indirect Expenses') for a in range(accounts)))
+        db.conn.executemany("INSERT INTO item_master (item_name) VALUES (?)", ((f"Item {i:05d}",) for i in range(items)))
+    db.save_setting("PartyMasterType", "Sundry Debtors")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=5000)
+    parser.add_argument('--items', type=int, default=3000)
+    parser.add_argument('--cycles', type=int, default=1000)
+    parser.add_argument('--unpooled', action='store_true', help="also run the cycles with new, never-deleted dialogs")
+    args = parser.parse_args(argv)
+    app = QApplication.instance() or QApplication([])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(os.path.join(tmp, 'bench.db'))
+        build_masters(db, args.accounts, args.items)
+
+        window = QWidget()
+        window.dialog_pool = DialogPool(db, window)
+        pool = window.dialog_pool
+
+        print(f"accounts / items   : {args.accounts:,} / {args.items:,}")
+        for code in ('PAY', 'SAL'):
+            start = time.perf_counter()
+            for _ in range(20):
+                VoucherEntryDialog(db, code, window).deleteLater()
+            new_ms = (time.perf_counter() - start) / 20 * 1000
+            pooled = VoucherEntryDialog(db, code, window, masters=pool.masters)
+            start = time.perf_counter()
+            for _ in range(20):
+                pooled.reset()
+            reset_ms = (time.perf_counter() - start) / 20 * 1000
+            pooled.deleteLater()
+            flush_deletes(app)
+            print(f"open {code}           : new dialog {new_ms:7.1f} ms   pooled reset {reset_ms:6.1f} ms")
+
+        def open_pooled(kind, target):
+            if kind == 'voucher':
+                pool.exec_voucher(target)
+            else:
+                pool.exec_report(target)
+
+        (objects_before, rss_before), (objects_after, rss_after) = run_cycles(app, window, args.cycles, open_pooled)
+        print(f"pooled {args.cycles} cycles : QObjects {objects_before:,} -> {objects_after:,}   "
+              f"RSS {rss_before:.1f} -> {rss_after:.1f} MB")
+
+        if args.unpooled:
+            def open_unpooled(kind, target):
+                dialog = VoucherEntryDialog(db, target, window) if kind == 'voucher' else target(db, window)
+                dialog.exec()
+
+            (u_objects_before, u_rss_before), (u_objects_after, u_rss_after) = run_cycles(app, window, args.cycles, open_unpooled)
+            print(f"unpooled {args.cycles} cycles: QObjects {u_objects_before:,} -> {u_objects_after:,}   "
+                  f"RSS {u_rss_before:.1f} -> {u_rss_after:.1f} MB")
+
+        pool.close()
+        flush_deletes(app)
+        db.close()
+
+    grew = objects_after > objects_before or rss_after - rss_before > MAX_RSS_GROWTH_MB
+    return 1 if grew else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
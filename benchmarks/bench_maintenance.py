@@ -0,0 +1,107 @@
+"""
+Idle-time maintenance: planner statistics, reclaimed pages and how fast a run yields.
+
+Builds a throw-away database with VOUCHERS payment vouchers (no statistics,
+as every company file had before maintenance), then:
+
+  * times a one-day, a one-month (the report default) and a full-year
+    ledger of the cash account, which is on every voucher;
+  * deletes the first 1/DELETE_FRACTION of the vouchers, leaving free pages behind;
+  * starts maintenance runs and interrupts each after one of INTERRUPT_AFTER_MS,
+    as user input would, recording how long the run took to stop and how long
+    a voucher save right after it waited;
+  * lets one run finish and reports its time, the tables analysed, the
+    change_log rows compacted and the pages reclaimed, then times the ledgers
+    again.
+
+Fails if a run takes longer than MAX_YIELD_MS to stop, a save after an
+interrupt waits longer than MAX_YIELD_MS, no pages are reclaimed, change_log
+is not empty afterwards (no consumer is registered), the file fails PRAGMA
+quick_check, or the one-day ledger is not faster.
+
+    python benchmarks/bench_maintenance.py [--vouchers 200000]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zfx19 import DBManager
+from maintenance import format_report
+from bench_backup import build_vouchers
+
+MAX_YIELD_MS = 50.0
+DELETE_FRACTION = 3
+INTERRUPT_AFTER_MS = (5, 20, 50, 100, 200)
+
+
+def timed_ms(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def ledgers(db: DBManager) -> tuple:
+    """(one-day, one-month, full-year) ms of the cash account's ledger."""
+    return (timed_ms(db.get_ledger_data, '2025-06-01', '2025-06-01', 'Bench Cash'),
+            timed_ms(db.get_ledger_data, '2025-06-01', '2025-06-30', 'Bench Cash'),
+            timed_ms(db.get_ledger_data, '2025-01-01', '2025-12-31', 'Bench Cash'))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vouchers', type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(os.path.join(tmp, 'bench.db'))
+        build_vouchers(db, args.vouchers)
+        before = ledgers(db)
+
+        with db.conn:
+            db.conn.execute("DELETE FROM payment_header WHERE id <= ?", (args.vouchers // DELETE_FRACTION,))  # lines go with them
+        free_before = db.conn.execute("PRAGMA freelist_count").fetchone()[0]
+        logged = db.conn.execute("SELECT COUNT(*) FROM change_log").fetchone()[0]
+        size_before = os.path.getsize(db.db_path)
+
+        yields = []
+        for delay in INTERRUPT_AFTER_MS:
+            db.start_maintenance(min_interval=0)
+            time.sleep(delay / 1000)
+            start = time.perf_counter()
+            db.interrupt_maintenance()
+            db._maintenance.join()
+            stop_ms = (time.perf_counter() - start) * 1000
+            save_ms = timed_ms(db.save_setting, "BenchWrite", str(delay))
+            yields.append((delay, stop_ms, save_ms, db.finish_maintenance()))
+
+        db.start_maintenance(min_interval=0)
+        db._maintenance.join()
+        report = db.finish_maintenance()
+        size_after = os.path.getsize(db.db_path)
+        after = ledgers(db)
+        logged_after = db.conn.execute("SELECT COUNT(*) FROM change_log").fetchone()[0]
+        checked = db.conn.execute("PRAGMA quick_check").fetchone()[0]
+        db.close()
+
+    print(f"database              : {args.vouchers:,} vouchers, 1/{DELETE_FRACTION} deleted -> {free_before:,} free pages")
+    for delay, stop_ms, save_ms, interrupted in yields:
+        print(f"interrupt after {delay:4d} ms: stopped in {stop_ms:5.1f} ms, next save {save_ms:5.1f} ms | {format_report(interrupted)}")
+    print(f"full run              : {format_report(report)}")
+    print(f"change_log rows       : {logged:,} -> {logged_after:,}")
+    print(f"file size             : {size_before / 2**20:.1f} -> {size_after / 2**20:.1f} MB")
+    print(f"cash ledger, one day  : {before[0]:7.1f} -> {after[0]:7.1f} ms")
+    print(f"cash ledger, one month: {before[1]:7.1f} -> {after[1]:7.1f} ms")
+    print(f"cash ledger, full year: {before[2]:7.1f} -> {after[2]:7.1f} ms (fewer vouchers after the delete)")
+    print(f"quick_check           : {checked}")
+    worst = max(max(stop_ms, save_ms) for _, stop_ms, save_ms, _ in yields)
+    ok = (worst <= MAX_YIELD_MS and report.pages_reclaimed > 0 and not report.interrupted and logged_after == 0
+          and checked == 'ok' and after[0] < before[0])
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Amount formatting in report cells: f"{value:,.2f}" vs MoneyFormatter.
+
+Formats CELLS amounts the way a scrolling grid does, one cell at a time,
+with the old per-cell f-string and with a per-column MoneyFormatter in
+Indian grouping. Amounts come as floats (report columns), as Decimals
+(voucher fields) and as paise (the ledger's running balance). Ledger
+amounts repeat, so DISTINCT sets how many distinct amounts there are. Fails
+if the formatter is slower than the f-string on floats.
+
+    python benchmarks/bench_money_format.py [--cells 1000000] [--distinct 20000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from money_format import INDIAN, MoneyFormatter
+
+
+def timed(format_cell, values) -> float:
+    start = time.perf_counter()
+    for value in values:
+        format_cell(value)
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cells', type=int, default=1_000_000)
+    parser.add_argument('--distinct', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    rnd = random.Random(41)
+    paise_pool = [rnd.randint(-10**9, 10**9) for _ in range(args.distinct)]
+    paise = [rnd.choice(paise_pool) for _ in range(args.cells)]
+    floats = [p / 100 for p in paise]
+    decimals = [Decimal(p).scaleb(-2) for p in paise]
+
+    results = [
+        ("float   f-string", timed(lambda v: f"{v:,.2f}", floats)),
+        ("float   formatter", timed(MoneyFormatter(INDIAN), floats)),
+        ("Decimal f-string", timed(lambda v: f"{v:,.2f}", decimals)),
+        ("Decimal formatter", timed(MoneyFormatter(INDIAN), decimals)),
+        ("paise   f-string", timed(lambda p: f"{abs(p) / 100:,.2f} {'Dr' if p >= 0 else 'Cr'}", paise)),
+        ("paise   formatter", timed(MoneyFormatter(INDIAN, dr_cr=True).format_minor, paise)),
+    ]
+
+    print(f"cells              : {args.cells:,} ({args.distinct:,} distinct amounts)")
+    for label, elapsed in results:
+        print(f"{label:<19}: {elapsed:6.2f} s  {elapsed / args.cells * 1e9:6.0f} ns/cell")
+    return 0 if results[1][1] <= results[0][1] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Period analysis: account x month matrix over a large journal.
+
+Builds a throw-away database with ACCOUNTS accounts and LINES journal lines
+(two per voucher) spread over a year, entered day by day, after a year with
+a tenth as many (CLOSED_YEAR_SHARE), and closes that first year with close_financial_year() (its Income and Expense
+balances go to Profit & Loss A/c). It then times get_period_balances() plus
+build_period_matrix() for the second year and checks the matrix against a
+per-line Python sum and every account's year-end closing balance against
+get_closing_balances(), an account missing from the matrix counting as a nil
+balance. Fails if the report takes longer than MAX_SECONDS or a figure differs.
+
+    python benchmarks/bench_period_analysis.py [--accounts 10000] [--lines 2000000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zfx19 import DBManager, date_key
+from period_matrix import build_period_matrix
+
+MAX_SECONDS = 1.0
+CLOSED_YEAR_SHARE = 0.1
+CLOSED_YEAR_END = '2025-03-31'
+DATE_FROM, DATE_TO = '2025-04-01', '2026-03-31'
+
+
+def build_journal(db: DBManager, accounts: int, lines: int):
+    """
+    lines in the year from DATE_FROM and CLOSED_YEAR_SHARE of that in the year
+    before; returns {(account_id, 'YYYY-MM'): movement} of the later year, summed
+    line by line in Python.
+    """
+    rnd = random.Random(42)
+    groups = ['Sundry Debtors', 'Sundry Creditors', 'Indirect Expenses', 'Direct Incomes', 'Bank Accounts']
+    expected = {}
+    with db.conn:
+        db.conn.executemany("INSERT INTO account_master (master_name, group_type, opening_balance, ob_type) VALUES (?, ?, ?, ?)",
+                            ((f"Account {a:05d}", groups[a % len(groups)], a % 7 * 100.0, 'Dr' if a % 2 else 'Cr')
+                             for a in range(accounts)))
+        first = db.conn.execute("SELECT MIN(id) FROM account_master WHERE master_name LIKE 'Account %'").fetchone()[0]
+        fy24, fy25 = ([f"{year + (m >= 9)}-{(m + 3) % 12 + 1:02d}-{d:02d}" for m in range(12) for d in range(1, 29)]
+                      for year in (2024, 2025))
+        closed, vouchers = int(lines * CLOSED_YEAR_SHARE) // 2, lines // 2
+        voucher_days = ([fy24[v * len(fy24) // closed] for v in range(closed)] +
+                        [fy25[v * len(fy25) // vouchers] for v in range(vouchers)])
+        headers, journal = [], []
+        for v, day in enumerate(voucher_days, 1):
+            amount = rnd.randint(100, 1000000) / 100
+            dr, cr = rnd.sample(range(first, first + accounts), 2)
+            headers.append((v, day, date_key(day), f"JNL{v:07d}", amount))
+            journal.append((v, 'Dr', dr, amount))
+            journal.append((v, 'Cr', cr, amount))
+            if day < DATE_FROM:
+                continue
+            expected[dr, day[:7]] = expected.get((dr, day[:7]), 0) + amount
+            expected[cr, day[:7]] = expected.get((cr, day[:7]), 0) - amount
+        db.conn.executemany("INSERT INTO journal_header (id, vouch_date, vouch_day, vouch_no, total_amount) VALUES (?, ?, ?, ?, ?)",
+                            headers)
+        db.conn.executemany("INSERT INTO journal_lines (vouch_header_id, dr_cr, master_account_id, amount) VALUES (?, ?, ?, ?)",
+                            journal)
+    return expected
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=10000)
+    parser.add_argument('--lines', type=int, default=2_000_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(os.path.join(tmp, 'bench.db'))
+        start = time.perf_counter()
+        expected = build_journal(db, args.accounts, args.lines)
+        db.close_financial_year('FY24', CLOSED_YEAR_END)
+        build_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        balances = db.get_period_balances(DATE_FROM, DATE_TO, columnar=True)
+        fetch_time = time.perf_counter() - start
+        matrix = build_period_matrix(balances, date_key(DATE_FROM), date_key(DATE_TO), db.get_group_accounts())
+        closing = matrix.closing()
+        report_time = time.perf_counter() - start
+
+        closing_balances = db.get_closing_balances(DATE_TO)
+        db.conn.close()
+
+    column = {month: col for col, month in enumerate(matrix.months)}
+    row = {account_id: r for r, account_id in enumerate(matrix.account_ids.tolist())}
+    wrong_movement = sum(abs(matrix.movement[row[account_id], column[month]] - amount) > 0.005
+                         for (account_id, month), amount in expected.items())
+    wrong_closing = sum(abs((closing[row[account_id], -1] if account_id in row else 0.0) - balance) > 0.005
+                        for account_id, balance in closing_balances.items())
+
+    print(f"accounts / lines   : {args.accounts:,} / {args.lines:,} (built and FY24 closed in {build_time:.1f} s)")
+    print(f"balances fetched   : {len(balances):,} rows in {fetch_time:6.2f} s")
+    print(f"period matrix      : {len(matrix):,} x {len(matrix.months)} in {report_time:6.2f} s (limit {MAX_SECONDS:.0f} s)")
+    print(f"mismatches         : {wrong_movement} movements, {wrong_closing} closing balances")
+    return 0 if report_time <= MAX_SECONDS and not wrong_movement and not wrong_closing else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Memory held by a materialised ledger: list of tuples vs ResultColumns.
+
+Builds a throw-away database with ROWS journal lines posted to one account
+and compares what get_ledger_data() keeps alive in both forms (tracemalloc,
+retained bytes after the call). Fails if the columnar form is not at least
+MIN_RATIO times smaller.
+
+    python benchmarks/bench_result_columns.py [--rows 1000000]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zfx19 import DBManager
+
+MIN_RATIO = 3.0
+NARRATIONS = ['Being cash paid', 'Being cash received', 'Contra entry', 'Bank charges', 'Salary for the month']
+
+
+def build_ledger(db: DBManager, rows: int):
+    db.add_master_entry('account', {'name': 'Cash', 'group_or_hsn': 'Cash-in-Hand'})
+    db.add_master_entry('account', {'name': 'Expenses', 'group_or_hsn': 'Indirect Expenses'})
+    cash_id = db.get_id_by_name('Cash', 'account')
+    expense_id = db.get_id_by_name('Expenses', 'account')
+    with db.conn:
+        db.conn.executemany(
+            "INSERT INTO journal_header (id, vouch_date, vouch_no, total_amount, narrative) VALUES (?, ?, ?, ?, ?)",
+            ((i, f"2025-{4 + i % 9:02d}-{1 + i % 28:02d}", f"JNL{i:07d}", (i % 9973) + 0.25, NARRATIONS[i % 5])
+             for i in range(1, rows + 1)))
+        db.conn.executemany(
+            "INSERT INTO journal_lines (vouch_header_id, dr_cr, master_account_id, amount) VALUES (?, ?, ?, ?)",
+            ((i, 'Dr' if i % 3 else 'Cr', cash_id, (i % 9973) + 0.25) for i in range(1, rows + 1)))
+        db.conn.executemany(
+            "INSERT INTO journal_lines (vouch_header_id, dr_cr, master_account_id, amount) VALUES (?, ?, ?, ?)",
+            ((i, 'Cr' if i % 3 else 'Dr', expense_id, (i % 9973) + 0.25) for i in range(1, rows + 1)))
+
+
+def measure(fetch):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fetch()
+    elapsed = time.perf_counter() - start
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, retained, elapsed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(os.path.join(tmp, 'bench.db'))
+        build_ledger(db, args.rows)
+        fetch = lambda columnar: db.get_ledger_data('2025-04-01', '2026-03-31', 'Cash', columnar=columnar)
+
+        rows, tuple_bytes, tuple_time = measure(lambda: fetch(False))
+        count = len(rows)
+        del rows
+        columns, column_bytes, column_time = measure(lambda: fetch(True))
+        assert len(columns) == count
+        db.conn.close()
+
+    ratio = tuple_bytes / column_bytes
+    print(f"ledger rows        : {count:,}")
+    print(f"list of tuples     : {tuple_bytes / 2**20:8.1f} MiB  {tuple_time:6.2f} s")
+    print(f"ResultColumns      : {column_bytes / 2**20:8.1f} MiB  {column_time:6.2f} s")
+    print(f"reduction          : {ratio:.1f}x (required {MIN_RATIO:.0f}x)")
+    return 0 if ratio >= MIN_RATIO else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Trial balance: every posting source, and the opening balances after a year-end close.
+
+Builds a throw-away database over two financial years (FY24 and FY25) with
+VOUCHERS vouchers entered day by day: rent payments, receipts from parties
+and sales and purchase bills (which post to the party, the Sales/Purchase
+Account and the GST Account), on accounts with opening balances. It then:
+
+  * runs the FY24 trial balance and checks every account's closing balance
+    against get_closing_balances();
+  * closes FY24 with close_financial_year(), which carries the closing
+    balances forward and moves the Income/Expense balances to Profit & Loss A/c;
+  * runs the trial balance for each of RANGES (the new year, and parts of it
+    starting on and after its first day) and checks every account's closing
+    balance against get_closing_balances(), an account missing from the
+    report counting as a nil balance;
+  * runs the FY24 trial balance again, now read from the archive, and checks
+    that the close did not change it.
+
+Fails if a figure differs or a trial balance does not balance.
+
+    python benchmarks/bench_trial_balance.py [--vouchers 100000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import datetime
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zfx19 import DBManager, date_key
+
+FY24 = ('2024-04-01', '2025-03-31')
+RANGES = (('2025-04-01', '2026-03-31'), ('2025-04-01', '2025-09-30'), ('2025-10-01', '2026-03-31'))
+PARTIES = 200
+
+
+def build_two_years(db: DBManager, vouchers: int):
+    """Payments, receipts, sales and purchase bills from FY24 to the end of FY25, day by day."""
+    rnd = random.Random(42)
+    start = datetime.date(2024, 4, 1)
+    days = [(start + datetime.timedelta(days=n)).isoformat() for n in range(730)]
+    with db.conn:
+        db.conn.executemany("INSERT INTO account_master (master_name, group_type, opening_balance, ob_type) VALUES (?, ?, ?, ?)",
+                            [("Bench Cash", 'Cash-in-Hand', 50000.0, 'Dr'), ("Bench Capital", 'Capital Account', 50000.0, 'Cr'),
+                             ("Bench Rent", 'Indirect Expenses', 0.0, 'Dr')] +
+                            [(f"Bench Party {p:03d}", 'Sundry Debtors' if p % 2 else 'Sundry Creditors', p // 2 * 10.0, 'Dr' if p % 2 else 'Cr')
+                             for p in range(PARTIES)])
+        ids = dict(db.conn.execute("SELECT master_name, id FROM account_master WHERE master_name LIKE 'Bench %'"))
+        parties = [ids[f"Bench Party {p:03d}"] for p in range(PARTIES)]
+        for day_no, day in enumerate(days):
+            first, last = day_no * vouchers // len(days) + 1, (day_no + 1) * vouchers // len(days) + 1
+            account_vouchers = {'payment': [], 'receipt': []}
+            bills = {'sales': [], 'purchase': []}
+            for v in range(first, last):
+                amount = rnd.randint(100, 100000) / 100
+                kind = ('payment', 'receipt', 'sales', 'purchase')[v % 4]
+                if kind == 'payment':
+                    account_vouchers[kind].append((v, amount, [('Dr', ids["Bench Rent"]), ('Cr', ids["Bench Cash"])]))
+                elif kind == 'receipt':
+                    account_vouchers[kind].append((v, amount, [('Dr', ids["Bench Cash"]), ('Cr', rnd.choice(parties))]))
+                else:
+                    bills[kind].append((v, rnd.choice(parties), amount, round(amount * 0.18, 2)))
+            for base, rows in account_vouchers.items():
+                db.conn.executemany(f"INSERT INTO {base}_header (id, vouch_date, vouch_day, vouch_no, total_amount) VALUES (?, ?, ?, ?, ?)",
+                                    [(v, day, date_key(day), f"{base[:2].upper()}{v:07d}", amount) for v, amount, _ in rows])
+                db.conn.executemany(f"INSERT INTO {base}_lines (vouch_header_id, dr_cr, master_account_id, amount) VALUES (?, ?, ?, ?)",
+                                    [(v, dr_cr, account, amount) for v, amount, lines in rows for dr_cr, account in lines])
+            for base, rows in bills.items():
+                db.conn.executemany(f"INSERT INTO {base}_header (id, trans_date, trans_day, vouch_no, party_mas_id, "
+                                    "total_taxable_amt, total_tax_amt, final_bill_amt) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                    [(v, day, date_key(day), f"{base[:2].upper()}{v:07d}", party, taxable, tax, taxable + tax)
+                                     for v, party, taxable, tax in rows])
+
+
+def trial_balance(db: DBManager, date_from: str, date_to: str) -> dict:
+    """{account name: (opening, debit, credit, closing)}"""
+    return {row[0]: row[2:] for row in db.get_trial_balance_data(date_from, date_to)}
+
+
+def mismatches(db: DBManager, rows: dict, date_to: str) -> list:
+    """Accounts whose closing balance in rows differs from get_closing_balances(date_to)."""
+    expected = {db.get_account_name_by_id(account_id): amount for account_id, amount in db.get_closing_balances(date_to).items()}
+    return [(name, rows[name][3] if name in rows else 0.0, expected.get(name, 0.0))
+            for name in sorted(expected.keys() | rows.keys())
+            if abs((rows[name][3] if name in rows else 0.0) - expected.get(name, 0.0)) > 0.005]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vouchers', type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(os.path.join(tmp, 'bench.db'))
+        build_two_years(db, args.vouchers)
+        before_close = trial_balance(db, *FY24)
+        results = [("FY24, live", FY24, before_close, mismatches(db, before_close, FY24[1]))]
+
+        db.close_financial_year('FY24', FY24[1])
+        for date_from, date_to in RANGES:
+            start = time.perf_counter()
+            rows = trial_balance(db, date_from, date_to)
+            seconds = time.perf_counter() - start
+            results.append((f"after close, {seconds * 1000:5.0f} ms", (date_from, date_to), rows,
+                            mismatches(db, rows, date_to)))
+        archived = trial_balance(db, *FY24)
+        changed = [name for name in before_close.keys() | archived.keys()
+                   if [round(x, 2) for x in before_close.get(name, ())] != [round(x, 2) for x in archived.get(name, ())]]
+        profit = results[1][2].get(DBManager.SYSTEM_ACCOUNTS['profit'][0], (0.0,))[0]
+        db.close()
+
+    ok = not changed
+    for label, (date_from, date_to), rows, wrong in results:
+        unbalanced = round(sum(row[3] for row in rows.values()), 2) + 0.0  # no -0.00
+        ok = ok and not wrong and unbalanced == 0
+        print(f"{date_from} .. {date_to} ({label}): {len(rows):4d} accounts, {len(wrong)} closing balance(s) "
+              f"differ from get_closing_balances, out of balance by {unbalanced:.2f}")
+        for name, got, expected in wrong[:5]:
+            print(f"    {name}: {got:,.2f}, expected {expected:,.2f}")
+    print(f"FY24 from the archive: {len(changed)} account(s) changed by the close")
+    print(f"Profit & Loss A/c opening in FY25: {profit:,.2f}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
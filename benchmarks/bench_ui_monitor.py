@@ -0,0 +1,126 @@
+"""
+UI responsiveness monitor: stall detection, action timings and profiling.
+
+Starts a UIMonitor on a bare QApplication and:
+
+  * blocks the main thread for each of STALLS_MS in turn (time.sleep in a
+    timer slot) and checks that every block is reported once, with about the
+    right duration, the running action's name and a stack that names the
+    blocking function;
+  * idles for IDLE_SECONDS and checks that no stall is reported;
+  * profiles one action and checks that pstats can read the saved stats;
+  * compares the process CPU time spent idling with and without the monitor,
+    i.e. what the heartbeat and the watchdog cost.
+
+Fails if a block is missed or mismeasured by more than TOLERANCE_MS, a stall
+is reported while idle, or the profile cannot be read. Runs on the offscreen
+Qt platform unless QT_QPA_PLATFORM is set.
+
+    python benchmarks/bench_ui_monitor.py [--idle-seconds 5]
+"""
+import os
+import sys
+import time
+import pstats
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if 'QT_QPA_PLATFORM' not in os.environ:
+    os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+    os.environ.setdefault('QT_LOGGING_RULES', '*.warning=false')
+
+from PySide6.QtCore import QEventLoop, QTimer
+from PySide6.QtWidgets import QApplication
+
+from ui_monitor import UIMonitor
+
+STALLS_MS = (300, 600, 1200)
+TOLERANCE_MS = 80.0
+
+
+def run_loop(app: QApplication, seconds: float):
+    """Runs the event loop for seconds, as an idle application would."""
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec()
+
+
+def block_main_thread(ms: int):
+    time.sleep(ms / 1000)
+
+
+def idle_cpu(app: QApplication, seconds: float, monitor: UIMonitor = None) -> float:
+    """Process CPU milliseconds per second spent idling in the event loop."""
+    if monitor is not None:
+        monitor.start()
+    start = time.process_time()
+    run_loop(app, seconds)
+    used = time.process_time() - start
+    if monitor is not None:
+        monitor.stop()
+    return used * 1000 / seconds
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--idle-seconds', type=float, default=5.0)
+    args = parser.parse_args(argv)
+    app = QApplication.instance() or QApplication([])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        monitor = UIMonitor(profile_dir=tmp)
+        monitor.start()
+        run_loop(app, 0.2)
+
+        detected = []
+        for ms in STALLS_MS:
+            before = len(monitor.stalls)
+
+            def blocked_action(ms=ms):
+                with monitor.action(f"Block {ms} ms"):
+                    block_main_thread(ms)
+
+            QTimer.singleShot(0, blocked_action)
+            run_loop(app, 0.3)
+            stalls = list(monitor.stalls)[before:]
+            detected.append((ms, stalls))
+
+        before = len(monitor.stalls)
+        run_loop(app, args.idle_seconds)
+        idle_stalls = len(monitor.stalls) - before
+
+        def profiled_action():
+            monitor.until_idle("Profiled action")
+            sum(i * i for i in range(200_000))
+
+        monitor.profile_next()
+        QTimer.singleShot(0, profiled_action)
+        run_loop(app, 0.2)
+        timing = monitor.timings[-1]
+        try:
+            profile_calls = pstats.Stats(timing.profile).total_calls if timing.profile else 0
+        except (OSError, TypeError):
+            profile_calls = 0
+        monitor.stop()
+
+    without_ms = idle_cpu(app, args.idle_seconds)
+    with_ms = idle_cpu(app, args.idle_seconds, UIMonitor())
+
+    ok = idle_stalls == 0 and profile_calls > 0
+    for ms, stalls in detected:
+        found = len(stalls) == 1
+        seconds = stalls[0].seconds * 1000 if found else 0.0
+        named = found and stalls[0].action == f"Block {ms} ms" and 'block_main_thread' in stalls[0].stack
+        good = found and named and abs(seconds - ms) <= TOLERANCE_MS
+        ok = ok and good
+        print(f"block {ms:5d} ms      : {len(stalls)} stall(s), measured {seconds:6.0f} ms, "
+              f"action and stack {'named' if named else 'MISSING'}{'' if good else '  <-- FAIL'}")
+    print(f"idle {args.idle_seconds:.0f} s          : {idle_stalls} stall(s) reported")
+    print(f"profiled action    : {timing.seconds * 1000:.1f} ms, {profile_calls:,} calls in the saved stats")
+    print(f"idle CPU           : {without_ms:.2f} ms/s without the monitor, {with_ms:.2f} ms/s with it")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
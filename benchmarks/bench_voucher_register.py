@@ -0,0 +1,144 @@
+"""
+Voucher register: keyset pages over a large voucher book.
+
+Builds a throw-away database with VOUCHERS vouchers spread over the seven
+header tables and a year, then:
+
+  * times get_voucher_register() pages at the start, the middle and the end
+    of the register (the end read newest-first), next to the same page read
+    with LIMIT/OFFSET over the full UNION;
+  * checks that pages read one after another match one full read of the
+    first PAGES_CHECKED pages;
+  * scrolls a VoucherRegisterView to the bottom SCROLL_PAGES times and
+    records the largest number of rows its model held.
+
+Fails if a keyset page takes longer than MAX_PAGE_MS, the pages do not line
+up, or the model held more than MAX_PAGES pages. Runs on the offscreen Qt
+platform unless QT_QPA_PLATFORM is set.
+
+    python benchmarks/bench_voucher_register.py [--vouchers 1000000] [--scroll-pages 200]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if 'QT_QPA_PLATFORM' not in os.environ:
+    os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+    os.environ.setdefault('QT_LOGGING_RULES', '*.warning=false')
+
+from PySide6.QtCore import QDate
+from PySide6.QtWidgets import QApplication
+
+from zfx19 import DBManager, VoucherRegisterModel, VoucherRegisterView, date_key
+
+MAX_PAGE_MS = 50.0
+PAGES_CHECKED = 20
+PAGE = VoucherRegisterModel.PAGE_SIZE
+ACCOUNT_BASES = ('payment', 'receipt', 'journal')
+ITEM_BASES = ('sales', 'purchase', 'creditnote', 'debitnote')
+
+
+def build_vouchers(db: DBManager, vouchers: int, parties: int = 500):
+    """Vouchers go in day by day, so the running-balance triggers only ever append."""
+    rnd = random.Random(7)
+    days = [f"2025-{m:02d}-{d:02d}" for m in range(1, 13) for d in range(1, 29)]
+    bases = ACCOUNT_BASES + ITEM_BASES
+    counts = [vouchers // len(bases) + (n < vouchers % len(bases)) for n in range(len(bases))]
+    with db.conn:
+        db.conn.executemany("INSERT INTO account_master (master_name, group_type) VALUES (?, ?)",
+                            ((f"Party {p:04d}", 'Sundry Debtors') for p in range(parties)))
+        first = db.conn.execute("SELECT MIN(id) FROM account_master WHERE master_name LIKE 'Party %'").fetchone()[0]
+        for day_no, day in enumerate(days):
+            for base, count in zip(bases, counts):
+                ids = range(day_no * count // len(days) + 1, (day_no + 1) * count // len(days) + 1)
+                rows = [(i, day, date_key(day), f"{base[:2].upper()}{i:07d}", rnd.randint(100, 10**7) / 100,
+                         first + rnd.randrange(parties)) for i in ids]
+                if base in ACCOUNT_BASES:
+                    db.conn.executemany(f"INSERT INTO {base}_header (id, vouch_date, vouch_day, vouch_no, total_amount) VALUES (?, ?, ?, ?, ?)",
+                                        (row[:5] for row in rows))
+                    db.conn.executemany(f"INSERT INTO {base}_lines (vouch_header_id, dr_cr, master_account_id, amount) VALUES (?, ?, ?, ?)",
+                                        ((row[0], dr_cr, row[5] if dr_cr == 'Dr' else first, row[4])
+                                         for row in rows for dr_cr in ('Dr', 'Cr')))
+                else:
+                    db.conn.executemany(f"INSERT INTO {base}_header (id, trans_date, trans_day, vouch_no, final_bill_amt, party_mas_id) "
+                                        f"VALUES (?, ?, ?, ?, ?, ?)", rows)
+    db.conn.execute("ANALYZE")
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def offset_page(db: DBManager, offset: int) -> float:
+    """Milliseconds to read one page at offset with LIMIT/OFFSET over the whole register."""
+    sub_queries = [f"SELECT vouch_day AS day, vouch_no, '{base}' AS t, total_amount FROM {base}_header" for base in ACCOUNT_BASES]
+    sub_queries += [f"SELECT trans_day, vouch_no, '{base}', final_bill_amt FROM {base}_header" for base in ITEM_BASES]
+    query = " UNION ALL ".join(sub_queries) + " ORDER BY day, vouch_no, t LIMIT ? OFFSET ?"
+    return timed(lambda: db.conn.execute(query, (PAGE, offset)).fetchall())[1]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vouchers', type=int, default=1_000_000)
+    parser.add_argument('--scroll-pages', type=int, default=200)
+    args = parser.parse_args(argv)
+    app = QApplication.instance() or QApplication([])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(os.path.join(tmp, 'bench.db'))
+        _, build_ms = timed(build_vouchers, db, args.vouchers)
+
+        first, first_ms = timed(db.get_voucher_register, limit=PAGE)
+        middle_key = db.get_voucher_register(after=None, limit=1, date_from='2025-07-01')[0][:3]
+        _, middle_ms = timed(db.get_voucher_register, after=middle_key, limit=PAGE)
+        _, last_ms = timed(db.get_voucher_register, limit=PAGE, newest_first=True)
+        _, party_ms = timed(db.get_voucher_register, limit=PAGE, party='Party 0042')
+        offset_ms = offset_page(db, args.vouchers // 2)
+
+        full = db.get_voucher_register(limit=PAGES_CHECKED * PAGE)
+        paged, after = [], None
+        for _ in range(PAGES_CHECKED):
+            page = db.get_voucher_register(after=after, limit=PAGE)
+            paged += page
+            after = page[-1][:3]
+        pages_match = paged == full
+
+        view = VoucherRegisterView(db)
+        view.show()
+        view.date_from.setDate(QDate(2025, 1, 1))
+        view.date_to.setDate(QDate(2025, 12, 31))
+        view.generate_report()
+        app.processEvents()
+        scroll_bar, model = view.report_table.verticalScrollBar(), view.report_table.model()
+        most_rows = len(model.rows)
+        start = time.perf_counter()
+        for _ in range(args.scroll_pages):
+            scroll_bar.setValue(scroll_bar.maximum())
+            app.processEvents()
+            most_rows = max(most_rows, len(model.rows))
+        scroll_ms = (time.perf_counter() - start) * 1000 / max(args.scroll_pages, 1)
+        scrolled_to = model.rows[-1].vouch_no
+        view.close()
+        view.deleteLater()
+        db.close()
+
+    keyset_ms = max(first_ms, middle_ms, last_ms)
+    print(f"vouchers           : {args.vouchers:,} (built in {build_ms / 1000:.1f} s)")
+    print(f"keyset page        : first {first_ms:6.1f} ms   middle {middle_ms:6.1f} ms   last {last_ms:6.1f} ms (limit {MAX_PAGE_MS:.0f} ms)")
+    print(f"party filter page  : {party_ms:6.1f} ms")
+    print(f"OFFSET page, middle: {offset_ms:6.1f} ms")
+    print(f"paged = full read  : {pages_match} ({PAGES_CHECKED} pages of {PAGE})")
+    print(f"scrolled {args.scroll_pages} pages  : {scroll_ms:6.1f} ms per page, to {scrolled_to}; "
+          f"model held at most {most_rows:,} rows (limit {VoucherRegisterModel.MAX_PAGES * PAGE:,})")
+    ok = keyset_ms <= MAX_PAGE_MS and pages_match and most_rows <= VoucherRegisterModel.MAX_PAGES * PAGE
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -107,45 +107,49 @@ class DBManager:
             raise Exception(f"Error deleting voucher: {e}")
 
     # --- Reports ---
-    def get_ledger_data(self, date_from: str, date_to: str, account_name: str) -> List[Tuple]:
+    # iter_* return a live cursor (used for streaming export); get_* materialise it.
+    def iter_ledger_data(self, date_from: str, date_to: str, account_name: str) -> sqlite3.Cursor | None:
         account_id = self.get_id_by_name(account_name, 'account')
         if not account_id:
-            return []
-        self.cursor.execute("""
-            SELECT v.date AS date, v.voucher_type AS type, t.amount AS amount,
+            return None
+        return self.conn.execute("""
+            SELECT v.date AS date, v.id AS vouch_no, v.voucher_type AS type,
                    CASE WHEN t.is_debit=1 THEN 'Dr' ELSE 'Cr' END AS drcr,
-                   v.id AS vouch_no
+                   t.amount AS amount
             FROM voucher_master v
             JOIN transactions t ON v.id = t.voucher_id
             WHERE v.date BETWEEN ? AND ? AND t.account_id = ?
             ORDER BY v.date, v.id
         """, (date_from, date_to, account_id))
-        rows = self.cursor.fetchall()
-        return [(r['date'], r['vouch_no'], r['type'], r['drcr'], r['amount']) for r in rows]
 
-    def get_day_book_data(self, date: str) -> List[Tuple]:
-        self.cursor.execute("""
-            SELECT v.date, v.id AS voucher_no, v.voucher_type,
+    def get_ledger_data(self, date_from: str, date_to: str, account_name: str) -> List[Tuple]:
+        rows = self.iter_ledger_data(date_from, date_to, account_name)
+        return [tuple(r) for r in rows] if rows else []
+
+    def iter_day_book_data(self, date: str) -> sqlite3.Cursor:
+        return self.conn.execute("""
+            SELECT v.date AS date, v.id AS voucher_no, v.voucher_type AS voucher_type,
                    SUM(CASE WHEN t.is_debit=1 THEN t.amount ELSE 0 END) AS dr_sum,
-                   v.narration
+                   COALESCE(v.narration, '') AS narration
             FROM voucher_master v
             LEFT JOIN transactions t ON v.id = t.voucher_id
             WHERE v.date = ?
             GROUP BY v.id
             ORDER BY v.id
         """, (date,))
-        rows = self.cursor.fetchall()
-        return [(r['date'], r['voucher_no'], r['voucher_type'], r['dr_sum'], r['narration'] or '') for r in rows]
+
+    def get_day_book_data(self, date: str) -> List[Tuple]:
+        return [tuple(r) for r in self.iter_day_book_data(date)]
 
     def get_stock_register_data(self, date_from: str, date_to: str) -> List[Tuple]:
         # Placeholder — return an empty list or synthesize demo rows
         # If you later add item transactions, adapt this to your item tables.
         return []  # [(date, item_name, hsn, qty, rate, amount), ...]
 
-    def get_subsidiary_book_data(self, date_from: str, date_to: str, group_type: str) -> List[Tuple]:
-        self.cursor.execute("""
-            SELECT v.date, v.id AS voucher_no, v.voucher_type,
-                   a.master_name, a.group_type,
+    def iter_subsidiary_book_data(self, date_from: str, date_to: str, group_type: str) -> sqlite3.Cursor:
+        return self.conn.execute("""
+            SELECT v.date AS date, v.id AS voucher_no, v.voucher_type AS voucher_type,
+                   a.master_name AS master_name, a.group_type AS group_type,
                    SUM(CASE WHEN t.is_debit=1 THEN t.amount ELSE -t.amount END) AS net_amount
             FROM voucher_master v
             JOIN transactions t ON v.id = t.voucher_id
@@ -154,19 +158,21 @@ class DBManager:
             GROUP BY v.id, a.id
             ORDER BY v.date, v.id
         """, (date_from, date_to, group_type))
-        rows = self.cursor.fetchall()
-        return [(r['date'], r['voucher_no'], r['voucher_type'], r['master_name'], r['group_type'], r['net_amount']) for r in rows]
 
-    def get_trial_balance_rows(self) -> List[Tuple[str, float, float]]:
+    def get_subsidiary_book_data(self, date_from: str, date_to: str, group_type: str) -> List[Tuple]:
+        return [tuple(r) for r in self.iter_subsidiary_book_data(date_from, date_to, group_type)]
+
+    def iter_trial_balance_rows(self) -> sqlite3.Cursor:
         # Sum across all accounts: total Dr and Cr per account
-        self.cursor.execute("""
-            SELECT a.master_name,
-                   SUM(CASE WHEN t.is_debit=1 THEN t.amount ELSE 0 END) AS dr_total,
-                   SUM(CASE WHEN t.is_debit=0 THEN t.amount ELSE 0 END) AS cr_total
+        return self.conn.execute("""
+            SELECT a.master_name AS master_name,
+                   COALESCE(SUM(CASE WHEN t.is_debit=1 THEN t.amount ELSE 0 END), 0.0) AS dr_total,
+                   COALESCE(SUM(CASE WHEN t.is_debit=0 THEN t.amount ELSE 0 END), 0.0) AS cr_total
             FROM account_master a
             LEFT JOIN transactions t ON a.id = t.account_id
             GROUP BY a.id
             ORDER BY a.master_name
         """)
-        rows = self.cursor.fetchall()
-        return [(r['master_name'], float(r['dr_total'] or 0.0), float(r['cr_total'] or 0.0)) for r in rows]
+
+    def get_trial_balance_rows(self) -> List[Tuple[str, float, float]]:
+        return [(r['master_name'], float(r['dr_total']), float(r['cr_total'])) for r in self.iter_trial_balance_rows()]
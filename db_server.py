@@ -0,0 +1,503 @@
+"""
+Local multi-client database server.
+
+One process owns the SQLite write connection so several data-entry
+terminals can share a ledger without "database is locked" retries:
+
+    python db_server.py --db accounting.db --tcp 127.0.0.1:8765
+    python db_server.py --db accounting.db --unix /tmp/sb-ledger.sock
+
+Clients talk newline-delimited JSON over the socket and call the public
+DBManager methods listed in READ_METHODS and WRITE_METHODS by name; anything
+else (close, the replica/backup/maintenance switches, ...) is refused. Writes
+go to a single writer thread that runs each call in its own SAVEPOINT and
+commits whole batches at once (group commit); EXCLUSIVE_METHODS, which cannot
+run inside a transaction, run alone between batches. Reads run on a pool of
+read connections; iter_* report cursors are streamed back in chunks.
+
+The protocol has no authentication, so --tcp only listens on a loopback
+address; terminals on other machines reach it through e.g. an SSH tunnel.
+
+The GUI becomes a thin client when the launcher's database path is a
+server address (tcp://host:port or unix:/path) - see RemoteDBManager.
+"""
+import sys
+import json
+import queue
+import socket
+import asyncio
+import argparse
+import ipaddress
+import threading
+from decimal import Decimal
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from result_columns import ResultColumns
+
+READ_METHODS = frozenset({
+    'get_account_group_names', 'get_account_group_tree', 'get_account_name_by_id', 'get_account_names', 'get_ageing',
+    'get_all_master_entries', 'get_backups', 'get_balance_sheet', 'get_cash_bank_book', 'get_cash_bank_position',
+    'get_change_version', 'get_changes', 'get_closing_balances', 'get_closing_stock', 'get_day_book_data',
+    'get_group_accounts', 'get_gst_summary', 'get_id_by_name', 'get_item_names', 'get_last_backup', 'get_ledger_data',
+    'get_master_entry_by_id', 'get_master_lists', 'get_outstanding_bills', 'get_period_balances',
+    'get_profit_and_loss', 'get_setting', 'get_stock_register_data', 'get_subsidiary_book_data',
+    'get_trial_balance_data', 'get_trial_balance_level', 'get_unreconciled_book', 'get_unreconciled_statement',
+    'get_voucher_data_by_id', 'get_voucher_register',
+    'iter_cash_bank_book', 'iter_day_book_data', 'iter_gst_summary', 'iter_ledger_data', 'iter_period_balances',
+    'iter_period_movements', 'iter_subsidiary_book_data', 'iter_trial_balance_data', 'iter_trial_balance_tree',
+    'verify_integrity', 'backup_now',  # own connections; neither writes to the live file
+})
+WRITE_METHODS = frozenset({
+    'add_account_group', 'add_account_voucher', 'add_item_voucher', 'add_master_entry',
+    'update_account_voucher', 'update_item_voucher', 'update_master_entry',
+    'delete_account_voucher', 'delete_change_consumer', 'delete_item_voucher', 'delete_master_entry',
+    'move_account_group', 'save_setting', 'rebuild_account_totals', 'rebuild_gst_totals', 'import_bank_statement',
+    'reconcile_bank_line', 'reconcile_bank_statement', 'unreconcile_bank_line', 'register_change_consumer',
+    'ack_changes', 'compact_change_log', 'repair_integrity', 'close_financial_year',
+})
+EXCLUSIVE_METHODS = frozenset({'close_financial_year'})  # ATTACHes its archive, which a transaction forbids
+STREAM_PREFIX = 'iter_'
+STREAM_CHUNK_ROWS = 2000
+
+
+# --- Wire encoding (Decimals, zfx19 typed rows and ResultColumns survive the round trip, plain tuples arrive as lists) ---
+def _to_wire(obj):
+    if isinstance(obj, ResultColumns):
+        return {'__columns__': obj.names, 'rows': [_to_wire(row) for row in obj]}
+    if isinstance(obj, tuple) and hasattr(obj, '_fields'):
+        return {'__row__': type(obj).__name__, 'values': [_to_wire(v) for v in obj]}
+    if isinstance(obj, (list, tuple)):
+        return [_to_wire(v) for v in obj]
+    return obj
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return {'__decimal__': str(obj)}
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode('utf-8', 'replace')
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _object_hook(obj):
+    if len(obj) == 1 and '__decimal__' in obj:
+        return Decimal(obj['__decimal__'])
+    if '__row__' in obj:
+        from zfx19 import ROW_TYPES
+        return ROW_TYPES[obj['__row__']]._make(obj['values'])
+    if '__columns__' in obj:
+        return ResultColumns.from_rows(obj['__columns__'], map(tuple, obj['rows']))
+    return obj
+
+
+def encode_message(message: dict) -> bytes:
+    return json.dumps(message, default=_default, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def decode_message(line: bytes) -> dict:
+    return json.loads(line, object_hook=_object_hook)
+
+
+def is_write_method(name: str) -> bool:
+    return name in WRITE_METHODS
+
+
+def is_exposed_method(name: str) -> bool:
+    """Only the methods in READ_METHODS and WRITE_METHODS are reachable over RPC."""
+    return name in READ_METHODS or name in WRITE_METHODS
+
+
+def is_loopback_host(host: str) -> bool:
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def parse_address(address: str):
+    """'tcp://host:port' -> ('tcp', (host, port)); 'unix:/path' -> ('unix', path)."""
+    if address.startswith('tcp://'):
+        host, _, port = address[len('tcp://'):].rpartition(':')
+        return 'tcp', (host or '127.0.0.1', int(port))
+    if address.startswith('unix:'):
+        return 'unix', address[len('unix:'):]
+    raise ValueError(f"Invalid server address: {address}")
+
+
+def is_server_address(path: str) -> bool:
+    return path.startswith(('tcp://', 'unix:'))
+
+
+# ==============================================================================
+# SERVER
+# ==============================================================================
+
+class GroupCommitConnection:
+    """
+    Stands in for DBManager.conn on the writer so that the per-method
+    commit()/rollback() calls apply to the method's SAVEPOINT instead of the
+    surrounding batch transaction, which the writer commits once.
+    """
+    def __init__(self, conn):
+        self._conn = conn
+        self._conn.isolation_level = None  # explicit BEGIN/COMMIT only
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self._conn.execute("ROLLBACK TO rpc_op")
+
+
+class WriteBatcher:
+    """Single writer thread: drains queued write calls and group-commits them."""
+    def __init__(self, db_path: str, max_batch: int = 256, batch_window: float = 0.002):
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.requests = queue.Queue()
+        self.ready = threading.Event()
+        self.error = None
+        self.exclusive_runs = 0  # readers reopen after one (close_financial_year changes the archives they ATTACH)
+        self.thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.error:
+            raise self.error
+
+    def submit(self, method: str, args: list, kwargs: dict) -> Future:
+        future = Future()
+        self.requests.put((future, method, args, kwargs))
+        return future
+
+    def close(self):
+        self.requests.put(None)
+        self.thread.join()
+
+    def _run(self):
+        from zfx19 import DBManager
+        try:
+            db = DBManager(self.db_path)
+            db.conn.execute("PRAGMA journal_mode=WAL")
+            db.conn.execute("PRAGMA synchronous=NORMAL")
+            db.conn = GroupCommitConnection(db.conn)
+        except Exception as e:
+            self.error = e
+            self.ready.set()
+            return
+        self.ready.set()
+        raw = db.conn._conn
+
+        pending = None
+        while True:
+            first, pending = pending or self.requests.get(), None
+            if first is None:
+                break
+            if first[1] in EXCLUSIVE_METHODS:
+                self._run_alone(db, first)
+                continue
+            batch = [first]
+            try:
+                # Give concurrent clients a moment to join this commit.
+                while len(batch) < self.max_batch:
+                    item = self.requests.get(timeout=self.batch_window)
+                    if item is None:
+                        self.requests.put(None)
+                        break
+                    if item[1] in EXCLUSIVE_METHODS:
+                        pending = item  # after this batch is committed
+                        break
+                    batch.append(item)
+            except queue.Empty:
+                pass
+
+            results = []
+            try:
+                raw.execute("BEGIN IMMEDIATE")
+                for future, method, args, kwargs in batch:
+                    raw.execute("SAVEPOINT rpc_op")
+                    try:
+                        results.append((future, getattr(db, method)(*args, **kwargs), None))
+                    except Exception as e:
+                        raw.execute("ROLLBACK TO rpc_op")
+                        results.append((future, None, e))
+                    raw.execute("RELEASE rpc_op")
+                raw.execute("COMMIT")
+            except Exception as e:
+                if raw.in_transaction:
+                    raw.execute("ROLLBACK")
+                results = [(future, None, e) for future, _, _, _ in batch]
+
+            # Only acknowledge once the batch is durable.
+            for future, result, error in results:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+        raw.close()
+
+    def _run_alone(self, db, request):
+        """Runs request outside any batch, with the method's own commit()/rollback() applying again."""
+        future, method, args, kwargs = request
+        group_conn = db.conn
+        db.conn = group_conn._conn
+        db.conn.isolation_level = ''
+        try:
+            result = getattr(db, method)(*args, **kwargs)
+        except Exception as e:
+            if db.conn.in_transaction:
+                db.conn.rollback()
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        finally:
+            db.conn.isolation_level = None
+            db.conn = group_conn
+            self.exclusive_runs += 1
+
+
+class DBServer:
+    def __init__(self, db_path: str, read_workers: int = 4):
+        self.db_path = db_path
+        self.writer = WriteBatcher(db_path)
+        self.local = threading.local()
+        self.readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="db-reader")
+
+    def _reader_db(self):
+        """Per-thread read connection, opened on first use."""
+        db = getattr(self.local, 'db', None)
+        if db is not None and self.local.exclusive_runs != self.writer.exclusive_runs:
+            db.conn.close()
+            db = None
+        if db is None:
+            from zfx19 import DBManager
+            self.local.exclusive_runs = self.writer.exclusive_runs
+            db = DBManager(self.db_path)
+            db.conn.execute("PRAGMA query_only=ON")
+            self.local.db = db
+        return db
+
+    def _read(self, method, args, kwargs):
+        return getattr(self._reader_db(), method)(*args, **kwargs)
+
+    def _stream(self, method, args, kwargs, send):
+        """Runs on a reader thread: pulls the cursor in chunks and hands each to the event loop."""
+        cursor = getattr(self._reader_db(), method)(*args, **kwargs)
+        if cursor is None:
+            send({'columns': None, 'rows': []}, True)
+            return
+        try:
+            columns = [col[0] for col in cursor.description]
+            cursor.arraysize = STREAM_CHUNK_ROWS
+            send({'columns': columns, 'rows': []}, False)
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                send({'rows': rows}, False)
+            send({'rows': []}, True)
+        finally:
+            cursor.close()
+
+    async def handle_client(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        lock = asyncio.Lock()
+
+        async def reply(message):
+            async with lock:
+                writer.write(encode_message(message))
+                await writer.drain()
+
+        async def dispatch(request):
+            req_id = request.get('id')
+            method = request.get('method', '')
+            args = request.get('args', [])
+            kwargs = request.get('kwargs', {})
+            try:
+                if not is_exposed_method(method):
+                    raise AttributeError(f"Unknown method: {method}")
+                if is_write_method(method):
+                    result = await asyncio.wrap_future(self.writer.submit(method, args, kwargs))
+                elif method.startswith(STREAM_PREFIX):
+                    def send(chunk, done):
+                        chunk.update({'id': req_id, 'done': done})
+                        asyncio.run_coroutine_threadsafe(reply(chunk), loop).result()
+                    await loop.run_in_executor(self.readers, self._stream, method, args, kwargs, send)
+                    return
+                else:
+                    result = await loop.run_in_executor(self.readers, self._read, method, args, kwargs)
+                await reply({'id': req_id, 'result': _to_wire(result)})
+            except Exception as e:
+                await reply({'id': req_id, 'error': {'type': type(e).__name__, 'message': str(e)}})
+
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(dispatch(decode_message(line)))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, address: str):
+        kind, target = parse_address(address)
+        if kind == 'tcp' and not is_loopback_host(target[0]):
+            raise ValueError(f"Refusing to listen on {target[0]}: the protocol has no authentication, use a loopback address")
+        if kind == 'tcp':
+            server = await asyncio.start_server(self.handle_client, *target, limit=2 ** 24)
+        else:
+            server = await asyncio.start_unix_server(self.handle_client, target, limit=2 ** 24)
+        print(f"Serving {self.db_path} on {address}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.writer.close()
+        self.readers.shutdown()
+
+
+# ==============================================================================
+# THIN CLIENT
+# ==============================================================================
+
+REMOTE_ERRORS = {'ValueError': ValueError, 'KeyError': KeyError, 'TypeError': TypeError,
+                 'AttributeError': AttributeError}
+
+
+def _connect(address: str) -> socket.socket:
+    kind, target = parse_address(address)
+    if kind == 'tcp':
+        return socket.create_connection(target)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(target)
+    return sock
+
+
+def _raise_remote(error: dict):
+    raise REMOTE_ERRORS.get(error['type'], Exception)(error['message'])
+
+
+class RemoteCursor:
+    """Read-only stand-in for a sqlite3 cursor, streaming an iter_* result on its own socket."""
+    def __init__(self, address: str, method: str, args: list, kwargs: dict):
+        self.arraysize = STREAM_CHUNK_ROWS
+        self.description = None
+        self._sock = _connect(address)
+        self._file = self._sock.makefile('rb')
+        self._buffer = []
+        self._done = False
+        self._sock.sendall(encode_message({'id': 0, 'method': method, 'args': args, 'kwargs': kwargs}))
+        first = self._next_chunk()
+        if first.get('columns') is not None:
+            self.description = [(name, None, None, None, None, None, None) for name in first['columns']]
+
+    def _next_chunk(self) -> dict:
+        message = decode_message(self._file.readline())
+        if 'error' in message:
+            self.close()
+            _raise_remote(message['error'])
+        self._buffer.extend(tuple(row) for row in message.get('rows', []))
+        self._done = message.get('done', False)
+        return message
+
+    def fetchmany(self, size: int = None):
+        size = size or self.arraysize
+        while len(self._buffer) < size and not self._done:
+            self._next_chunk()
+        rows, self._buffer = self._buffer[:size], self._buffer[size:]
+        return rows
+
+    def fetchall(self):
+        while not self._done:
+            self._next_chunk()
+        rows, self._buffer = self._buffer, []
+        return rows
+
+    def __iter__(self):
+        while rows := self.fetchmany():
+            yield from rows
+
+    def close(self):
+        self._done = True
+        self._file.close()
+        self._sock.close()
+
+
+class RemoteDBManager:
+    """
+    Drop-in replacement for DBManager that forwards every call to a
+    db_server. Safe to share between threads (one request in flight at a time).
+    """
+    def __init__(self, address: str):
+        self.address = address
+        self.db_path = address
+        self._sock = _connect(address)
+        self._file = self._sock.makefile('rb')
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def _call(self, method: str, *args, **kwargs):
+        if method.startswith(STREAM_PREFIX):
+            cursor = RemoteCursor(self.address, method, list(args), kwargs)
+            if cursor.description is None:
+                cursor.close()
+                return None
+            return cursor
+        with self._lock:
+            self._next_id += 1
+            self._sock.sendall(encode_message({'id': self._next_id, 'method': method, 'args': list(args), 'kwargs': kwargs}))
+            message = decode_message(self._file.readline())
+        if 'error' in message:
+            _raise_remote(message['error'])
+        return message['result']
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        from zfx19 import DBManager
+        attr = getattr(DBManager, name, None)
+        if attr is None:
+            raise AttributeError(name)
+        if not callable(attr):
+            return attr  # class-level constants
+        return lambda *args, **kwargs: self._call(name, *args, **kwargs)
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Share one ledger database between several terminals.")
+    parser.add_argument('--db', required=True, help="SQLite database file")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--tcp', default='127.0.0.1:8765', help="loopback host:port to listen on (default 127.0.0.1:8765)")
+    group.add_argument('--unix', help="UNIX socket path to listen on")
+    parser.add_argument('--readers', type=int, default=4, help="Read connection pool size")
+    args = parser.parse_args(argv)
+
+    address = f"unix:{args.unix}" if args.unix else f"tcp://{args.tcp}"
+    kind, target = parse_address(address)
+    if kind == 'tcp' and not is_loopback_host(target[0]):
+        parser.error(f"--tcp {args.tcp}: only loopback addresses are served (the protocol has no authentication)")
+    server = DBServer(args.db, read_workers=args.readers)
+    try:
+        asyncio.run(server.serve(address))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,7 +3,7 @@ from PySide6.QtWidgets import (
     QTableWidgetItem, QHeaderView
 )
 from PySide6.QtCore import QDate
-from widgets import AutoCompleteComboBox
+from widgets import AutoCompleteComboBox, export_report
 # Decimal precision for financial accuracy
 # getcontext().prec = 28
 
@@ -27,11 +27,14 @@ class DayBookDialog(QDialog):
 
         btn_fetch = QPushButton("Fetch")
         btn_fetch.clicked.connect(self._fetch_data)
+        btn_export = QPushButton("Export...")
+        btn_export.clicked.connect(lambda: export_report(self, self._open_cursor, "daybook.csv"))
 
         layout = QVBoxLayout(self)
         layout.addWidget(QLabel("Date:"))
         layout.addWidget(self.date_edit)
         layout.addWidget(btn_fetch)
+        layout.addWidget(btn_export)
         layout.addWidget(self.table)
 
     def _fetch_data(self):
@@ -41,3 +44,6 @@ class DayBookDialog(QDialog):
         for r, row in enumerate(data):
             for c, val in enumerate(row):
                 self.table.setItem(r, c, QTableWidgetItem(str(val)))
+
+    def _open_cursor(self):
+        return self.db_manager.iter_day_book_data(self.date_edit.date().toString("yyyy-MM-dd"))
@@ -3,7 +3,7 @@ from PySide6.QtWidgets import (
     QTableWidgetItem, QHeaderView
 )
 from PySide6.QtCore import QDate
-from widgets import AutoCompleteComboBox
+from widgets import AutoCompleteComboBox, export_report
 
 class LedgerReportDialog(QDialog):
     def __init__(self, db_manager, parent=None):
@@ -25,6 +25,8 @@ class LedgerReportDialog(QDialog):
 
         btn_fetch = QPushButton("Fetch")
         btn_fetch.clicked.connect(self._fetch_data)
+        btn_export = QPushButton("Export...")
+        btn_export.clicked.connect(lambda: export_report(self, self._open_cursor, "ledger.csv"))
 
         layout = QVBoxLayout(self)
         layout.addWidget(QLabel("Account:"))
@@ -34,6 +36,7 @@ class LedgerReportDialog(QDialog):
         layout.addWidget(QLabel("To:"))
         layout.addWidget(self.date_to)
         layout.addWidget(btn_fetch)
+        layout.addWidget(btn_export)
         layout.addWidget(self.table)
 
     def _fetch_data(self):
@@ -47,3 +50,10 @@ class LedgerReportDialog(QDialog):
         for r, row in enumerate(data):
             for c, val in enumerate(row):
                 self.table.setItem(r, c, QTableWidgetItem(str(val)))
+
+    def _open_cursor(self):
+        return self.db_manager.iter_ledger_data(
+            self.date_from.date().toString("yyyy-MM-dd"),
+            self.date_to.date().toString("yyyy-MM-dd"),
+            self.account_combo.currentText()
+        )
@@ -2,6 +2,7 @@ from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView
 )
 from decimal import Decimal
+from widgets import export_report
 
 class TrialBalanceDialog(QDialog):
     def __init__(self, db_manager, parent=None):
@@ -17,9 +18,12 @@ class TrialBalanceDialog(QDialog):
 
         btn_generate = QPushButton("Generate")
         btn_generate.clicked.connect(self._generate)
+        btn_export = QPushButton("Export...")
+        btn_export.clicked.connect(lambda: export_report(self, self.db_manager.iter_trial_balance_rows, "trial_balance.csv"))
 
         layout = QVBoxLayout(self)
         layout.addWidget(btn_generate)
+        layout.addWidget(btn_export)
         layout.addWidget(self.table)
 
     def _generate(self):
@@ -0,0 +1,252 @@
+"""
+Streaming report exporters.
+
+Each writer takes a live sqlite3 cursor (see the DBManager iter_* report
+methods), pulls it in fetchmany() batches and writes incrementally, so the
+full result set is never held in memory:
+
+    export_csv       - plain CSV with a header row
+    export_xlsx      - minimal single-workbook XLSX (inline strings, no styles)
+    export_columnar  - zlib-compressed columnar archive (.sbcol), read back
+                       with iter_columnar()
+
+export_cursor() picks the writer from the file extension.
+"""
+import csv
+import json
+import zlib
+import struct
+import zipfile
+from array import array
+from xml.sax.saxutils import escape
+
+DEFAULT_BATCH_SIZE = 10000
+EXPORT_FILTER = "CSV (*.csv);;Excel Workbook (*.xlsx);;Columnar Archive (*.sbcol)"
+
+
+def _batches(cursor, batch_size: int):
+    cursor.arraysize = batch_size
+    while True:
+        batch = cursor.fetchmany()
+        if not batch:
+            return
+        yield batch
+
+
+def _column_names(cursor):
+    return [col[0] for col in cursor.description]
+
+
+# --- CSV ---
+def export_csv(cursor, path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(_column_names(cursor))
+        for batch in _batches(cursor, batch_size):
+            writer.writerows(batch)
+            count += len(batch)
+    return count
+
+
+# --- XLSX ---
+XLSX_MAX_ROWS = 1048576
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '{sheets}</Types>'
+)
+_SHEET_CONTENT_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{n}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>{sheets}</sheets></workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{rels}</Relationships>'
+)
+_SHEET_HEAD = (
+    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = b'</sheetData></worksheet>'
+
+
+def _xlsx_cell(value) -> str:
+    if value is None:
+        return '<c/>'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value!r}</v></c>'
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(value))}</t></is></c>'
+
+
+def _xlsx_row(row) -> str:
+    return '<row>' + ''.join([_xlsx_cell(v) for v in row]) + '</row>'
+
+
+def export_xlsx(cursor, path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Writes the rows as an XLSX workbook, starting a new sheet every XLSX_MAX_ROWS rows."""
+    header = _xlsx_row(_column_names(cursor)).encode('utf-8')
+    count = 0
+    sheet_count = 0
+    sheet = None
+    sheet_rows = XLSX_MAX_ROWS
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        try:
+            for batch in _batches(cursor, batch_size):
+                start = 0
+                while start < len(batch):
+                    if sheet_rows >= XLSX_MAX_ROWS:
+                        if sheet:
+                            sheet.write(_SHEET_TAIL)
+                            sheet.close()
+                        sheet_count += 1
+                        sheet = zf.open(f'xl/worksheets/sheet{sheet_count}.xml', 'w', force_zip64=True)
+                        sheet.write(_SHEET_HEAD + header)
+                        sheet_rows = 1
+                    chunk = batch[start:start + XLSX_MAX_ROWS - sheet_rows]
+                    sheet.write(''.join([_xlsx_row(row) for row in chunk]).encode('utf-8'))
+                    sheet_rows += len(chunk)
+                    start += len(chunk)
+                count += len(batch)
+            if sheet is None:
+                sheet_count = 1
+                sheet = zf.open('xl/worksheets/sheet1.xml', 'w')
+                sheet.write(_SHEET_HEAD + header)
+            sheet.write(_SHEET_TAIL)
+        finally:
+            if sheet:
+                sheet.close()
+
+        numbers = range(1, sheet_count + 1)
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES.format(
+            sheets=''.join(_SHEET_CONTENT_TYPE.format(n=n) for n in numbers)))
+        zf.writestr('_rels/.rels', _ROOT_RELS)
+        zf.writestr('xl/workbook.xml', _WORKBOOK.format(
+            sheets=''.join(f'<sheet name="Sheet{n}" sheetId="{n}" r:id="rId{n}"/>' for n in numbers)))
+        zf.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS.format(rels=''.join(
+            f'<Relationship Id="rId{n}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{n}.xml"/>' for n in numbers)))
+    return count
+
+
+# --- Columnar archive (.sbcol) ---
+# Layout: MAGIC, then per row group one zlib-compressed chunk per column,
+# then a JSON footer (column names, chunk offsets/lengths/encodings), its
+# length as a little-endian uint64, and MAGIC again.
+#
+# Chunk encodings (null mask of one byte per row precedes the values):
+#   'q' int64, 'd' float64, 's' uint32 lengths + utf-8 blob, 'n' all null.
+COLUMNAR_MAGIC = b'SBCOL1\n'
+
+
+def _encode_column(values):
+    mask = bytes(v is None for v in values)
+    present = [v for v in values if v is not None]
+    if not present:
+        return 'n', mask
+    if all(type(v) is int for v in present):
+        kind, payload = 'q', array('q', present).tobytes()
+    elif all(type(v) in (int, float) for v in present):
+        kind, payload = 'd', array('d', present).tobytes()
+    else:
+        encoded = [str(v).encode('utf-8') for v in present]
+        kind = 's'
+        payload = array('I', map(len, encoded)).tobytes() + b''.join(encoded)
+    return kind, mask + payload
+
+
+def _decode_column(kind: str, data: bytes, rows: int):
+    mask, payload = data[:rows], data[rows:]
+    if kind == 'n':
+        return [None] * rows
+    if kind == 's':
+        present = sum(1 for m in mask if not m)
+        lengths = array('I')
+        lengths.frombytes(payload[:4 * present])
+        values = []
+        pos = 4 * present
+        for n in lengths:
+            values.append(payload[pos:pos + n].decode('utf-8'))
+            pos += n
+    else:
+        values = array(kind)
+        values.frombytes(payload)
+    it = iter(values)
+    return [None if m else next(it) for m in mask]
+
+
+def export_columnar(cursor, path: str, batch_size: int = 65536, level: int = 6) -> int:
+    """Writes the rows as a compressed columnar archive, one row group per batch."""
+    columns = _column_names(cursor)
+    row_groups = []
+    count = 0
+    with open(path, 'wb') as f:
+        f.write(COLUMNAR_MAGIC)
+        for batch in _batches(cursor, batch_size):
+            chunks = []
+            for values in zip(*batch):
+                kind, raw = _encode_column(values)
+                data = zlib.compress(raw, level)
+                chunks.append([f.tell(), len(data), kind])
+                f.write(data)
+            row_groups.append({'rows': len(batch), 'chunks': chunks})
+            count += len(batch)
+        footer = json.dumps({'columns': columns, 'row_groups': row_groups}).encode('utf-8')
+        f.write(footer)
+        f.write(struct.pack('<Q', len(footer)))
+        f.write(COLUMNAR_MAGIC)
+    return count
+
+
+def read_columnar_footer(path: str) -> dict:
+    with open(path, 'rb') as f:
+        f.seek(-(8 + len(COLUMNAR_MAGIC)), 2)
+        footer_len = struct.unpack('<Q', f.read(8))[0]
+        if f.read() != COLUMNAR_MAGIC:
+            raise ValueError(f"{path} is not a columnar archive.")
+        f.seek(-(8 + len(COLUMNAR_MAGIC) + footer_len), 2)
+        return json.loads(f.read(footer_len))
+
+
+def iter_columnar(path: str, columns=None):
+    """Yields the archived rows as tuples, one row group at a time (optionally only some columns)."""
+    footer = read_columnar_footer(path)
+    wanted = [footer['columns'].index(c) for c in columns] if columns else range(len(footer['columns']))
+    with open(path, 'rb') as f:
+        for group in footer['row_groups']:
+            decoded = []
+            for i in wanted:
+                offset, length, kind = group['chunks'][i]
+                f.seek(offset)
+                decoded.append(_decode_column(kind, zlib.decompress(f.read(length)), group['rows']))
+            yield from zip(*decoded)
+
+
+# --- Dispatch ---
+EXPORTERS = {'.csv': export_csv, '.xlsx': export_xlsx, '.sbcol': export_columnar}
+
+
+def export_cursor(cursor, path: str) -> int:
+    """Exports the cursor using the writer matching the file extension. Returns the row count."""
+    for ext, writer in EXPORTERS.items():
+        if path.lower().endswith(ext):
+            try:
+                return writer(cursor, path)
+            finally:
+                cursor.close()
+    raise ValueError(f"Unsupported export format: {path}")
@@ -0,0 +1,373 @@
+"""
+Local HTTP JSON API over the DBManager read methods.
+
+Lets other tools on this machine read balances, reports and vouchers without
+going through the GUI:
+
+    python http_api.py --db accounting.db --port 8780
+    curl 'http://127.0.0.1:8780/get_trial_balance_level?as_of=2026-03-31'
+    curl 'http://127.0.0.1:8780/get_voucher_data_by_id?voucher_id=12&vouch_type_code=PAY'
+    curl 'http://127.0.0.1:8780/iter_ledger_data?date_from=2025-04-01&date_to=2026-03-31&account_name=Cash'
+
+GET /<method> calls the get_* / iter_* DBManager method of that name (db_server.READ_METHODS)
+with the query string as keyword arguments, converted according to the
+method's annotations. A get_* result is one JSON document (typed rows become
+objects, ResultColumns become {"columns": [...], "rows": [...]}); an iter_*
+cursor streams as chunked NDJSON, one object per row and one batch of rows
+per chunk, so a year's ledger never sits in memory. GET / lists the
+endpoints and their parameters. A method that finds nothing (None) is a 404.
+
+Queries run on a pool of reader threads, each with a query_only DBManager of
+its own. Responses carry an ETag built from PRAGMA data_version, read on a
+connection that never writes, so it changes exactly when another connection
+commits. A request whose If-None-Match still matches gets a 304 without
+running the query.
+
+The server listens on 127.0.0.1 only, and answers only requests whose Host
+is a loopback name (web pages reached through DNS rebinding get a 403).
+"""
+import os
+import sys
+import json
+import time
+import types
+import typing
+import sqlite3
+import asyncio
+import inspect
+import argparse
+import threading
+from decimal import Decimal
+from functools import lru_cache
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+from result_columns import ResultColumns
+from db_server import READ_METHODS, STREAM_CHUNK_ROWS, STREAM_PREFIX
+
+HOST = '127.0.0.1'
+READ_PREFIXES = ('get_', STREAM_PREFIX)
+LOOPBACK_NAMES = ('127.0.0.1', 'localhost')
+MAX_HEADER_BYTES = 16384
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: dict = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+# --- JSON encoding (typed rows as objects, Decimals as numbers) ---
+def _to_json(obj):
+    if isinstance(obj, ResultColumns):
+        return {'columns': obj.names, 'rows': [list(row) for row in obj]}
+    if isinstance(obj, tuple) and hasattr(obj, '_fields'):
+        return {field: _to_json(value) for field, value in zip(obj._fields, obj)}
+    if isinstance(obj, (list, tuple)):
+        return [_to_json(v) for v in obj]
+    if isinstance(obj, dict):
+        return {key: _to_json(value) for key, value in obj.items()}
+    return obj
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)  # amounts are stored as REAL anyway
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode('utf-8', 'replace')
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode_json(obj) -> bytes:
+    return json.dumps(_to_json(obj), default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+# --- Query string -> keyword arguments ---
+@lru_cache(maxsize=None)
+def _parameters(method: str) -> dict:
+    """The method's parameters after self, by name."""
+    from zfx19 import DBManager
+    return dict(list(inspect.signature(getattr(DBManager, method)).parameters.items())[1:])
+
+
+def _convert_value(kind, text: str):
+    if kind is bool:
+        if text.lower() in ('1', 'true', 'yes'):
+            return True
+        if text.lower() in ('0', 'false', 'no'):
+            return False
+        raise ValueError(f"'{text}' is not true or false")
+    if kind in (int, float):
+        return kind(text)
+    return text
+
+
+def _convert(param: inspect.Parameter, values: list):
+    kind = param.annotation
+    if kind is inspect.Parameter.empty:
+        kind = str if param.default in (inspect.Parameter.empty, None) else type(param.default)
+    if typing.get_origin(kind) in (typing.Union, types.UnionType):
+        kind = next(arg for arg in typing.get_args(kind) if arg is not type(None))
+    if typing.get_origin(kind) is list:
+        item = (typing.get_args(kind) or (str,))[0]
+        return [_convert_value(item, value) for value in values]
+    return _convert_value(kind, values[-1])
+
+
+def parse_arguments(method: str, query: str) -> dict:
+    """Keyword arguments for method from a query string; HTTPError 400 if they do not fit its signature."""
+    params = _parameters(method)
+    kwargs = {}
+    for name, values in parse_qs(query, keep_blank_values=True).items():
+        if name not in params:
+            raise HTTPError(400, f"{method} has no parameter '{name}'")
+        try:
+            kwargs[name] = _convert(params[name], values)
+        except ValueError as e:
+            raise HTTPError(400, f"Invalid value for '{name}': {e}")
+    missing = [name for name, param in params.items()
+               if param.default is inspect.Parameter.empty and name not in kwargs]
+    if missing:
+        raise HTTPError(400, f"{method} needs {', '.join(missing)}")
+    return kwargs
+
+
+def list_endpoints() -> list:
+    from zfx19 import DBManager
+    endpoints = []
+    for name in sorted(dir(DBManager)):
+        if not name.startswith(READ_PREFIXES) or name not in READ_METHODS:
+            continue
+        doc = inspect.getdoc(getattr(DBManager, name)) or ''
+        endpoints.append({
+            'path': f"/{name}",
+            'stream': name.startswith(STREAM_PREFIX),
+            'params': {param_name: {'type': None if param.annotation is inspect.Parameter.empty else
+                                    getattr(param.annotation, '__name__', str(param.annotation)),
+                                    'required': param.default is inspect.Parameter.empty}
+                       for param_name, param in _parameters(name).items()},
+            'doc': doc.split('\n\n')[0].replace('\n', ' '),
+        })
+    return endpoints
+
+
+# --- HTTP framing ---
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags or f"W/{etag}" in tags
+
+
+def _response_head(status: int, headers: dict, keep_alive: bool) -> bytes:
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+def _response(status: int, headers: dict, body: bytes, keep_alive: bool) -> bytes:
+    if status != 304:  # a 304 has no body, and its Content-Length would describe the 200's
+        headers = {**headers, 'Content-Length': len(body)}
+    return _response_head(status, headers, keep_alive) + body
+
+
+async def _read_request(reader: asyncio.StreamReader):
+    """(method, target, version, headers) of the next request; None once the client has closed the connection."""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(431, "Request header too large")
+    request_line, *header_lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = request_line.split(' ')
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+    headers = {}
+    for line in header_lines:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+    if 'transfer-encoding' in headers:
+        raise HTTPError(501, "Request bodies are not supported")
+    if headers.get('content-length', '0') != '0':
+        await reader.readexactly(int(headers['content-length']))  # a GET body means nothing here
+    return method, target, version, headers
+
+
+class HTTPAPIServer:
+    def __init__(self, db_path: str, read_workers: int = 4):
+        self.db_path = db_path
+        self.local = threading.local()
+        self.readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="api-reader")
+        # data_version restarts with every connection, so the start time keeps an
+        # earlier run's ETags from matching.
+        self.instance = f"{time.time_ns():x}"
+        self._version_conn = sqlite3.connect(db_path, uri=True, check_same_thread=False)
+        self._version_lock = threading.Lock()
+        self.port = None
+
+    def _reader_db(self):
+        """Per-thread read connection, opened on first use."""
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            from zfx19 import DBManager
+            db = DBManager(self.db_path)
+            db.conn.execute("PRAGMA query_only=ON")
+            self.local.db = db
+        return db
+
+    def etag(self) -> str:
+        with self._version_lock:
+            version = self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+        return f'"{self.instance}-{version}"'
+
+    def _call(self, method: str, kwargs: dict):
+        try:
+            result = getattr(self._reader_db(), method)(**kwargs)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        if result is None:
+            raise HTTPError(404, "Not found")
+        return result
+
+    def _get(self, method: str, kwargs: dict, if_none_match: str, keep_alive: bool) -> bytes:
+        """Runs on a reader thread; returns the whole response."""
+        # Read the version before the query: a commit in between makes the ETag
+        # older than the body, which only costs the client one more full fetch.
+        etag = self.etag()
+        if _etag_matches(if_none_match, etag):
+            return _response(304, {'ETag': etag}, b'', keep_alive)
+        body = encode_json(self._call(method, kwargs))
+        return _response(200, {'Content-Type': 'application/json; charset=utf-8', 'ETag': etag,
+                               'Cache-Control': 'no-cache'}, body, keep_alive)
+
+    def _stream(self, method: str, kwargs: dict, if_none_match: str, keep_alive: bool, chunked: bool, send):
+        """Runs on a reader thread: sends the response head, then the cursor rows as NDJSON a batch at a time."""
+        etag = self.etag()
+        if _etag_matches(if_none_match, etag):
+            send(_response(304, {'ETag': etag}, b'', keep_alive))
+            return
+        cursor = self._call(method, kwargs)
+        try:
+            columns = [col[0] for col in cursor.description]
+            cursor.arraysize = STREAM_CHUNK_ROWS
+            headers = {'Content-Type': 'application/x-ndjson; charset=utf-8', 'ETag': etag, 'Cache-Control': 'no-cache'}
+            if chunked:
+                headers['Transfer-Encoding'] = 'chunked'
+            send(_response_head(200, headers, keep_alive))
+            encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_default).encode
+            while rows := cursor.fetchmany():
+                data = ''.join([encode(dict(zip(columns, row))) + '\n' for row in rows]).encode('utf-8')
+                send(b'%x\r\n%s\r\n' % (len(data), data) if chunked else data)
+            if chunked:
+                send(b'0\r\n\r\n')
+        finally:
+            cursor.close()
+
+    async def _respond(self, writer, method: str, target: str, version: str, headers: dict) -> bool:
+        """Answers one request; returns whether the connection can take another."""
+        loop = asyncio.get_running_loop()
+        keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+        started = False
+
+        def send(data: bytes):
+            nonlocal started
+            started = True
+            asyncio.run_coroutine_threadsafe(_write(writer, data), loop).result()
+
+        try:
+            if method != 'GET':
+                raise HTTPError(405, "Only GET is supported", {'Allow': 'GET'})
+            if headers.get('host', HOST).partition(':')[0] not in LOOPBACK_NAMES:
+                raise HTTPError(403, "Host is not a loopback name")
+            url = urlsplit(target)
+            name = url.path.strip('/')
+            if not name:
+                body = encode_json({'database': self.db_path, 'endpoints': list_endpoints()})
+                await _write(writer, _response(200, {'Content-Type': 'application/json; charset=utf-8'}, body, keep_alive))
+                return keep_alive
+            if not name.startswith(READ_PREFIXES) or name not in READ_METHODS:
+                raise HTTPError(404, f"Unknown endpoint: /{name}")
+            kwargs = parse_arguments(name, url.query)
+            if_none_match = headers.get('if-none-match')
+            if name.startswith(STREAM_PREFIX):
+                # Without chunked encoding (HTTP/1.0) the end of the body is the end of the connection.
+                chunked = version == 'HTTP/1.1'
+                await loop.run_in_executor(self.readers, self._stream, name, kwargs, if_none_match,
+                                           keep_alive and chunked, chunked, send)
+                return keep_alive and chunked
+            await _write(writer, await loop.run_in_executor(self.readers, self._get, name, kwargs,
+                                                            if_none_match, keep_alive))
+            return keep_alive
+        except (ConnectionError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            if started:
+                return False  # the status line is gone; closing early tells the client the body is cut short
+            status = e.status if isinstance(e, HTTPError) else 500
+            body = encode_json({'error': {'type': type(e).__name__, 'message': str(e)}})
+            error_headers = {'Content-Type': 'application/json; charset=utf-8', **getattr(e, 'headers', {})}
+            await _write(writer, _response(status, error_headers, body, keep_alive))
+            return keep_alive
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HTTPError as e:
+                    body = encode_json({'error': {'type': 'HTTPError', 'message': str(e)}})
+                    await _write(writer, _response(e.status, {'Content-Type': 'application/json; charset=utf-8'}, body, False))
+                    break
+                if request is None or not await self._respond(writer, *request):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, port: int):
+        server = await asyncio.start_server(self.handle_client, HOST, port, limit=MAX_HEADER_BYTES)
+        self.port = server.sockets[0].getsockname()[1]
+        print(f"Serving {self.db_path} on http://{HOST}:{self.port}/", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.readers.shutdown()
+        self._version_conn.close()
+
+
+async def _write(writer, data: bytes):
+    writer.write(data)
+    await writer.drain()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the report and voucher lookups as JSON on localhost.")
+    parser.add_argument('--db', required=True, help="SQLite database file")
+    parser.add_argument('--port', type=int, default=8780, help="Port on 127.0.0.1 (default 8780)")
+    parser.add_argument('--readers', type=int, default=4, help="Read connection pool size")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        # The version probe and the readers' DBManager would create and seed an empty company file at a mistyped path.
+        print(f"Database file '{args.db}' does not exist.", file=sys.stderr)
+        return 1
+    server = HTTPAPIServer(args.db, read_workers=args.readers)
+    try:
+        asyncio.run(server.serve(args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Integrity checks for the voucher tables.
+
+Each voucher table pair (header + lines) is checked by check_voucher_table on
+its own read-only connection, so verify_database can run the seven pairs
+side by side in a process pool. The module imports nothing but the standard
+library, which keeps spawning a worker cheap.
+
+Checks, as IntegrityFinding.check:
+
+    unbalanced     account voucher whose Dr lines do not equal its Cr lines
+    header_total   header totals that differ from the sum of the lines
+    no_lines       header without any lines
+    orphan_line    line whose header no longer exists
+    bad_reference  account, party or item id that is not in its master
+
+orphan_line and header_total can be repaired automatically (see
+REPAIRABLE_CHECKS and DBManager.repair_integrity); the rest need a person to
+correct the voucher.
+"""
+import os
+import pathlib
+import sqlite3
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple
+
+REPAIRABLE_CHECKS = ('orphan_line', 'header_total')
+
+
+class IntegrityFinding(NamedTuple):
+    vouch_type: str
+    check: str
+    header_id: int | None
+    line_id: int | None
+    detail: str
+
+
+def _connect_read_only(db_path: str) -> sqlite3.Connection:
+    return sqlite3.connect(pathlib.Path(os.path.abspath(db_path)).as_uri() + "?mode=ro", uri=True)
+
+
+def _account_totals(conn, vouch_type: str, base: str) -> List[IntegrityFinding]:
+    findings = []
+    rows = conn.execute(f"""
+        SELECT h.id, h.vouch_no, h.total_amount, l.dr, l.cr
+        FROM {base}_header h
+        LEFT JOIN (SELECT vouch_header_id,
+                          SUM(CASE WHEN dr_cr = 'Dr' THEN amount ELSE 0 END) AS dr,
+                          SUM(CASE WHEN dr_cr = 'Cr' THEN amount ELSE 0 END) AS cr
+                   FROM {base}_lines GROUP BY vouch_header_id) l ON l.vouch_header_id = h.id
+        WHERE l.vouch_header_id IS NULL OR round(l.dr - l.cr, 2) != 0 OR round(COALESCE(h.total_amount, 0) - l.dr, 2) != 0
+    """)
+    for header_id, vouch_no, total, dr, cr in rows:
+        if dr is None:
+            findings.append(IntegrityFinding(vouch_type, 'no_lines', header_id, None, f"{vouch_no} has no lines"))
+            continue
+        if round(dr - cr, 2) != 0:
+            findings.append(IntegrityFinding(vouch_type, 'unbalanced', header_id, None,
+                                             f"{vouch_no}: Dr {dr:.2f} != Cr {cr:.2f}"))
+        if round((total or 0) - dr, 2) != 0:
+            findings.append(IntegrityFinding(vouch_type, 'header_total', header_id, None,
+                                             f"{vouch_no}: total {total or 0:.2f} != lines {dr:.2f}"))
+    return findings
+
+
+def _item_totals(conn, vouch_type: str, base: str) -> List[IntegrityFinding]:
+    findings = []
+    rows = conn.execute(f"""
+        SELECT h.id, h.vouch_no, h.total_taxable_amt, h.total_tax_amt, h.final_bill_amt, l.taxable, l.tax
+        FROM {base}_header h
+        LEFT JOIN (SELECT trans_header_id, SUM(taxable_amt) AS taxable, SUM(tax_amt) AS tax
+                   FROM {base}_lines GROUP BY trans_header_id) l ON l.trans_header_id = h.id
+        WHERE l.trans_header_id IS NULL
+           OR round(COALESCE(h.total_taxable_amt, 0) - l.taxable, 2) != 0
+           OR round(COALESCE(h.total_tax_amt, 0) - l.tax, 2) != 0
+           OR round(COALESCE(h.final_bill_amt, 0) - l.taxable - l.tax, 2) != 0
+    """)
+    for header_id, vouch_no, taxable, tax, final, line_taxable, line_tax in rows:
+        if line_taxable is None:
+            findings.append(IntegrityFinding(vouch_type, 'no_lines', header_id, None, f"{vouch_no} has no lines"))
+            continue
+        findings.append(IntegrityFinding(
+            vouch_type, 'header_total', header_id, None,
+            f"{vouch_no}: taxable/tax/bill {taxable or 0:.2f}/{tax or 0:.2f}/{final or 0:.2f}"
+            f" != lines {line_taxable:.2f}/{line_tax:.2f}/{line_taxable + line_tax:.2f}"))
+    return findings
+
+
+def _references(conn, vouch_type: str, base: str, fk_col: str) -> List[IntegrityFinding]:
+    """Orphan lines, then every other foreign key of the header and lines pointing at a missing row."""
+    findings = [IntegrityFinding(vouch_type, 'orphan_line', header_id, line_id, f"line {line_id} of missing header {header_id}")
+                for line_id, header_id in conn.execute(f"""
+                    SELECT l.id, l.{fk_col} FROM {base}_lines l
+                    WHERE NOT EXISTS (SELECT 1 FROM {base}_header h WHERE h.id = l.{fk_col})""")]
+    for table in (f"{base}_header", f"{base}_lines"):
+        columns = {row[0]: row[3] for row in conn.execute(f"PRAGMA foreign_key_list({table})")}
+        for _, rowid, parent, fk_id in conn.execute(f"PRAGMA foreign_key_check({table})"):
+            if parent == f"{base}_header":
+                continue  # orphan lines, reported above
+            column = columns[fk_id]
+            if table.endswith('_lines'):
+                header_id, value = conn.execute(f"SELECT {fk_col}, {column} FROM {table} WHERE id = ?", (rowid,)).fetchone()
+                line_id = rowid
+            else:
+                header_id, value = rowid, conn.execute(f"SELECT {column} FROM {table} WHERE id = ?", (rowid,)).fetchone()[0]
+                line_id = None
+            findings.append(IntegrityFinding(vouch_type, 'bad_reference', header_id, line_id,
+                                             f"{table}.{column} = {value} is not in {parent}"))
+    return findings
+
+
+def check_voucher_table(db_path: str, vouch_type: str, base: str, account_voucher: bool) -> List[IntegrityFinding]:
+    """Runs every check on one voucher type's header and lines tables."""
+    conn = _connect_read_only(db_path)
+    try:
+        if account_voucher:
+            findings = _account_totals(conn, vouch_type, base)
+            findings += _references(conn, vouch_type, base, 'vouch_header_id')
+        else:
+            findings = _item_totals(conn, vouch_type, base)
+            findings += _references(conn, vouch_type, base, 'trans_header_id')
+        return findings
+    finally:
+        conn.close()
+
+
+def verify_database(db_path: str, tables, workers: int = None) -> List[IntegrityFinding]:
+    """
+    Checks (vouch_type, base, account_voucher) voucher tables of a database file
+    in parallel, one worker process per table pair at a time; findings come
+    back in table order. workers=1 checks them in this process.
+    """
+    tables = list(tables)
+    if workers == 1:
+        results = [check_voucher_table(db_path, *table) for table in tables]
+    else:
+        # spawn: the caller may be a Qt application, which must not be forked
+        with ProcessPoolExecutor(max_workers=workers or min(len(tables), os.cpu_count() or 1),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(check_voucher_table, *zip(*[(db_path, *table) for table in tables])))
+    return [finding for findings in results for finding in findings]
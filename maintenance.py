@@ -0,0 +1,185 @@
+"""
+Idle-time maintenance of a company file.
+
+run_maintenance works through four steps on a connection of its own:
+
+    analyze   ANALYZE each table that has no statistics yet or whose row
+              count has drifted from the one sqlite_stat1 holds by more than
+              ANALYZE_DRIFT (the planner otherwise guesses, and picks the
+              wrong index for e.g. a ledger on the cash account)
+    optimize  PRAGMA optimize
+    compact   delete the change_log rows every consumer has acknowledged (all
+              of them while none is registered), as DBManager.compact_change_log
+              does, COMPACT_STEP rows per transaction
+    vacuum    files with auto_vacuum=INCREMENTAL: PRAGMA incremental_vacuum
+              VACUUM_STEP pages at a time until the freelist is empty; older
+              files (auto_vacuum=NONE) whose free pages reach
+              CONVERT_FREE_RATIO of the file are VACUUMed once, which also
+              switches them to INCREMENTAL
+
+Every statement is its own short transaction, so Connection.interrupt() from
+another thread (MaintenanceRunner.interrupt) stops a run at once: the running
+statement is rolled back and the report says how far the run got. The next
+run skips what was finished. The live connection keeps its statistics until
+it runs ANALYZE sqlite_schema (see DBManager.finish_maintenance). The module
+imports nothing but the standard library.
+"""
+import time
+import sqlite3
+import threading
+from typing import List, NamedTuple, Optional, Tuple
+
+ANALYZE_DRIFT = 0.25
+MIN_ANALYZE_ROWS = 100
+VACUUM_STEP = 256
+COMPACT_STEP = 5000
+CONVERT_FREE_RATIO = 0.10
+
+
+class MaintenanceReport(NamedTuple):
+    started: float  # time.time()
+    seconds: float
+    analyzed: Tuple[str, ...]
+    changes_compacted: int  # change_log rows deleted
+    pages_reclaimed: int
+    free_pages: int  # still on the freelist afterwards
+    interrupted: bool
+    error: str  # '' unless a step failed (e.g. another connection held the write lock)
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """A connection for run_maintenance; it gives up on a held lock quickly rather than queue behind the user."""
+    return sqlite3.connect(db_path, timeout=0.5, check_same_thread=False)
+
+
+def changed_tables(conn: sqlite3.Connection) -> List[str]:
+    """Tables whose statistics are missing or out of date (ANALYZE_DRIFT), smallest first."""
+    tables = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_schema WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+    stat_rows = {}
+    if conn.execute("SELECT 1 FROM sqlite_schema WHERE name = 'sqlite_stat1'").fetchone():
+        for table, stat in conn.execute("SELECT tbl, stat FROM sqlite_stat1"):
+            stat_rows.setdefault(table, int(stat.split()[0]))
+    changed = []
+    for table in tables:
+        rows = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+        if rows < MIN_ANALYZE_ROWS and table not in stat_rows:
+            continue  # the planner's defaults are fine for a handful of rows
+        analyzed = stat_rows.get(table)
+        if analyzed is None or abs(rows - analyzed) > ANALYZE_DRIFT * max(analyzed, MIN_ANALYZE_ROWS):
+            changed.append((rows, table))
+    return [table for _, table in sorted(changed)]
+
+
+def run_maintenance(conn: sqlite3.Connection, stop: threading.Event = None) -> MaintenanceReport:
+    """Runs the steps on conn until done, stopped (stop set before a step) or interrupted (conn.interrupt())."""
+    started, start = time.time(), time.perf_counter()
+    analyzed = []
+    compacted = 0
+    reclaimed = 0
+    error = ''
+    interrupted = False
+    stopped = lambda: stop is not None and stop.is_set()
+    try:
+        for table in changed_tables(conn):
+            if stopped():
+                break
+            conn.execute(f'ANALYZE "{table}"')
+            conn.commit()
+            analyzed.append(table)
+        if not stopped():
+            conn.execute("PRAGMA optimize")
+            conn.commit()
+        if conn.execute("SELECT 1 FROM sqlite_schema WHERE name = 'change_log'").fetchone():
+            acknowledged = conn.execute("""SELECT COALESCE((SELECT MIN(watermark) FROM change_consumers),
+                                                           (SELECT MAX(version) FROM change_log))""").fetchone()[0]
+            while acknowledged is not None and not stopped():
+                deleted = conn.execute("""DELETE FROM change_log WHERE version IN (
+                    SELECT version FROM change_log WHERE version <= ? ORDER BY version LIMIT ?)""",
+                                       (acknowledged, COMPACT_STEP)).rowcount
+                conn.commit()
+                compacted += deleted
+                if deleted < COMPACT_STEP:
+                    break
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if auto_vacuum == 0 and free and free >= CONVERT_FREE_RATIO * page_count and not stopped():
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")  # rebuilds the file; the new setting only takes effect this way
+            reclaimed += page_count - conn.execute("PRAGMA page_count").fetchone()[0]
+        elif auto_vacuum == 2:
+            while free and not stopped():
+                conn.execute(f"PRAGMA incremental_vacuum({VACUUM_STEP})").fetchall()
+                conn.commit()
+                left = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                reclaimed += free - left
+                free = left
+    except sqlite3.OperationalError as e:
+        if conn.in_transaction:
+            conn.rollback()
+        if 'interrupt' in str(e):
+            interrupted = True
+        else:
+            error = str(e)
+    try:
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    except sqlite3.Error:
+        free = -1
+    interrupted = interrupted or stopped()
+    return MaintenanceReport(started, time.perf_counter() - start, tuple(analyzed), compacted, reclaimed, free,
+                             interrupted, error)
+
+
+def format_report(report: MaintenanceReport) -> str:
+    """One log line: time spent, tables analysed, changes compacted, pages reclaimed."""
+    analyzed = ", ".join(report.analyzed) if report.analyzed else "none"
+    state = " (interrupted)" if report.interrupted else f" (failed: {report.error})" if report.error else ""
+    return (f"Maintenance{state}: {report.seconds:.2f} s, analyzed {analyzed}; {report.changes_compacted} change(s) "
+            f"compacted, {report.pages_reclaimed} page(s) reclaimed, {report.free_pages} free")
+
+
+class MaintenanceRunner:
+    """Runs run_maintenance on a background thread; interrupt() makes it stop at once."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.report: Optional[MaintenanceReport] = None
+        self._conn = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        """Starts a run unless one is going; returns whether it started."""
+        if self.running:
+            return False
+        self.report = None
+        self._stop.clear()
+        self._conn = connect(self.db_path)
+        self._thread = threading.Thread(target=self._run, name="idle-maintenance", daemon=True)
+        self._thread.start()
+        return True
+
+    def interrupt(self):
+        """Stops a run in progress; the running statement is abandoned and rolled back."""
+        self._stop.set()
+        conn = self._conn
+        if conn is not None and self.running:
+            try:
+                conn.interrupt()
+            except sqlite3.ProgrammingError:
+                pass  # the run ended and closed it meanwhile
+
+    def join(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        try:
+            self.report = run_maintenance(self._conn, self._stop)
+        finally:
+            self._conn.close()
@@ -0,0 +1,111 @@
+"""
+Money formatting for report grids and amount fields.
+
+MoneyFormatter works on integer minor units (paise): one divmod splits the
+rupees from the paise, and the rupee digits are grouped either the Indian
+way (12,34,56,789.00: thousands, then lakhs and crores in pairs) or the
+international way (123,456,789.00). It can also append Dr/Cr instead of a sign.
+
+Report models format cells only when Qt asks for them, so each column keeps
+one formatter, and that formatter remembers the strings it has already
+produced. Ledgers and statements repeat the same amounts often, and a
+repeated amount is a dictionary hit.
+"""
+INDIAN = 'indian'
+INTERNATIONAL = 'international'
+GROUPINGS = (INDIAN, INTERNATIONAL)
+
+CACHE_LIMIT = 65536  # strings kept per formatter before its cache is dropped
+
+_default_grouping = INDIAN
+
+
+def set_default_grouping(grouping: str):
+    """Grouping used by formatters created without one (and by format_money)."""
+    global _default_grouping
+    if grouping not in GROUPINGS:
+        raise ValueError(f"Unknown digit grouping '{grouping}'.")
+    _default_grouping = grouping
+
+
+def get_default_grouping() -> str:
+    return _default_grouping
+
+
+def _group_indian(rupees: int) -> str:
+    """Indian grouping of a whole number of at least one crore."""
+    head, tail = divmod(rupees, 1000)
+    pairs = []
+    while head >= 100:
+        head, pair = divmod(head, 100)
+        pairs.append(f"{pair:02d}")
+    return ','.join([str(head), *reversed(pairs), f"{tail:03d}"])
+
+
+def to_minor_units(value) -> int:
+    """Paise of an int, float or Decimal amount (rounded half-even)."""
+    return round(value * 100)
+
+
+class MoneyFormatter:
+    """Formats amounts with two decimals and digit grouping; one instance per grid column."""
+    __slots__ = ('grouping', 'dr_cr', 'blank_zero', '_by_units', '_by_value')
+
+    def __init__(self, grouping: str = None, dr_cr: bool = False, blank_zero: bool = False):
+        """dr_cr: show the magnitude with a Dr (positive) / Cr (negative) suffix instead of a sign."""
+        self.grouping = grouping or _default_grouping
+        if self.grouping not in GROUPINGS:
+            raise ValueError(f"Unknown digit grouping '{self.grouping}'.")
+        self.dr_cr = dr_cr
+        self.blank_zero = blank_zero
+        self._by_units = {}
+        self._by_value = {}
+
+    def _format(self, units: int) -> str:
+        if units == 0 and self.blank_zero:
+            return ""
+        magnitude = -units if units < 0 else units
+        sign = '-' if units < 0 and not self.dr_cr else ''
+        # Below one lakh Indian and international grouping agree, so the C formatter does it.
+        if magnitude < 10**7 or self.grouping == INTERNATIONAL:
+            text = f"{sign}{magnitude / 100:,.2f}"
+        elif magnitude < 10**9:  # up to one crore: lakhs,thousands,hundreds
+            rupees, paise = divmod(magnitude, 100)
+            text = f"{sign}{rupees // 100000},{rupees // 1000 % 100:02d},{rupees % 1000:03d}.{paise:02d}"
+        else:
+            rupees, paise = divmod(magnitude, 100)
+            text = f"{sign}{_group_indian(rupees)}.{paise:02d}"
+        return f"{text} {'Dr' if units >= 0 else 'Cr'}" if self.dr_cr else text
+
+    def format_minor(self, units: int) -> str:
+        """Formats an amount given in minor units (paise)."""
+        text = self._by_units.get(units)
+        if text is None:
+            if len(self._by_units) >= CACHE_LIMIT:
+                self._by_units.clear()
+            text = self._by_units[units] = self._format(units)
+        return text
+
+    def __call__(self, value) -> str:
+        """Formats an int, float or Decimal amount; None is blank."""
+        text = self._by_value.get(value)
+        if text is None:
+            if value is None:
+                return ""
+            if len(self._by_value) >= CACHE_LIMIT:
+                self._by_value.clear()
+            number = value if type(value) is float else float(value)  # Decimal arithmetic costs more than the whole format
+            text = self._by_value[value] = self._format(round(number * 100))
+        return text
+
+
+_default_formatters = {}
+
+
+def format_money(value, dr_cr: bool = False) -> str:
+    """One-off formatting with the default grouping (labels, line edits)."""
+    key = (_default_grouping, dr_cr)
+    formatter = _default_formatters.get(key)
+    if formatter is None:
+        formatter = _default_formatters[key] = MoneyFormatter(_default_grouping, dr_cr)
+    return formatter(value)
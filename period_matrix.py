@@ -0,0 +1,91 @@
+"""
+Account x month matrices for period analysis.
+
+DBManager.get_period_balances streams (account_id, month_no, balance) rows:
+one opening-balance row per account (month_no 0), then, for each year file
+the range touches, each account's net postings in that file up to the day
+before the range and up to each month end. build_period_matrix turns those
+columns into NumPy arrays and scatters them into an account x boundary grid
+with one bincount over a flat (row, month) index, which also adds up the
+year files. Monthly movement is the difference between consecutive
+boundaries, and closing balances are the opening column plus the running sum
+of the movement. Nothing is looped over in Python per row.
+
+NumPy is optional for the rest of the application; without it only this
+report is unavailable.
+"""
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+from result_columns import ResultColumns
+
+
+def month_index(day_key: int) -> int:
+    """Months since year 0 of a YYYYMMDD day key (January of year 0 is 0)."""
+    return day_key // 10000 * 12 + day_key // 100 % 100 - 1
+
+
+def month_labels(first: int, last: int) -> list:
+    """'YYYY-MM' of every month index from first to last."""
+    return [f"{month // 12:04d}-{month % 12 + 1:02d}" for month in range(first, last + 1)]
+
+
+class PeriodMatrix:
+    """Opening balances and monthly movement (Dr +, Cr -) of the accounts with anything to show, ordered by name."""
+    __slots__ = ('account_ids', 'account_names', 'months', 'opening', 'movement')
+
+    def __init__(self, account_ids, account_names: list, months: list, opening, movement):
+        self.account_ids = account_ids
+        self.account_names = account_names
+        self.months = months
+        self.opening = opening
+        self.movement = movement
+
+    def __len__(self) -> int:
+        return len(self.account_ids)
+
+    def closing(self):
+        """Balance at the end of each month: opening plus the cumulative movement."""
+        return self.opening[:, None] + np.cumsum(self.movement, axis=1)
+
+
+def build_period_matrix(balances: ResultColumns, date_from: int, date_to: int, names: dict) -> PeriodMatrix:
+    """
+    Builds the PeriodMatrix of get_period_balances rows for the months from
+    date_from to date_to (day keys). names maps account id to name; accounts
+    with a nil opening balance and no movement are left out.
+    """
+    if np is None:
+        raise RuntimeError("Period analysis needs NumPy (pip install numpy).")
+    first, last = month_index(date_from), month_index(date_to)
+    months = month_labels(first, last)
+    if not len(balances):
+        return PeriodMatrix(np.zeros(0, dtype=np.int64), [], months, np.zeros(0), np.zeros((0, len(months))))
+
+    ids = balances.numpy_column('account_id')
+    month_nos = balances.numpy_column('month_no')
+    amounts = balances.numpy_column('balance').astype(np.float64, copy=False)
+
+    # Dense id -> row lookup: account ids are small integers, so this avoids sorting the rows.
+    present = np.flatnonzero(np.bincount(ids))
+    rows = np.full(int(present[-1]) + 1, -1, dtype=np.int64)
+    rows[present] = np.arange(len(present))
+    row = rows[ids]
+
+    is_opening = month_nos == 0
+    opening = np.bincount(row[is_opening], weights=amounts[is_opening], minlength=len(present))
+    at_month_end = ~is_opening
+    width = len(months) + 1  # the day before the range, then each month end
+    col = month_nos[at_month_end] - (first - 1)
+    cumulative = np.bincount(row[at_month_end] * width + col, weights=amounts[at_month_end],
+                             minlength=len(present) * width).reshape(len(present), width)
+    movement = np.diff(cumulative, axis=1)
+
+    keep = (np.round(opening, 2) != 0) | (np.round(movement, 2) != 0).any(axis=1)
+    account_ids = present[keep]
+    account_names = [names.get(int(account_id), str(account_id)) for account_id in account_ids]
+    order = np.array(sorted(range(len(account_ids)), key=account_names.__getitem__), dtype=np.int64)
+    return PeriodMatrix(account_ids[order], [account_names[i] for i in order], months,
+                        opening[keep][order], movement[keep][order])
@@ -0,0 +1,120 @@
+"""
+Headless report runner for nightly jobs.
+
+Streams Ledger, Day Book, Trial Balance and Subsidiary Book rows straight
+from the DBManager report cursors to stdout or a file as CSV or NDJSON,
+without opening the LauncherWindow.
+
+    python report_cli.py --db accounting.db ledger --account Cash --from 2025-04-01 --to 2026-03-31
+    python report_cli.py --db accounting.db daybook --from 2025-11-19 --format ndjson -o daybook.ndjson
+"""
+import os
+import sys
+import csv
+import json
+import argparse
+
+from zfx19 import DBManager
+
+REPORTS = ('ledger', 'daybook', 'trial-balance', 'subsidiary')
+
+
+def open_report_cursor(db_manager: DBManager, report: str, date_from: str, date_to: str,
+                       account: str = None, group: str = None):
+    """Returns a live cursor for the requested report (None if the account is unknown)."""
+    if report == 'ledger':
+        if not account:
+            raise ValueError("The ledger report needs --account.")
+        return db_manager.iter_ledger_data(date_from, date_to, account)
+    if report == 'daybook':
+        return db_manager.iter_day_book_data(date_from, date_to)
+    if report == 'trial-balance':
+        return db_manager.iter_trial_balance_data(date_from, date_to)
+    if report == 'subsidiary':
+        if not group:
+            raise ValueError("The subsidiary book report needs --group.")
+        return db_manager.iter_subsidiary_book_data(date_from, date_to, group)
+    raise ValueError(f"Unknown report: {report}")
+
+
+def write_csv(cursor, out, header: bool = True) -> int:
+    """Writes the cursor rows as CSV, one batch at a time. Returns the row count."""
+    writer = csv.writer(out, lineterminator='\n')
+    if header:
+        writer.writerow([col[0] for col in cursor.description])
+    count = 0
+    while True:
+        batch = cursor.fetchmany()
+        if not batch:
+            return count
+        writer.writerows(batch)
+        count += len(batch)
+
+
+def write_ndjson(cursor, out) -> int:
+    """Writes the cursor rows as one JSON object per line. Returns the row count."""
+    columns = [col[0] for col in cursor.description]
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    count = 0
+    while True:
+        batch = cursor.fetchmany()
+        if not batch:
+            return count
+        out.write(''.join([encode(dict(zip(columns, row))) + '\n' for row in batch]))
+        count += len(batch)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run an accounting report without the GUI.")
+    parser.add_argument('--db', required=True, help="SQLite database file (e.g., accounting.db)")
+    parser.add_argument('report', choices=REPORTS)
+    parser.add_argument('--from', dest='date_from', default='0001-01-01', help="Start date (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='date_to', default=None, help="End date (YYYY-MM-DD), defaults to --from for daybook")
+    parser.add_argument('--account', help="Account name (ledger)")
+    parser.add_argument('--group', help="Account group (subsidiary)")
+    parser.add_argument('--format', choices=('csv', 'ndjson'), default='csv')
+    parser.add_argument('-o', '--output', help="Output file (default: stdout)")
+    parser.add_argument('--no-header', action='store_true', help="Omit the CSV header row")
+    parser.add_argument('--batch-size', type=int, default=5000, help="Rows fetched per batch")
+    args = parser.parse_args(argv)
+
+    date_to = args.date_to
+    if date_to is None:
+        date_to = args.date_from if args.report == 'daybook' else '9999-12-31'
+
+    if not os.path.exists(args.db):
+        # DBManager would create and seed an empty company file at a mistyped path.
+        print(f"Database file '{args.db}' does not exist.", file=sys.stderr)
+        return 1
+    db_manager = DBManager(args.db)
+    try:
+        cursor = open_report_cursor(db_manager, args.report, args.date_from, date_to, args.account, args.group)
+    except ValueError as e:
+        parser.error(str(e))
+    if cursor is None:
+        print(f"Account '{args.account}' is not in Account Master.", file=sys.stderr)
+        return 1
+    cursor.arraysize = args.batch_size
+
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        if args.format == 'csv':
+            count = write_csv(cursor, out, header=not args.no_header)
+        else:
+            count = write_ndjson(cursor, out)
+    except BrokenPipeError:
+        # Output piped into e.g. `head`, which stopped reading; not an error.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    finally:
+        cursor.close()
+        if out is not sys.stdout:
+            out.close()
+        db_manager.conn.close()
+
+    print(f"{count} rows written.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
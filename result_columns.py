@@ -0,0 +1,212 @@
+"""
+Compact columnar result sets for reports.
+
+ResultColumns keeps a query result column by column instead of as a list of
+tuples:
+
+    numeric columns  array('q') / array('d'), with a null mask only if needed
+    string columns   dictionary-encoded (array('I') codes into one copy of each
+                     distinct value) or, for mostly-unique columns such as
+                     voucher numbers, a UTF-8 blob with an offsets array
+
+Rows are rebuilt on demand, so a table model only pays for the cells it
+actually displays. numpy_column() returns zero-copy NumPy views when NumPy is
+installed.
+"""
+import sys
+from array import array
+from itertools import accumulate
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+DICT_MAX_UNIQUE_RATIO = 0.5  # above this a string column switches to blob storage
+
+
+class _NumericColumn:
+    __slots__ = ('values', 'nulls')
+
+    def __init__(self, typecode: str):
+        self.values = array(typecode)
+        self.nulls = None
+
+    def extend(self, values):
+        start = len(self.values)
+        if None in values:
+            if self.nulls is None:
+                self.nulls = bytearray(start)
+            self.nulls.extend(v is None for v in values)
+            values = [0 if v is None else v for v in values]
+        elif self.nulls is not None:
+            self.nulls.extend(bytes(len(values)))
+        if self.values.typecode == 'q' and any(type(v) is not int for v in values):
+            self.values = array('d', self.values)
+        self.values.extend(values)
+
+    def get(self, i):
+        if self.nulls is not None and self.nulls[i]:
+            return None
+        return self.values[i]
+
+    def nbytes(self) -> int:
+        return self.values.itemsize * len(self.values) + (len(self.nulls) if self.nulls is not None else 0)
+
+
+class _DictColumn:
+    __slots__ = ('codes', 'categories', 'lookup')
+
+    def __init__(self):
+        self.codes = array('I')
+        self.categories = [None]
+        self.lookup = {None: 0}
+
+    def extend(self, values):
+        lookup, categories = self.lookup, self.categories
+        codes = []
+        for v in values:
+            code = lookup.get(v)
+            if code is None:
+                code = lookup[v] = len(categories)
+                categories.append(sys.intern(v) if type(v) is str else v)
+            codes.append(code)
+        self.codes.extend(codes)
+
+    def get(self, i):
+        return self.categories[self.codes[i]]
+
+    def nbytes(self) -> int:
+        return (4 * len(self.codes) + sys.getsizeof(self.categories) + sys.getsizeof(self.lookup)
+                + sum(sys.getsizeof(v) for v in self.categories))
+
+
+class _BlobColumn:
+    __slots__ = ('data', 'offsets', 'nulls')
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array('Q', [0])
+        self.nulls = bytearray()
+
+    def extend(self, values):
+        encoded = [b'' if v is None else str(v).encode('utf-8') for v in values]
+        base = len(self.data)
+        self.offsets.extend(base + end for end in accumulate(map(len, encoded)))
+        self.data += b''.join(encoded)
+        self.nulls.extend(v is None for v in values)
+
+    def get(self, i):
+        if self.nulls[i]:
+            return None
+        return self.data[self.offsets[i]:self.offsets[i + 1]].decode('utf-8')
+
+    def nbytes(self) -> int:
+        return len(self.data) + 8 * len(self.offsets) + len(self.nulls)
+
+
+def _new_column(values):
+    """Picks the storage for a column from its first batch of values."""
+    present = [v for v in values if v is not None]
+    if present and all(type(v) is int for v in present):
+        return _NumericColumn('q')
+    if present and all(type(v) in (int, float) for v in present):
+        return _NumericColumn('d')
+    if len(set(present)) > DICT_MAX_UNIQUE_RATIO * max(len(values), 1) and len(values) > 64:
+        return _BlobColumn()
+    return _DictColumn()
+
+
+class ResultColumns:
+    """Column-oriented, read-only result set built from a cursor or rows."""
+    __slots__ = ('names', '_columns', '_length')
+
+    def __init__(self, names):
+        self.names = list(names)
+        self._columns = [None] * len(self.names)
+        self._length = 0
+
+    @classmethod
+    def from_cursor(cls, cursor, batch_size: int = 10000) -> 'ResultColumns':
+        result = cls(col[0] for col in cursor.description)
+        cursor.arraysize = batch_size
+        while True:
+            batch = cursor.fetchmany()
+            if not batch:
+                break
+            result.extend(batch)
+        cursor.close()
+        return result
+
+    @classmethod
+    def from_rows(cls, names, rows) -> 'ResultColumns':
+        result = cls(names)
+        rows = list(rows)
+        if rows:
+            result.extend(rows)
+        return result
+
+    def extend(self, rows):
+        """Appends a batch of row tuples."""
+        for index, values in enumerate(zip(*rows)):
+            column = self._columns[index]
+            if column is None:
+                column = self._columns[index] = _new_column(values)
+            elif isinstance(column, _NumericColumn) and any(v is not None and type(v) not in (int, float) for v in values):
+                column = self._columns[index] = self._to_dict_column(column)
+            column.extend(values)
+        self._length += len(rows)
+
+    def _to_dict_column(self, column: _NumericColumn) -> _DictColumn:
+        converted = _DictColumn()
+        converted.extend([column.get(i) for i in range(self._length)])
+        return converted
+
+    def add_column(self, name: str, values: array):
+        """Adds a computed numeric column (e.g. a running balance) of the same length."""
+        if len(values) != self._length:
+            raise ValueError(f"Column '{name}' has {len(values)} values, expected {self._length}.")
+        column = _NumericColumn(values.typecode)
+        column.values = values
+        self.names.append(name)
+        self._columns.append(column)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def value(self, row: int, col: int):
+        column = self._columns[col]
+        return None if column is None else column.get(row)
+
+    def row(self, i: int) -> tuple:
+        return tuple(None if c is None else c.get(i) for c in self._columns)
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield self.row(i)
+
+    def column(self, name: str) -> list:
+        col = self._columns[self.names.index(name)]
+        return [col.get(i) for i in range(self._length)] if col else [None] * self._length
+
+    def is_numeric(self, col: int) -> bool:
+        return isinstance(self._columns[col], _NumericColumn)
+
+    def numpy_column(self, name: str):
+        """Zero-copy NumPy view: the values of a numeric column, the codes of a dictionary column."""
+        if np is None:
+            raise RuntimeError("NumPy is not installed.")
+        col = self._columns[self.names.index(name)]
+        if isinstance(col, _NumericColumn):
+            return np.frombuffer(col.values, dtype=np.int64 if col.values.typecode == 'q' else np.float64)
+        if isinstance(col, _DictColumn):
+            return np.frombuffer(col.codes, dtype=np.uint32)
+        raise TypeError(f"Column '{name}' has no NumPy view.")
+
+    def categories(self, name: str) -> list:
+        """Distinct values of a dictionary-encoded column (index = code, 0 = NULL)."""
+        return self._columns[self.names.index(name)].categories
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the column data."""
+        return sum(c.nbytes() for c in self._columns if c is not None)
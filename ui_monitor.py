@@ -0,0 +1,249 @@
+"""
+Responsiveness monitor for the main window.
+
+UIMonitor keeps two histories:
+
+    timings  ActionTiming per user action: opening a dialog (up to its first
+             event-loop pass, i.e. until it can be used), saving a voucher,
+             generating a report; time spent waiting on a message box the
+             action shows (monitor_wait) is left out
+    stalls   Stall per main-thread stall: a heartbeat timer ticks every
+             heartbeat_ms on the GUI thread, and a watchdog thread that finds
+             it silent for stall_ms grabs the main thread's stack, so a stall
+             is reported with what was running while it lasted
+
+profile_next() arms a cProfile capture of the next action; its stats are
+written to profile_dir (see pstats / snakeviz) and the path is kept with the
+timing. Code that runs an action finds the window's monitor through its
+widget parents (monitor_action, monitor_open, monitor_wait), so dialogs work
+the same with or without one.
+"""
+import os
+import re
+import sys
+import time
+import cProfile
+import threading
+import traceback
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, NamedTuple, Optional
+
+from PySide6.QtCore import QObject, QTimer, Qt, Signal
+
+
+class ActionTiming(NamedTuple):
+    name: str
+    started: float  # time.time()
+    seconds: float
+    profile: Optional[str]  # path of the cProfile stats, if this action was profiled
+
+
+class Stall(NamedTuple):
+    started: float  # time.time() of the last heartbeat before the stall
+    seconds: float
+    action: str  # the action running when the watchdog noticed it ('' if none)
+    stack: str  # the main thread's stack at that moment
+
+
+class ActionSummary(NamedTuple):
+    name: str
+    count: int
+    mean_ms: float
+    max_ms: float
+    last_ms: float
+
+
+class UIMonitor(QObject):
+    profile_saved = Signal(str)
+    stall_detected = Signal(object)  # Stall, emitted on the GUI thread once the stall is over
+
+    def __init__(self, parent=None, stall_ms: int = 250, heartbeat_ms: int = 50, history: int = 500,
+                 profile_dir: str = "profiles"):
+        super().__init__(parent)
+        self.stall_ms = stall_ms
+        self.heartbeat_ms = heartbeat_ms
+        self.profile_dir = profile_dir
+        self.timings = deque(maxlen=history)
+        self.stalls = deque(maxlen=history)
+        self._active = {}  # token -> [name, perf_counter start, time start, profiler, seconds waited]
+        self._next_token = 0
+        self._profile_armed = False
+        self._main_thread = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._last_beat_time = time.time()
+        self._stall_seen = None  # (action, stack) grabbed by the watchdog during the current stall
+        self._stop = threading.Event()
+        self._watchdog = None
+        self._heartbeat = QTimer(self)
+        self._heartbeat.setTimerType(Qt.TimerType.PreciseTimer)
+        self._heartbeat.timeout.connect(self._beat)
+
+    # --- stall detection ---
+    def start(self):
+        if self._watchdog is not None:
+            return
+        self._last_beat, self._last_beat_time = time.perf_counter(), time.time()
+        self._stop.clear()
+        self._heartbeat.start(self.heartbeat_ms)
+        self._watchdog = threading.Thread(target=self._watch, name="ui-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._heartbeat.stop()
+        self._stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    def _beat(self):
+        now = time.perf_counter()
+        gap = now - self._last_beat
+        if gap * 1000 >= self.heartbeat_ms + self.stall_ms:
+            action, stack = self._stall_seen or (self._current_action(), '')
+            stall = Stall(self._last_beat_time, gap, action, stack)
+            self.stalls.append(stall)
+            self.stall_detected.emit(stall)
+        self._stall_seen = None
+        self._last_beat, self._last_beat_time = now, time.time()
+
+    def _watch(self):
+        interval = self.heartbeat_ms / 1000
+        while not self._stop.wait(interval):
+            if self._stall_seen is None and (time.perf_counter() - self._last_beat) * 1000 >= self.heartbeat_ms + self.stall_ms:
+                frame = sys._current_frames().get(self._main_thread)
+                stack = ''.join(traceback.format_stack(frame)) if frame is not None else ''
+                self._stall_seen = (self._current_action(), stack)
+
+    def _current_action(self) -> str:
+        active = list(self._active.values())
+        return active[-1][0] if active else ''
+
+    # --- action timings ---
+    def profile_next(self, armed: bool = True):
+        """Profiles the next action to start (or cancels that)."""
+        self._profile_armed = armed
+
+    @property
+    def profile_armed(self) -> bool:
+        return self._profile_armed
+
+    def begin(self, name: str) -> int:
+        """Starts timing an action; returns the token to end() it with."""
+        profiler = None
+        if self._profile_armed:
+            self._profile_armed = False
+            profiler = cProfile.Profile()
+            profiler.enable()
+        token = self._next_token
+        self._next_token += 1
+        self._active[token] = [name, time.perf_counter(), time.time(), profiler, 0.0]
+        return token
+
+    def end(self, token: int) -> Optional[ActionTiming]:
+        """Records the action; ending it again does nothing."""
+        entry = self._active.pop(token, None)
+        if entry is None:
+            return None
+        name, start, started, profiler, waited = entry
+        seconds = time.perf_counter() - start - waited
+        path = None
+        if profiler is not None:
+            profiler.disable()
+            path = self._save_profile(profiler, name, started)
+        timing = ActionTiming(name, started, seconds, path)
+        self.timings.append(timing)
+        if path:
+            self.profile_saved.emit(path)
+        return timing
+
+    def _save_profile(self, profiler: cProfile.Profile, name: str, started: float) -> Optional[str]:
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', name).strip('-').lower() or 'action'
+        path = os.path.join(self.profile_dir, f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(started))}-{slug}.prof")
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profiler.dump_stats(path)
+        except OSError as e:
+            print(f"Saving profile of '{name}' failed: {e}")
+            return None
+        return path
+
+    @contextmanager
+    def action(self, name: str):
+        """Times the block as one action."""
+        token = self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(token)
+
+    def until_idle(self, name: str) -> int:
+        """
+        Starts an action that ends at the next event-loop pass: for a handler
+        that opens a modal dialog, when the dialog is up rather than when it is
+        closed; otherwise when the handler returns. Returns its token.
+        """
+        token = self.begin(name)
+        QTimer.singleShot(0, lambda: self.end(token))
+        return token
+
+    @contextmanager
+    def opening(self, name: str):
+        """Times opening a dialog whose exec() runs inside the block (see until_idle)."""
+        token = self.until_idle(name)
+        try:
+            yield
+        finally:
+            self.end(token)
+
+    @contextmanager
+    def waiting(self):
+        """Leaves the block (e.g. a message box waiting for the user) out of the running actions' times."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            waited = time.perf_counter() - start
+            for entry in self._active.values():
+                entry[4] += waited
+
+    def summary(self) -> List[ActionSummary]:
+        """Per action name: how often it ran and how long it took, slowest mean first."""
+        by_name: Dict[str, List[float]] = {}
+        for timing in self.timings:
+            by_name.setdefault(timing.name, []).append(timing.seconds * 1000)
+        rows = [ActionSummary(name, len(ms), sum(ms) / len(ms), max(ms), ms[-1]) for name, ms in by_name.items()]
+        rows.sort(key=lambda row: row.mean_ms, reverse=True)
+        return rows
+
+    def clear(self):
+        self.timings.clear()
+        self.stalls.clear()
+
+
+def find_monitor(widget) -> Optional[UIMonitor]:
+    """The UIMonitor of the window widget belongs to, if it has one."""
+    while widget is not None:
+        monitor = getattr(widget, 'ui_monitor', None)
+        if isinstance(monitor, UIMonitor):
+            return monitor
+        widget = widget.parent()
+    return None
+
+
+def monitor_action(widget, name: str):
+    """Context manager timing the block as an action of widget's window (a no-op without a monitor)."""
+    monitor = find_monitor(widget)
+    return monitor.action(name) if monitor else nullcontext()
+
+
+def monitor_open(widget, name: str):
+    """Context manager timing a dialog opened in the block until it is up (see UIMonitor.opening)."""
+    monitor = find_monitor(widget)
+    return monitor.opening(name) if monitor else nullcontext()
+
+
+def monitor_wait(widget):
+    """Context manager leaving the block out of the running actions' times (see UIMonitor.waiting)."""
+    monitor = find_monitor(widget)
+    return monitor.waiting() if monitor else nullcontext()
@@ -2,7 +2,8 @@ import sys
 from decimal import Decimal, getcontext
 from PySide6.QtCore import Qt, QLocale
 from PySide6.QtGui import QDoubleValidator
-from PySide6.QtWidgets import QLineEdit, QComboBox, QCompleter, QMessageBox
+from PySide6.QtWidgets import QLineEdit, QComboBox, QCompleter, QMessageBox, QFileDialog
+from exporters import EXPORT_FILTER, export_cursor
 
 getcontext().prec = 28
 
@@ -13,6 +14,22 @@ def show_message(parent, title, message, icon):
     msg.setIcon(icon)
     msg.exec()
 
+def export_report(parent, open_cursor, default_name):
+    """Asks for a file and streams a freshly opened report cursor into it (CSV/XLSX/columnar)."""
+    path, _ = QFileDialog.getSaveFileName(parent, "Export Report", default_name, EXPORT_FILTER)
+    if not path:
+        return
+    try:
+        cursor = open_cursor()
+        if cursor is None:
+            show_message(parent, "Export", "Nothing to export for the selected options.", QMessageBox.Warning)
+            return
+        count = export_cursor(cursor, path)
+    except Exception as e:
+        show_message(parent, "Export Error", f"Failed to export report: {e}", QMessageBox.Critical)
+        return
+    show_message(parent, "Export Complete", f"{count} rows exported to {path}.", QMessageBox.Information)
+
 class AutoCompleteComboBox(QComboBox):
     def __init__(self, items, parent=None):
         super().__init__(parent)
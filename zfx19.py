@@ -1,10 +1,21 @@
 # digi modified
+import os
 import sys
 import sqlite3
 import time
+import pathlib
+import tempfile
+import datetime
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from itertools import groupby
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal, getcontext
-from functools import partial
-from typing import List, Tuple, Any, Dict, Optional
+from functools import lru_cache, partial
+from typing import List, Tuple, Any, Dict, Optional, NamedTuple
 
 # Set Decimal precision for financial accuracy
 getcontext().prec = 28
@@ -34,10 +45,10 @@ except ImportError:
 '''
 
 from PySide6.QtCore import (
-    Qt, QDate, QLocale
+    Qt, QDate, QLocale, QAbstractTableModel, QAbstractItemModel, QModelIndex, QTimer, QObject, QStringListModel, Signal, QEvent
 )
 from PySide6.QtGui import (
-    QFont, QDoubleValidator
+    QFont, QDoubleValidator, QAction
 )
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QDialog, QLineEdit, 
@@ -46,9 +57,19 @@ from PySide6.QtWidgets import (
     QHeaderView, QDialogButtonBox, QPushButton, 
     QFormLayout, QTextEdit, QStyledItemDelegate, QTableWidgetItem,
     QListWidget, QCompleter, QSizePolicy, QStackedWidget,
-    QAbstractItemView
+    QAbstractItemView, QFileDialog, QTableView, QCheckBox, QTreeView, QInputDialog
 )
-#from PySide6.QtWidgets import QAction
+
+from exporters import EXPORT_FILTER, export_cursor
+from result_columns import ResultColumns
+from money_format import GROUPINGS, INDIAN, MoneyFormatter, format_money, set_default_grouping
+from bank_statement import DEFAULT_WINDOW_DAYS, match_entries, read_statement_csv
+from period_matrix import PeriodMatrix, build_period_matrix, month_index
+from integrity import REPAIRABLE_CHECKS, IntegrityFinding, verify_database
+from backup import BackupInfo, backup_database, last_modified, list_backups
+from maintenance import MaintenanceReport, MaintenanceRunner, format_report
+from db_server import RemoteDBManager, is_server_address
+from ui_monitor import UIMonitor, monitor_action, monitor_open, monitor_wait
 
 # ==============================================================================
 # 0. HELPER CLASSES & FUNCTIONS
@@ -60,11 +81,48 @@ def show_message(parent, title, message, icon):
     msg.setWindowTitle(title)
     msg.setText(message)
     msg.setIcon(icon)
-    msg.exec()
+    with monitor_wait(parent):
+        msg.exec()
+
+def exec_and_delete(dialog: QDialog) -> int:
+    """
+    Runs a one-off dialog and schedules its deletion. Dialogs are parented to
+    the window that opens them, so without this every dialog opened over a
+    session stays alive under the main window.
+    """
+    try:
+        return dialog.exec()
+    finally:
+        dialog.deleteLater()
+
+# Date keys: vouchers carry an integer day key YYYYMMDD (vouch_day / trans_day)
+# next to their ISO date text. Report range filters compare the keys.
+@lru_cache(maxsize=8192)
+def _iso_date_key(iso: str) -> int:
+    return int(iso[:4]) * 10000 + int(iso[5:7]) * 100 + int(iso[8:10])
+
+def date_key(value) -> int:
+    """Day key of a QDate, datetime.date, ISO date string or day key."""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        return _iso_date_key(value)
+    if isinstance(value, QDate):
+        return value.year() * 10000 + value.month() * 100 + value.day()
+    return value.year * 10000 + value.month * 100 + value.day
+
+@lru_cache(maxsize=8192)
+def date_key_to_qdate(key: int) -> QDate:
+    return QDate(key // 10000, key // 100 % 100, key % 100)
+
+@lru_cache(maxsize=8192)
+def date_key_to_iso(key: int) -> str:
+    return f"{key // 10000:04d}-{key // 100 % 100:02d}-{key % 100:02d}"
 
 class AutoCompleteComboBox(QComboBox):
     """A QComboBox with integrated QCompleter for search-as-you-type."""
     def __init__(self, items, parent=None):
+        """items: a list of names, or a QStringListModel shared with other combos (see MasterListModels)."""
         super().__init__(parent)
         self.setEditable(True)
         self.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
@@ -73,7 +131,18 @@ class AutoCompleteComboBox(QComboBox):
       
         self.completer.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
         self.setCompleter(self.completer)
+        if isinstance(items, QAbstractItemModel):
+            self.setModel(items)
+        else:
+            self.addItems(items)
+
+    def set_items(self, items: List[str]):
+        """Replaces the list of a combo built from a list, keeping the typed text."""
+        text = self.currentText()
+        self.clear()
         self.addItems(items)
+        self.completer.model().setStringList(items)
+        self.setEditText(text)
         
     def currentText(self) -> str:
         """Override to ensure the text from QLineEdit part is returned."""
@@ -87,7 +156,7 @@ class DecimalLineEdit(QLineEdit):
    
         self.setAlignment(Qt.AlignmentFlag.AlignRight)
         
-        validator = QDoubleValidator()
+        validator = QDoubleValidator(self)  # parented: setValidator() does not take ownership
         validator.setNotation(QDoubleValidator.Notation.StandardNotation)
         self.locale = QLocale(QLocale.Language.English, QLocale.Country.UnitedStates) 
         validator.setLocale(self.locale) 
@@ -98,7 +167,7 @@ class DecimalLineEdit(QLineEdit):
         try:
           
             # 1. Clean up formatting
-            text = self.text().replace(self.locale.thousandsSeparator(), '').replace(self.locale.decimalPoint(), '.')
+            text = self.text().replace(self.locale.groupSeparator(), '').replace(self.locale.decimalPoint(), '.')
             
             # 2. Robust check for empty/invalid input (THE FIX)
             cleaned_text = text.strip()
@@ -114,7 +183,7 @@ class DecimalLineEdit(QLineEdit):
     def set_value(self, val: Decimal):
         """Sets the 
  text from a Decimal object."""
-        self.setText(f"{val:,.2f}")
+        self.setText(format_money(val))
         
     def focusInEvent(self, event):
         super().focusInEvent(event)
@@ -129,6 +198,143 @@ class DecimalLineEdit(QLineEdit):
 # 1. DATABASE MANAGER (EXTENDED for Master CRUD &  Reports)
 # ==============================================================================
 
+# --- Voucher statement registry and typed rows ---
+# Every (operation, voucher type) statement is built once here, so the voucher
+# methods pass the same SQL string on every call and hit sqlite3's statement
+# cache instead of re-formatting and re-preparing it.
+ACCOUNT_VOUCH_TABLES = {'PAY': 'payment', 'REC': 'receipt', 'JNL': 'journal', 'CON': 'journal'}
+ITEM_VOUCH_TABLES = {'SAL': 'sales', 'PUR': 'purchase', 'CN': 'creditnote', 'DN': 'debitnote'}
+
+class AccountVoucherHeader(NamedTuple):
+    vouch_date: str
+    vouch_no: str
+    total_amount: float
+    narrative: str
+    ref_no: str
+    mode_of_payment_ref: str
+
+class AccountVoucherLine(NamedTuple):
+    dr_cr: str
+    account_name: str
+    amount: Decimal
+
+class ItemVoucherHeader(NamedTuple):
+    date: str
+    vouch_no: str
+    ref_no: str
+    party_name: str
+    tax_type: str
+    total_taxable_amt: float
+    total_tax_amt: float
+    final_bill_amt: float
+    narration: str
+    against_ref: str
+
+class ItemVoucherLine(NamedTuple):
+    item_name: str
+    qty: Decimal
+    rate: Decimal
+    discount: Decimal
+    taxable_amt: Decimal
+    tax_amt: Decimal
+
+class StatementRow(NamedTuple):
+    """One line of a P&L / Balance Sheet: a group ('G'), an account ('A') or the current-period profit ('P')."""
+    kind: str
+    id: int
+    name: str
+    parent_id: int
+    nature: str
+    depth: int
+    amount: float  # signed, Dr + / Cr -
+
+class OutstandingBill(NamedTuple):
+    """An open bill of a party; amounts are positive on the group's own side (Dr for debtors, Cr for creditors)."""
+    party_id: int
+    party: str
+    ref: str
+    date: str  # None for the opening balance
+    bill_amount: float
+    open_amount: float
+    days: int
+
+class AgeingRow(NamedTuple):
+    party_id: int
+    party: str
+    outstanding: float  # open bills plus on-account amounts
+    on_account: float  # settlements without a matching bill (advances, unreferenced receipts/payments)
+    days_0_30: float
+    days_31_60: float
+    days_61_90: float
+    over_90: float
+
+class ChangeRecord(NamedTuple):
+    version: int
+    table_name: str
+    row_id: int
+    op: str  # I/U/D
+
+class MasterLists(NamedTuple):
+    """Name lists of the voucher entry combos (see DBManager.get_master_lists)."""
+    account_names: List[str]  # line accounts: every account outside the party group
+    party_names: List[str]  # every account
+    item_names: List[str]
+
+class VoucherRegisterRow(NamedTuple):
+    """A voucher in the register; (day, vouch_no, vouch_type) is its sort and paging key (see DBManager.get_voucher_register)."""
+    day: int
+    vouch_no: str
+    vouch_type: str
+    date: str
+    party: str  # item vouchers: the party; account vouchers: the account of the first line
+    amount: float
+    narration: str
+    voucher_id: int  # None for vouchers of closed (archived) years
+
+ROW_TYPES = {t.__name__: t for t in (AccountVoucherHeader, AccountVoucherLine, ItemVoucherHeader, ItemVoucherLine, StatementRow,
+                                     OutstandingBill, AgeingRow, ChangeRecord, IntegrityFinding, MasterLists, VoucherRegisterRow,
+                                     BackupInfo, MaintenanceReport)}
+
+def _to_decimal(value) -> Decimal:
+    return Decimal(str(value)) if value is not None else Decimal('0.00')
+
+ROW_FACTORIES = {
+    AccountVoucherHeader: lambda cursor, row: AccountVoucherHeader._make(row),
+    AccountVoucherLine: lambda cursor, row: AccountVoucherLine(row[0], row[1], _to_decimal(row[2])),
+    ItemVoucherHeader: lambda cursor, row: ItemVoucherHeader._make(row),
+    ItemVoucherLine: lambda cursor, row: ItemVoucherLine(row[0], *map(_to_decimal, row[1:])),
+    ChangeRecord: lambda cursor, row: ChangeRecord._make(row),
+}
+
+def _build_voucher_statements() -> Dict[Tuple[str, str], str]:
+    statements = {}
+    for code, base in ACCOUNT_VOUCH_TABLES.items():
+        statements['insert_header', code] = f"""INSERT INTO {base}_header (vouch_date, vouch_day, vouch_no, total_amount, narrative, ref_no, mode_of_payment_ref)
+            VALUES (?, ?, ?, ?, ?, ?, ?)"""
+        statements['insert_line', code] = f"""INSERT INTO {base}_lines (vouch_header_id, dr_cr, master_account_id, amount, against_ref_no, remarks)
+            VALUES (?, ?, ?, ?, ?, ?)"""
+        statements['delete_header', code] = f"DELETE FROM {base}_header WHERE id = ?"
+        statements['select_header', code] = f"""SELECT vouch_date, vouch_no, total_amount, narrative, ref_no, mode_of_payment_ref
+            FROM {base}_header WHERE id = ?"""
+        statements['select_lines', code] = f"""SELECT l.dr_cr, am.master_name, l.amount
+            FROM {base}_lines l JOIN account_master am ON l.master_account_id = am.id
+            WHERE l.vouch_header_id = ?"""
+    for code, base in ITEM_VOUCH_TABLES.items():
+        statements['insert_header', code] = f"""INSERT INTO {base}_header (trans_date, trans_day, vouch_no, ref_no, party_mas_id, tax_type, total_taxable_amt, total_tax_amt, final_bill_amt, narration, against_ref)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+        statements['insert_line', code] = f"""INSERT INTO {base}_lines (trans_header_id, item_mas_id, hsn_code, qty, rate, discount, taxable_amt, tax_amt)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)"""
+        statements['delete_header', code] = f"DELETE FROM {base}_header WHERE id = ?"
+        statements['select_header', code] = f"""SELECT h.trans_date, h.vouch_no, h.ref_no, am.master_name, h.tax_type, h.total_taxable_amt, h.total_tax_amt, h.final_bill_amt, h.narration, h.against_ref
+            FROM {base}_header h JOIN account_master am ON h.party_mas_id = am.id
+            WHERE h.id = ?"""
+        statements['select_lines', code] = f"""SELECT im.item_name, l.qty, l.rate, l.discount, l.taxable_amt, l.tax_amt
+            FROM {base}_lines l JOIN item_master im ON l.item_mas_id = im.id
+            WHERE l.trans_header_id = ?"""
+    return statements
+
+VOUCHER_STATEMENTS = _build_voucher_statements()
+
 class DBManager:
     def __init__(self, db_path: str):
         """Initializes the database connection and ensures tables exist."""
@@ -137,7 +343,15 @@ class DBManager:
         self.db_path = db_path
         
         try:
-            self.conn = sqlite3.connect(db_path)
+            # uri=True so closed-year archives can be ATTACHed read-only/immutable (see _attach_archive)
+            # Room for every VOUCHER_STATEMENTS entry plus the report/master queries
+            self.conn = sqlite3.connect(db_path, uri=True, cached_statements=256)
+            # Enforce the declared foreign keys: deleting a header cascades to its lines
+            # (through the idx_*_lines_header indexes) and masters in use cannot be deleted.
+            self.conn.execute("PRAGMA foreign_keys = ON")
+            # New files only (a no-op once tables exist): lets idle maintenance hand free pages back
+            # in small steps. Older files are converted by their first maintenance VACUUM (see maintenance.py).
+            self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
             self.cursor = self.conn.cursor()
   
            
@@ -211,16 +425,221 @@ class DBManager:
                     id INTEGER PRIMARY KEY,
                     voucher_id INTEGER NOT NULL,
                     account_id INTEGER NOT NULL,
-                    is_debit INTEGER NOT NULL, -- 1 for 
- Debit, 0 for Credit
+                    is_debit INTEGER NOT NULL, -- 1 for Debit, 0 for Credit
                     amount REAL NOT NULL,
                     FOREIGN KEY (voucher_id) REFERENCES voucher_master(id),
                     FOREIGN KEY (account_id) REFERENCES account_master(id)
                 )
           
    """)
-            
+
+            # 5. Account Voucher Header/Lines (PAY, REC, JNL/CON)
+            for base in ('payment', 'receipt', 'journal'):
+                self.cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {base}_header (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        vouch_date TEXT NOT NULL,
+                        vouch_no TEXT UNIQUE NOT NULL,
+                        total_amount REAL,
+                        narrative TEXT,
+                        ref_no TEXT,
+                        mode_of_payment_ref TEXT
+                    )
+                """)
+                self.cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {base}_lines (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        vouch_header_id INTEGER NOT NULL,
+                        dr_cr TEXT NOT NULL,
+                        master_account_id INTEGER NOT NULL,
+                        amount REAL NOT NULL,
+                        against_ref_no TEXT,
+                        remarks TEXT,
+                        FOREIGN KEY (vouch_header_id) REFERENCES {base}_header(id) ON DELETE CASCADE,
+                        FOREIGN KEY (master_account_id) REFERENCES account_master(id)
+                    )
+                """)
+                self._add_date_key(base, 'vouch_date')
+                self.cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{base}_lines_header ON {base}_lines(vouch_header_id)")
+                self.cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{base}_lines_account ON {base}_lines(master_account_id)")
+                # bill-wise settlement lookups (see _party_entries)
+                self.cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{base}_lines_account_ref ON {base}_lines(master_account_id, against_ref_no)")
+
+            # 6. Item Voucher Header/Lines (SAL, PUR, CN, DN)
+            for base in ('sales', 'purchase', 'creditnote', 'debitnote'):
+                self.cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {base}_header (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        trans_date TEXT NOT NULL,
+                        vouch_no TEXT UNIQUE NOT NULL,
+                        ref_no TEXT,
+                        party_mas_id INTEGER NOT NULL,
+                        tax_type TEXT,
+                        total_taxable_amt REAL,
+                        total_tax_amt REAL,
+                        final_bill_amt REAL,
+                        narration TEXT,
+                        against_ref TEXT,
+                        FOREIGN KEY (party_mas_id) REFERENCES account_master(id)
+                    )
+                """)
+                self.cursor.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {base}_lines (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        trans_header_id INTEGER NOT NULL,
+                        item_mas_id INTEGER NOT NULL,
+                        hsn_code TEXT,
+                        qty REAL,
+                        rate REAL,
+                        discount REAL,
+                        taxable_amt REAL,
+                        tax_amt REAL,
+                        FOREIGN KEY (trans_header_id) REFERENCES {base}_header(id) ON DELETE CASCADE,
+                        FOREIGN KEY (item_mas_id) REFERENCES item_master(id)
+                    )
+                """)
+                self._add_date_key(base, 'trans_date')
+                self.cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{base}_lines_header ON {base}_lines(trans_header_id)")
+                self.cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{base}_header_party_ref ON {base}_header(party_mas_id, against_ref)")
+
+            # 7. Utilities Settings
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS utilities_settings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    setting_type TEXT NOT NULL UNIQUE,
+                    setting_value TEXT NOT NULL,
+                    description TEXT
+                )
+            """)
+
+            # 8. Closed Financial Year Archives (see close_financial_year)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS fy_archives (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    fy_label TEXT NOT NULL UNIQUE,
+                    path TEXT NOT NULL, -- relative to the live database's folder
+                    date_from TEXT NOT NULL,
+                    date_to TEXT NOT NULL
+                )
+            """)
+
+            # 9. Account Group Hierarchy: account_master.group_type names a group;
+            # the closure table holds one row per (ancestor, descendant) pair, depth 0 = the group itself.
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS account_groups (
+                    id INTEGER PRIMARY KEY,
+                    group_name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+                    parent_id INTEGER,
+                    nature TEXT NOT NULL, -- Asset/Liability/Income/Expense
+                    FOREIGN KEY (parent_id) REFERENCES account_groups(id)
+                )
+            """)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS account_group_closure (
+                    ancestor_id INTEGER NOT NULL,
+                    descendant_id INTEGER NOT NULL,
+                    depth INTEGER NOT NULL,
+                    PRIMARY KEY (ancestor_id, descendant_id)
+                ) WITHOUT ROWID
+            """)
+            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_account_group_closure_desc ON account_group_closure(descendant_id, ancestor_id)")
+            # accounts of a group (subtree balances); NOCASE to match the account_groups.group_name join
+            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_account_master_group ON account_master(group_type COLLATE NOCASE)")
+
+            # 10. Per-account Dr/Cr totals by day with the running balance (Dr +, Cr -) to the end of that day,
+            # kept current by triggers (see _create_balance_triggers)
+            new_totals = not self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'account_day_totals'").fetchone()
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS account_day_totals (
+                    account_id INTEGER NOT NULL,
+                    day TEXT NOT NULL,
+                    dr REAL NOT NULL DEFAULT 0,
+                    cr REAL NOT NULL DEFAULT 0,
+                    balance REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (account_id, day)
+                ) WITHOUT ROWID
+            """)
+
+            # 11. GST Summary: item voucher lines netted per month, direction (Outward = SAL - CN,
+            # Inward = PUR - DN), HSN and rate, kept current by triggers (see _create_gst_triggers)
+            new_gst = not self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'gst_month_totals'").fetchone()
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS gst_month_totals (
+                    month TEXT NOT NULL, -- YYYY-MM
+                    direction TEXT NOT NULL, -- Outward/Inward
+                    hsn_code TEXT NOT NULL,
+                    rate REAL NOT NULL,
+                    qty REAL NOT NULL DEFAULT 0,
+                    taxable_amt REAL NOT NULL DEFAULT 0,
+                    tax_amt REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (month, direction, hsn_code, rate)
+                ) WITHOUT ROWID
+            """)
+
+            # 12. Bank Reconciliation: imported statement lines, each matched to at most one
+            # bank account line of a PAY/REC/JNL voucher (vouch_type, line_id)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS bank_statement_lines (
+                    id INTEGER PRIMARY KEY,
+                    account_id INTEGER NOT NULL,
+                    txn_date TEXT NOT NULL,
+                    description TEXT,
+                    ref_no TEXT,
+                    amount REAL NOT NULL, -- deposit +, withdrawal -
+                    row_hash TEXT NOT NULL, -- re-importing a statement skips rows already on file
+                    vouch_type TEXT,
+                    line_id INTEGER,
+                    match_kind TEXT, -- auto/manual
+                    UNIQUE (account_id, row_hash),
+                    FOREIGN KEY (account_id) REFERENCES account_master(id)
+                )
+            """)
+            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_bank_statement_open ON bank_statement_lines(account_id, line_id)")
+            self.cursor.execute("""CREATE UNIQUE INDEX IF NOT EXISTS idx_bank_statement_match
+                ON bank_statement_lines(vouch_type, line_id) WHERE line_id IS NOT NULL""")
+
+            # 13. Change log: one row per insert/update/delete on the master, header and line
+            # tables (see _create_change_triggers), read by consumers from their watermark on
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS change_log (
+                    version INTEGER PRIMARY KEY AUTOINCREMENT, -- never reused after compaction
+                    table_name TEXT NOT NULL,
+                    row_id INTEGER NOT NULL,
+                    op TEXT NOT NULL -- I/U/D
+                )
+            """)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS change_consumers (
+                    name TEXT PRIMARY KEY,
+                    watermark INTEGER NOT NULL DEFAULT 0 -- last version acknowledged
+                )
+            """)
+
+            self._seed_account_groups()
+            self._create_balance_triggers()
+            self._create_gst_triggers()
+            self._create_bank_match_triggers()
+            self._create_change_triggers()
+            if new_totals:
+                self.rebuild_account_totals(commit=False)
+            if new_gst:
+                self.rebuild_gst_totals(commit=False)
+
             self.conn.commit()
+            self._archives = self.cursor.execute("SELECT id, path, date_from, date_to FROM fy_archives ORDER BY date_to").fetchall()
+            self._replica = None
+            self._replica_version = None  # data_version of _replica_probe the replica was copied at
+            self._replica_probe = None
+            self._replica_lock = threading.Lock()
+            self._replica_thread = None
+            self._backup_thread = None
+            self._maintenance = None
+            self._maintenance_done = float('-inf')
+            self._typed_cursors = {}
+            self._date_key_schemas = {}
+            self._owner_thread = threading.get_ident()
+            self._thread_conns = threading.local()
+            self._master_lists = None  # (lists, change version, PartyMasterType) - see get_master_lists
 
         except Exception as e:
             # Handle error (close connection, re-raise)
@@ -241,8 +660,11 @@ class DBManager:
         try:
             self.cursor.execute(f"INSERT INTO {table} ({name_col}, {extra_col}) VALUES (?, ?)", 
                                 (data['name'], data['group_or_hsn']))
+            master_id = self.cursor.lastrowid
+            if master_type == 'account':
+                self._file_account_group(data['group_or_hsn'])
             self.conn.commit()
-            return self.cursor.lastrowid
+            return master_id
   
         except sqlite3.IntegrityError as e:
             self.conn.rollback()
@@ -257,8 +679,11 @@ class DBManager:
         try:
             sql = f"UPDATE {table} SET {name_col} = ?, {extra_col} = ? WHERE id = ?"
             self.cursor.execute(sql, (data['name'], data['group_or_hsn'], master_id))
+            updated = self.cursor.rowcount > 0
+            if master_type == 'account':
+                self._file_account_group(data['group_or_hsn'])
             self.conn.commit()
-            return self.cursor.rowcount > 0
+            return updated
         
         except sqlite3.IntegrityError as e:
             self.conn.rollback()
@@ -332,6 +757,31 @@ class DBManager:
     def get_item_names(self) -> List[str]:
         return [row[0] for row in self.cursor.execute("SELECT item_name FROM item_master ORDER BY item_name")]
 
+    def get_master_lists(self) -> MasterLists:
+        """
+        Account, party and item names for the voucher entry combos. The lists are
+        cached and read again only after change_log shows an account or item
+        master change (or was compacted past the cached version), or after the
+        PartyMasterType setting changed, so opening a voucher usually costs two
+        indexed lookups.
+        """
+        party_master_type = self.get_setting("PartyMasterType")
+        version = self.get_change_version()
+        if self._master_lists:
+            lists, cached_version, cached_party_type = self._master_lists
+            if cached_party_type == party_master_type and (version == cached_version or self.conn.execute(
+                    """SELECT NOT EXISTS (SELECT 1 FROM change_log WHERE version > ? AND table_name IN ('account_master', 'item_master'))
+                       AND COALESCE((SELECT MIN(version) FROM change_log), ?) <= ?""",
+                    (cached_version, version + 1, cached_version + 1)).fetchone()[0]):
+                self._master_lists = lists, version, party_master_type
+                return lists
+        party_names = self.get_account_names(exclude_groups=[])
+        # The party group itself is left out of the line accounts
+        account_names = self.get_account_names(exclude_groups=[party_master_type]) if party_master_type else party_names
+        lists = MasterLists(account_names, party_names, self.get_item_names())
+        self._master_lists = lists, version, party_master_type
+        return lists
+
     def get_id_by_name(self, name: str, master_type: str) -> int |None:
         table = f"{master_type}_master"
         column = f"{master_type}_name"
@@ -360,45 +810,43 @@ class DBManager:
 
     # --- VOUCHER DATA FETCH (Existing) ---
     def _get_account_vouch_tables(self, vouch_type_code: str) -> Tuple[str, str] |None:
-        vouch_map = {'PAY': 'payment', 'REC': 'receipt', 'JNL': 'journal', 'CON': 'journal'}
-        base_name = vouch_map.get(vouch_type_code)
+        base_name = ACCOUNT_VOUCH_TABLES.get(vouch_type_code)
         if base_name:
             return f"{base_name}_header", f"{base_name}_lines"
         return None
         
     def _get_item_vouch_tables(self, vouch_type_code: str) -> Tuple[str, str] |None:
-        item_map = {'SAL': 'sales', 'PUR': 'purchase', 'CN': 'creditnote', 'DN': 'debitnote'}
-        base_name = item_map.get(vouch_type_code)
+        base_name = ITEM_VOUCH_TABLES.get(vouch_type_code)
         if base_name:
             return f"{base_name}_header", f"{base_name}_lines"
         return None
+
+    def _typed_cursor(self, row_type) -> sqlite3.Cursor:
+        """Reusable cursor whose rows decode straight into row_type."""
+        cursor = self._typed_cursors.get(row_type)
+        if cursor is None:
+            cursor = self._typed_cursors[row_type] = self.conn.cursor()
+            cursor.row_factory = ROW_FACTORIES[row_type]
+        return cursor
         
     def add_account_voucher(self, vouch_type_code, header_data, line_data):
-        tables = self._get_account_vouch_tables(vouch_type_code)
-        if not tables: raise ValueError("Invalid account voucher type")
-        header_table, line_table = tables
+        if vouch_type_code not in ACCOUNT_VOUCH_TABLES: raise ValueError("Invalid account voucher type")
         
         try:
-            self.cursor.execute(f"""
-                INSERT INTO {header_table} (vouch_date, vouch_no, total_amount, narrative, ref_no, mode_of_payment_ref)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (header_data['vouch_date'], header_data['vouch_no'], 
-            float(header_data['total_amount']), header_data['narrative'], header_data['ref_no'], header_data['mode_of_payment_ref']))
+            self.cursor.execute(VOUCHER_STATEMENTS['insert_header', vouch_type_code], (
+                header_data['vouch_date'], date_key(header_data['vouch_date']), header_data['vouch_no'], float(header_data['total_amount']),
+                header_data['narrative'], header_data['ref_no'], header_data['mode_of_payment_ref']))
             header_id = self.cursor.lastrowid
             
-            for line in line_data:
-                self.cursor.execute(f"""
-                    INSERT INTO {line_table} (vouch_header_id, dr_cr, master_account_id, amount, against_ref_no, remarks)
-            
-         VALUES (?, ?, ?, ?, ?, ?)
-                """, (header_id, line['dr_cr'], line['master_account_id'], float(line['amount']), line['against_ref_no'], line['remarks']))
+            self.cursor.executemany(VOUCHER_STATEMENTS['insert_line', vouch_type_code], [
+                (header_id, line['dr_cr'], line['master_account_id'], float(line['amount']), line['against_ref_no'], line['remarks'])
+                for line in line_data])
                 
             self.conn.commit()
             return header_id
         except Exception as e:
-            
             self.conn.rollback()
-        raise ValueError(f"DB Error adding voucher: {e}")
+            raise ValueError(f"DB Error adding voucher: {e}")
             
     def update_account_voucher(self, voucher_id, vouch_type_code, header_data, line_data):
         # Placeholder update logic
@@ -406,40 +854,31 @@ class DBManager:
         return self.add_account_voucher(vouch_type_code, header_data, line_data)
 
     def delete_account_voucher(self, voucher_id, vouch_type_code):
-        tables = self._get_account_vouch_tables(vouch_type_code)
-        if not tables: return False
-  
-        header_table, _ = tables
-        self.cursor.execute(f"DELETE FROM {header_table} WHERE id = ?", (voucher_id,))
+        if vouch_type_code not in ACCOUNT_VOUCH_TABLES: return False
+        self.cursor.execute(VOUCHER_STATEMENTS['delete_header', vouch_type_code], (voucher_id,))
         self.conn.commit()
         return self.cursor.rowcount > 0
 
     def add_item_voucher(self, vouch_type_code, header_data, line_data):
-        tables = self._get_item_vouch_tables(vouch_type_code)
-        if not tables: raise ValueError("Invalid item voucher type")
-        header_table, line_table = tables
+        if vouch_type_code not in ITEM_VOUCH_TABLES: raise ValueError("Invalid item voucher type")
         
-     
         try:
-            self.cursor.execute(f"""
-                INSERT INTO {header_table} (trans_date, vouch_no, ref_no, party_mas_id, tax_type, total_taxable_amt, total_tax_amt, final_bill_amt, narration, against_ref)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (header_data['date'], header_data['vouch_no'], header_data['ref_no'], header_data['party_mas_id'], header_data['tax_type'], float(header_data['total_taxable_amt']), float(header_data['total_tax_amt']), float(header_data['final_bill_amt']), header_data['narration'], header_data['against_ref']))
-         
+            self.cursor.execute(VOUCHER_STATEMENTS['insert_header', vouch_type_code], (
+                header_data['date'], date_key(header_data['date']), header_data['vouch_no'], header_data['ref_no'], header_data['party_mas_id'],
+                header_data['tax_type'], float(header_data['total_taxable_amt']), float(header_data['total_tax_amt']),
+                float(header_data['final_bill_amt']), header_data['narration'], header_data['against_ref']))
             header_id = self.cursor.lastrowid
             
-            for line in line_data:
-                self.cursor.execute(f"""
-                    INSERT INTO {line_table} (trans_header_id, item_mas_id, hsn_code, qty, rate, discount, taxable_amt, tax_amt)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (header_id, line['item_mas_id'], line['hsn_code'], float(line['qty']), float(line['rate']), float(line['discount']), float(line['taxable_amt']), float(line['tax_amt'])))
+            self.cursor.executemany(VOUCHER_STATEMENTS['insert_line', vouch_type_code], [
+                (header_id, line['item_mas_id'], line['hsn_code'], float(line['qty']), float(line['rate']),
+                 float(line['discount']), float(line['taxable_amt']), float(line['tax_amt']))
+                for line in line_data])
                 
             self.conn.commit()
             return header_id
         except Exception as e:
             self.conn.rollback()
-      
-        raise ValueError(f"DB Error adding item voucher: {e}")
+            raise ValueError(f"DB Error adding item voucher: {e}")
 
     def update_item_voucher(self, voucher_id, vouch_type_code, header_data, line_data):
         # Placeholder update logic
@@ -447,143 +886,1807 @@ class DBManager:
         return self.add_item_voucher(vouch_type_code, header_data, line_data)
         
     def delete_item_voucher(self, voucher_id, vouch_type_code):
-        tables = self._get_item_vouch_tables(vouch_type_code)
-        if not tables: return False
-        header_table, _ = tables
-        self.cursor.execute(f"DELETE FROM {header_table} WHERE id = ?", (voucher_id,))
+        if vouch_type_code not in ITEM_VOUCH_TABLES: return False
+        self.cursor.execute(VOUCHER_STATEMENTS['delete_header', vouch_type_code], (voucher_id,))
         self.conn.commit()
         return self.cursor.rowcount > 0
 
-    def get_voucher_data_by_id(self, voucher_id: int, vouch_type_code: str) -> Tuple[Dict, List[Dict]] |None:
-        if vouch_type_code in ['PAY', 'REC', 'JNL', 'CON']:
-            tables = self._get_account_vouch_tables(vouch_type_code)
-            if not tables: return None
-            header_table, line_table = tables
-            
-            # 1. Fetch Header Data
-            self.cursor.execute(f"SELECT vouch_date, vouch_no, total_amount, narrative, ref_no, mode_of_payment_ref FROM {header_table} WHERE id = ?", (voucher_id,))
-            header_row = self.cursor.fetchone()
-            if not header_row: return None
-            
-            header_data = {
-                'vouch_date': header_row[0], 'vouch_no': header_row[1], 'total_amount': header_row[2], 
-          
-                'narrative': header_row[3], 'ref_no': header_row[4], 'mode_of_payment_ref': header_row[5]
-            }
-
-            # 2. Fetch Line Data
-            self.cursor.execute(f"""
-                SELECT l.dr_cr, am.master_name, l.amount 
-                FROM {line_table} l
-           
-            JOIN account_master am ON l.master_account_id = am.id
-                WHERE l.vouch_header_id = ?""", (voucher_id,))
-            
-            line_data = [{'dr_cr': row[0], 'account_name': row[1], 'amount': Decimal(str(row[2]))} for row in self.cursor.fetchall()]
-            return header_data, line_data
-
-        elif vouch_type_code in ['SAL', 'PUR', 'CN', 'DN']:
-            tables = self._get_item_vouch_tables(vouch_type_code)
-            if not tables: return None
-      
-            header_table, line_table = tables
+    # --- INTEGRITY ---
+    def verify_integrity(self, workers: int = None) -> List[IntegrityFinding]:
+        """
+        Checks every voucher type of the live file in parallel worker processes,
+        each on its own read-only connection (see integrity.py): Dr = Cr, header
+        totals against the lines, vouchers without lines, orphan lines and
+        references to missing masters. Closed-year archives are not checked.
+        """
+        tables = [(code, base, True) for code, base in self.ACCOUNT_VOUCH_BASES.items()]
+        tables += [(code, base, False) for code, base in self.ITEM_VOUCH_BASES.items()]
+        return verify_database(self.db_path, tables, workers)
+
+    def repair_integrity(self) -> Dict[str, int]:
+        """
+        Repairs what verify_integrity can fix unattended, in one transaction:
+        deletes orphan lines and resets header totals to the sum of their lines.
+        Returns the number of rows changed per check (see REPAIRABLE_CHECKS).
+        """
+        counts = dict.fromkeys(REPAIRABLE_CHECKS, 0)
+        try:
+            for bases, fk_col in ((self.ACCOUNT_VOUCH_BASES, 'vouch_header_id'), (self.ITEM_VOUCH_BASES, 'trans_header_id')):
+                for base in bases.values():
+                    self.cursor.execute(f"DELETE FROM {base}_lines WHERE {fk_col} NOT IN (SELECT id FROM {base}_header)")
+                    counts['orphan_line'] += self.cursor.rowcount
+            for base in self.ACCOUNT_VOUCH_BASES.values():
+                self.cursor.execute(f"""
+                    UPDATE {base}_header SET total_amount = l.dr
+                    FROM (SELECT vouch_header_id, SUM(CASE WHEN dr_cr = 'Dr' THEN amount ELSE 0 END) AS dr
+                          FROM {base}_lines GROUP BY vouch_header_id) l
+                    WHERE l.vouch_header_id = {base}_header.id AND round(COALESCE(total_amount, 0) - l.dr, 2) != 0""")
+                counts['header_total'] += self.cursor.rowcount
+            for base in self.ITEM_VOUCH_BASES.values():
+                self.cursor.execute(f"""
+                    UPDATE {base}_header SET total_taxable_amt = l.taxable, total_tax_amt = l.tax, final_bill_amt = l.taxable + l.tax
+                    FROM (SELECT trans_header_id, SUM(taxable_amt) AS taxable, SUM(tax_amt) AS tax
+                          FROM {base}_lines GROUP BY trans_header_id) l
+                    WHERE l.trans_header_id = {base}_header.id
+                      AND (round(COALESCE(total_taxable_amt, 0) - l.taxable, 2) != 0
+                           OR round(COALESCE(total_tax_amt, 0) - l.tax, 2) != 0
+                           OR round(COALESCE(final_bill_amt, 0) - l.taxable - l.tax, 2) != 0)""")
+                counts['header_total'] += self.cursor.rowcount
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            raise ValueError(f"DB Error repairing vouchers: {e}")
+        return counts
+
+    def get_voucher_data_by_id(self, voucher_id: int, vouch_type_code: str) -> Tuple[tuple, List[tuple]] |None:
+        """
+        Returns (header, lines) as typed rows: AccountVoucherHeader/AccountVoucherLine
+        for PAY/REC/JNL/CON, ItemVoucherHeader/ItemVoucherLine for SAL/PUR/CN/DN.
+        """
+        if vouch_type_code in ACCOUNT_VOUCH_TABLES:
+            header_type, line_type = AccountVoucherHeader, AccountVoucherLine
+        elif vouch_type_code in ITEM_VOUCH_TABLES:
+            header_type, line_type = ItemVoucherHeader, ItemVoucherLine
+        else:
+            return None
 
-            # 1. Fetch Header Data
-            self.cursor.execute(f"""
-                SELECT h.trans_date, h.vouch_no, h.ref_no, am.master_name, h.tax_type, h.total_taxable_amt, h.total_tax_amt, h.final_bill_amt, h.narration, h.against_ref
-                FROM {header_table} h
-                JOIN account_master am ON h.party_mas_id = am.id
-                WHERE h.id = ?
-            """, (voucher_id,))
-            header_row = self.cursor.fetchone()
-            if not header_row: return None
-            
-            header_data = {
-         
-        'date': header_row[0], 'vouch_no': header_row[1], 'ref_no': header_row[2], 'party_name': header_row[3],
-                'tax_type': header_row[4], 'total_taxable_amt': header_row[5], 'total_tax_amt': header_row[6],
-                'final_bill_amt': header_row[7], 'narration': header_row[8], 'against_ref': header_row[9]
-            }
-
-            # 2. Fetch Line Data
-            self.cursor.execute(f"""
-    
-             SELECT im.item_name, l.qty, l.rate, l.discount, l.taxable_amt, l.tax_amt
-                FROM {line_table} l
-                JOIN item_master im ON l.item_mas_id = im.id
-                WHERE l.trans_header_id = ?""", (voucher_id,))
-            
-            line_data = [{
-                'item_name': row[0], 'qty': Decimal(str(row[1])), 'rate': Decimal(str(row[2])), 
-                'discount': Decimal(str(row[3])), 'taxable_amt': Decimal(str(row[4])), 
-                'tax_amt': Decimal(str(row[5]))
-            } for row in self.cursor.fetchall()]
-            
-            return header_data, line_data
-        
-        return None
+        header = self._typed_cursor(header_type).execute(VOUCHER_STATEMENTS['select_header', vouch_type_code], (voucher_id,)).fetchone()
+        if not header: return None
+        lines = self._typed_cursor(line_type).execute(VOUCHER_STATEMENTS['select_lines', vouch_type_code], (voucher_id,)).fetchall()
+        return header, lines
 
     # --- REPORT DATA METHODS (Extended) ---
-    def get_ledger_data(self, date_from: str, date_to: str, account_name: str) -> List[Tuple]:
-        """Fetches all transactions for a specific account."""
+    # The iter_* methods return a live cursor of their own, so rows stream
+    # straight from SQLite without being materialised. The get_* methods wrap
+    # them for the report views, which need the whole result anyway.
+    ACCOUNT_VOUCH_BASES = {'PAY': 'payment', 'REC': 'receipt', 'JNL': 'journal'}
+    ITEM_VOUCH_BASES = {'SAL': 'sales', 'PUR': 'purchase', 'CN': 'creditnote', 'DN': 'debitnote'}
+    ARCHIVE_MMAP_SIZE = 256 * 1024 * 1024
+
+    def _attach_archive(self, conn: sqlite3.Connection, archive_id: int, path: str) -> str:
+        """ATTACHes a closed-year archive read-only and immutable (memory-mapped) once per connection."""
+        schema = f"fy_{archive_id}"
+        if schema not in {row[1] for row in conn.execute("PRAGMA database_list")}:
+            full_path = os.path.join(os.path.dirname(os.path.abspath(self.db_path)), path)
+            uri = pathlib.Path(full_path).as_uri() + "?mode=ro&immutable=1"
+            conn.execute(f"ATTACH DATABASE ? AS {schema}", (uri,))
+            conn.execute(f"PRAGMA {schema}.mmap_size = {self.ARCHIVE_MMAP_SIZE}")
+        return schema
+
+    def _voucher_sources(self, conn: sqlite3.Connection, date_from, date_to) -> List[str]:
+        """Schemas holding vouchers in the date range: overlapping archives plus the live file."""
+        date_from, date_to = date_key_to_iso(date_key(date_from)), date_key_to_iso(date_key(date_to))
+        schemas = [self._attach_archive(conn, archive_id, path)
+                   for archive_id, path, a_from, a_to in self._archives
+                   if a_from <= date_to and a_to >= date_from]
+        schemas.append('main')
+        return schemas
+
+    # Voucher headers carry an integer day key (vouch_day / trans_day, see
+    # date_key) next to the ISO date, and range filters go through its index.
+    # The insert statements write the key; a trigger fills it in for rows written
+    # by anything else. Archives closed before the key existed get the same
+    # value computed from the text date.
+    DATE_KEY_COLUMNS = {'vouch_date': 'vouch_day', 'trans_date': 'trans_day'}
+    DATE_KEY_SQL = "CAST(replace({date_col}, '-', '') AS INTEGER)"
+
+    def _add_date_key(self, base: str, date_col: str):
+        """Migration: adds and fills the day key column of a header table and indexes it in place of the ISO date."""
+        key_col = self.DATE_KEY_COLUMNS[date_col]
+        key_sql = self.DATE_KEY_SQL.format(date_col=f"NEW.{date_col}")
+        if key_col not in {row[1] for row in self.cursor.execute(f"PRAGMA table_info({base}_header)")}:
+            self.cursor.execute(f"ALTER TABLE {base}_header ADD COLUMN {key_col} INTEGER")
+            self.cursor.execute(f"UPDATE {base}_header SET {key_col} = {self.DATE_KEY_SQL.format(date_col=date_col)}")
+        for suffix, event in (('ai', 'INSERT'), ('au', f"UPDATE OF {date_col}, {key_col}")):
+            self.cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{base}_header_day_{suffix} AFTER {event} ON {base}_header
+                FOR EACH ROW WHEN NEW.{key_col} IS NOT {key_sql} BEGIN
+                    UPDATE {base}_header SET {key_col} = {key_sql} WHERE id = NEW.id;
+                END""")
+        # (day, vouch_no) is the voucher register's sort and paging key; day-only filters use its prefix.
+        self.cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{base}_header_day_no ON {base}_header({key_col}, vouch_no)")
+        self.cursor.execute(f"DROP INDEX IF EXISTS idx_{base}_header_day")
+        self.cursor.execute(f"DROP INDEX IF EXISTS idx_{base}_header_date")
+
+    def _date_key_sql(self, conn: sqlite3.Connection, schema: str, date_col: str, alias: str = 'h') -> str:
+        """The day key of a header's date column in a schema, as a column reference where the schema has one."""
+        has_keys = self._date_key_schemas.get(schema)
+        if has_keys is None:
+            has_keys = self._date_key_schemas[schema] = schema == 'main' or any(
+                row[1] == 'trans_day' for row in conn.execute(f"PRAGMA {schema}.table_info(sales_header)"))
+        prefix = f"{alias}." if alias else ''
+        return f"{prefix}{self.DATE_KEY_COLUMNS[date_col]}" if has_keys else self.DATE_KEY_SQL.format(date_col=prefix + date_col)
+
+    def iter_ledger_data(self, date_from: str, date_to: str, account_name: str) -> sqlite3.Cursor | None:
+        """
+        Streams (date, vouch_no, vouch_type, dr_cr, amount, narrative, voucher_id) rows
+        for an account; voucher_id is NULL for vouchers of closed (archived) years.
+        """
         account_id = self.get_id_by_name(account_name, 'account')
-       
-        if not account_id: return [] 
+        if not account_id: return None
+        conn = self._report_conn()
         sub_queries = []
-             # Account Vouchers
-        for type_code, base in {'PAY': 'payment', 'REC': 'receipt', 'JNL': 'journal'}.items():
+        # Account Vouchers
+        for schema in self._voucher_sources(conn, date_from, date_to):
+            for type_code, base in self.ACCOUNT_VOUCH_BASES.items():
                 sub_queries.append(f"""
-                    SELECT h.vouch_date, h.vouch_no, '{type_code}', l.dr_cr, l.amount, h.narrative
-                    FROM {base}_header h
-                JOIN {base}_lines l ON h.id = l.vouch_header_id
-                WHERE h.vouch_date BETWEEN ?AND ? AND l.master_account_id = ?
+                    SELECT h.vouch_date AS date, h.vouch_no AS vouch_no, '{type_code}' AS vouch_type,
+                           l.dr_cr AS dr_cr, l.amount AS amount, h.narrative AS narrative,
+                           {'h.id' if schema == 'main' else 'NULL'} AS voucher_id
+                    FROM {schema}.{base}_header h
+                    JOIN {schema}.{base}_lines l ON h.id = l.vouch_header_id
+                    WHERE {self._date_key_sql(conn, schema, 'vouch_date')} BETWEEN ? AND ? AND l.master_account_id = ?
                 """)
-        
-                combined_query = "\nUNION ALL\n".join(sub_queries)
-                combined_query += " ORDER BY vouch_date, vouch_no"
-                
-                params = [param for sublist in [[date_from, date_to, account_id] for _ in range(len(sub_queries))] for param in sublist]
-        
+        combined_query = "\nUNION ALL\n".join(sub_queries) + " ORDER BY date, vouch_no"
+        params = [date_key(date_from), date_key(date_to), account_id] * len(sub_queries)
+        return conn.execute(combined_query, params)
+
+    @staticmethod
+    def _fetch_report(cursor, columnar: bool):
+        """Materialises a report cursor as a list of tuples or, with columnar=True, a ResultColumns."""
+        return ResultColumns.from_cursor(cursor) if columnar else cursor.fetchall()
+
+    def get_ledger_data(self, date_from: str, date_to: str, account_name: str,
+                        columnar: bool = False) -> List[Tuple] | ResultColumns:
+        """Fetches all transactions for a specific account."""
         try:
-            self.cursor.execute(combined_query, params)
-            return self.cursor.fetchall()
+            rows = self.iter_ledger_data(date_from, date_to, account_name)
+            if rows:
+                return self._fetch_report(rows, columnar)
         except Exception as e:
             print(f"DB Error fetching Ledger: {e}")
-            return []
+        return ResultColumns(()) if columnar else []
 
-    def get_day_book_data(self, date: str) -> List[Tuple]:
-        """Fetches a summary of all voucher headers for a single day."""
-        all_vouchers = []
-        
-  
-        # Account Vouchers (PAY, REC, JNL)
-        for type_code, base in {'PAY': 'payment', 'REC': 'receipt', 'JNL': 'journal'}.items():
-            self.cursor.execute(f"""
-                SELECT vouch_date, vouch_no, '{type_code}', total_amount, narrative
-                FROM {base}_header
-                WHERE vouch_date = ?""", (date,))
-            all_vouchers.extend([(row[0], row[1], row[2], row[3], row[4]) for row in self.cursor.fetchall()])
-            
+    def iter_day_book_data(self, date_from: str, date_to: str) -> sqlite3.Cursor:
+        """Streams (date, vouch_no, vouch_type, amount, narration) voucher headers in a date range."""
+        conn = self._report_conn()
+        sub_queries = []
+        for schema in self._voucher_sources(conn, date_from, date_to):
+            # Account Vouchers (PAY, REC, JNL)
+            for type_code, base in self.ACCOUNT_VOUCH_BASES.items():
+                sub_queries.append(f"""
+                    SELECT vouch_date AS date, vouch_no, '{type_code}' AS vouch_type,
+                           total_amount AS amount, narrative AS narration
+                    FROM {schema}.{base}_header
+                    WHERE {self._date_key_sql(conn, schema, 'vouch_date', alias='')} BETWEEN ? AND ?
+                """)
             # Item Vouchers (SAL, PUR, CN, DN)
-        for type_code, base in {'SAL': 'sales', 'PUR': 'purchase', 'CN': 'creditnote', 'DN': 'debitnote'}.items():
-            self.cursor.execute(f"""
-                SELECT trans_date, vouch_no, '{type_code}', final_bill_amt, narration
- 
-                FROM {base}_header
-                WHERE trans_date = ?
-            """, (date,))
-            all_vouchers.extend([(row[0], row[1], row[2], row[3], row[4]) for row in self.cursor.fetchall()])
+            for type_code, base in self.ITEM_VOUCH_BASES.items():
+                sub_queries.append(f"""
+                    SELECT trans_date AS date, vouch_no, '{type_code}' AS vouch_type,
+                           final_bill_amt AS amount, narration
+                    FROM {schema}.{base}_header
+                    WHERE {self._date_key_sql(conn, schema, 'trans_date', alias='')} BETWEEN ? AND ?
+                """)
+        combined_query = "\nUNION ALL\n".join(sub_queries) + " ORDER BY date, vouch_no"
+        return conn.execute(combined_query, [date_key(date_from), date_key(date_to)] * len(sub_queries))
 
-        return sorted(all_vouchers, key=lambda x: (x[0], x[1]))
-        
-            # Placeholder for Stock Register and Subsidiary  Book data (used in Report views)
-    def get_stock_register_data(self, date_from: str, date_to: str) -> List[Tuple]:
+    def get_day_book_data(self, date: str, columnar: bool = False) -> List[Tuple] | ResultColumns:
+        """Fetches a summary of all voucher headers for a single day."""
+        return self._fetch_report(self.iter_day_book_data(date, date), columnar)
+
+    REGISTER_FIRST_DAY, REGISTER_LAST_DAY = 10101, 99991231
+
+    def get_voucher_register(self, after: List = None, limit: int = 200, vouch_types: List[str] = None,
+                             date_from: str = None, date_to: str = None, party: str = None,
+                             min_amount: float = None, max_amount: float = None,
+                             newest_first: bool = False) -> List[VoucherRegisterRow]:
+        """
+        One page of the voucher register: up to limit vouchers of the given types
+        (all if None) ordered by date, voucher number and type, starting after the
+        (day, vouch_no, vouch_type) key of the previous page's last row (keyset
+        paging; after=None starts at the beginning). party matches the party of
+        item vouchers and any line account of account vouchers; the amount range
+        applies to the voucher total. newest_first reverses the order, which also
+        reads the page before a key.
+
+        Each header table returns at most limit rows from its (day, vouch_no)
+        index, so a page costs the same at the end of a million vouchers as at
+        the start.
+        """
+        codes = list(vouch_types) if vouch_types else [*self.ACCOUNT_VOUCH_BASES, *self.ITEM_VOUCH_BASES]
+        unknown = [code for code in codes if code not in self.ACCOUNT_VOUCH_BASES and code not in self.ITEM_VOUCH_BASES]
+        if unknown:
+            raise ValueError(f"Unknown voucher type(s): {', '.join(unknown)}")
+        day_from = date_key(date_from) if date_from else self.REGISTER_FIRST_DAY
+        day_to = date_key(date_to) if date_to else self.REGISTER_LAST_DAY
+        direction, op = ('DESC', '<') if newest_first else ('ASC', '>')
+        # The day range starts at the key's day: SQLite takes its index range from
+        # the BETWEEN and would otherwise scan everything before the key.
+        scan_from, scan_to = day_from, day_to
+        if after is not None:
+            after = (int(after[0]), str(after[1]), str(after[2]))
+            if newest_first:
+                scan_to = min(day_to, after[0])
+            else:
+                scan_from = max(day_from, after[0])
+
+        conn = self._report_conn()
+        sub_queries, params = [], []
+        for schema in self._voucher_sources(conn, day_from, day_to):
+            for code in codes:
+                if code in self.ACCOUNT_VOUCH_BASES:
+                    base, date_col, amount_col, narration_col = self.ACCOUNT_VOUCH_BASES[code], 'vouch_date', 'total_amount', 'narrative'
+                    party_sql = f"""(SELECT am.master_name FROM {schema}.{base}_lines l
+                                    JOIN {schema}.account_master am ON am.id = l.master_account_id
+                                    WHERE l.vouch_header_id = h.id ORDER BY l.id LIMIT 1)"""
+                    # Starts from the party's lines (account index) rather than testing every header in the range
+                    party_filter = f"""h.id IN (SELECT vouch_header_id FROM {schema}.{base}_lines WHERE master_account_id =
+                                        (SELECT id FROM {schema}.account_master WHERE master_name = ?))"""
+                else:
+                    base, date_col, amount_col, narration_col = self.ITEM_VOUCH_BASES[code], 'trans_date', 'final_bill_amt', 'narration'
+                    party_sql = f"(SELECT master_name FROM {schema}.account_master WHERE id = h.party_mas_id)"
+                    party_filter = f"h.party_mas_id = (SELECT id FROM {schema}.account_master WHERE master_name = ?)"
+                day_sql = self._date_key_sql(conn, schema, date_col)
+                conditions = [f"{day_sql} BETWEEN ? AND ?"]
+                sub_params = [scan_from, scan_to]
+                if after is not None:
+                    # Within a table the key is (day, vouch_no); the type only breaks ties between tables.
+                    ties_follow = code > after[2] if not newest_first else code < after[2]
+                    conditions.append(f"({day_sql}, h.vouch_no) {op}{'=' if ties_follow else ''} (?, ?)")
+                    sub_params += after[:2]
+                if party:
+                    conditions.append(party_filter)
+                    sub_params.append(party)
+                if min_amount is not None:
+                    conditions.append(f"h.{amount_col} >= ?")
+                    sub_params.append(min_amount)
+                if max_amount is not None:
+                    conditions.append(f"h.{amount_col} <= ?")
+                    sub_params.append(max_amount)
+                sub_queries.append(f"""SELECT * FROM (
+                    SELECT {day_sql} AS day, h.vouch_no AS vouch_no, '{code}' AS vouch_type, h.{date_col} AS date,
+                           {party_sql} AS party, h.{amount_col} AS amount, h.{narration_col} AS narration,
+                           {'h.id' if schema == 'main' else 'NULL'} AS voucher_id
+                    FROM {schema}.{base}_header h
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY {day_sql} {direction}, h.vouch_no {direction} LIMIT ?)""")
+                params += sub_params + [limit]
+        query = "\nUNION ALL\n".join(sub_queries) + f" ORDER BY day {direction}, vouch_no {direction}, vouch_type {direction} LIMIT ?"
+        return [VoucherRegisterRow._make(row) for row in conn.execute(query, params + [limit])]
+
+    def iter_trial_balance_data(self, date_from: str, date_to: str) -> sqlite3.Cursor:
+        """
+        Streams (account, group, opening, debit, credit, closing) per account: the
+        balance (Dr +, Cr -) as date_from begins (see _opening_balances_sql), the
+        debits and credits posted from date_from to date_to by every voucher type
+        (item vouchers post to the party, the sales/purchase account and GST, see
+        _item_postings), and the resulting closing balance. Accounts with neither
+        a balance nor postings are left out. Within one year the closing balance
+        is get_closing_balances'; across a closed year-end, Income and Expense
+        accounts run on (their transfer to profit is not a posting).
+        """
+        date_from, date_to = date_key_to_iso(date_key(date_from)), date_key_to_iso(date_key(date_to))
+        conn = self._report_conn()
+        openings, params = self._opening_balances_sql(conn, date_from)
+        movements = []
+        for schema in self._voucher_sources(conn, date_from, date_to):
+            if conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = 'account_day_totals'").fetchone():
+                movements.append(f"SELECT account_id, dr, cr FROM {schema}.account_day_totals WHERE day BETWEEN :date_from AND :date_to")
+            else:  # archive closed before the totals existed
+                movements.append(f"""
+                    SELECT account_id, dr, cr FROM ({self._account_postings_sql(schema)})
+                    WHERE account_id IS NOT NULL AND day BETWEEN :date_from AND :date_to""")
+        query = f"""
+            WITH opening AS (
+                SELECT account_id, SUM(amount) AS amount FROM ({openings}) GROUP BY account_id
+            ),
+            movement AS (
+                SELECT account_id, SUM(dr) AS dr, SUM(cr) AS cr FROM ({" UNION ALL ".join(movements)}) GROUP BY account_id
+            )
+            SELECT am.master_name AS account, am.group_type AS group_type,
+                   COALESCE(o.amount, 0) AS opening, COALESCE(m.dr, 0) AS debit, COALESCE(m.cr, 0) AS credit,
+                   COALESCE(o.amount, 0) + COALESCE(m.dr, 0) - COALESCE(m.cr, 0) AS closing
+            FROM main.account_master am
+            LEFT JOIN opening o ON o.account_id = am.id
+            LEFT JOIN movement m ON m.account_id = am.id
+            WHERE round(COALESCE(o.amount, 0), 2) != 0 OR round(COALESCE(m.dr, 0), 2) != 0 OR round(COALESCE(m.cr, 0), 2) != 0
+            ORDER BY am.master_name
+        """
+        params.update(date_from=date_from, date_to=date_to)
+        return conn.execute(query, params)
+
+    def get_trial_balance_data(self, date_from: str, date_to: str, columnar: bool = False) -> List[Tuple] | ResultColumns:
+        """Fetches the opening balance, Dr/Cr totals and closing balance per account for the date range."""
+        return self._fetch_report(self.iter_trial_balance_data(date_from, date_to), columnar)
+
+        # Placeholder for Stock Register data (used in Report views)
+    def get_stock_register_data(self, date_from: str, date_to: str, columnar: bool = False) -> List[Tuple] | ResultColumns:
         """Placeholder for Stock Register data."""
-        return []
-        
-    def get_subsidiary_book_data(self, date_from: str, date_to: str, group_type: str) -> List[Tuple]:
-        """Placeholder for Subsidiary Book data."""
-        return []
+        return ResultColumns(()) if columnar else []
+
+    def iter_subsidiary_book_data(self, date_from: str, date_to: str, group_type: str) -> sqlite3.Cursor:
+        """Streams (date, vouch_no, vouch_type, account, group, net_amount) for accounts in a group."""
+        conn = self._report_conn()
+        sub_queries = []
+        for schema in self._voucher_sources(conn, date_from, date_to):
+            for type_code, base in self.ACCOUNT_VOUCH_BASES.items():
+                sub_queries.append(f"""
+                    SELECT h.vouch_date AS date, h.vouch_no AS vouch_no, '{type_code}' AS vouch_type,
+                           am.master_name AS account, am.group_type AS group_type,
+                           SUM(CASE WHEN l.dr_cr = 'Dr' THEN l.amount ELSE -l.amount END) AS net_amount
+                    FROM {schema}.{base}_header h
+                    JOIN {schema}.{base}_lines l ON h.id = l.vouch_header_id
+                    JOIN main.account_master am ON l.master_account_id = am.id
+                    WHERE {self._date_key_sql(conn, schema, 'vouch_date')} BETWEEN ? AND ? AND am.group_type = ?
+                    GROUP BY h.id, am.id
+                """)
+        combined_query = "\nUNION ALL\n".join(sub_queries) + " ORDER BY date, vouch_no"
+        return conn.execute(combined_query, [date_key(date_from), date_key(date_to), group_type] * len(sub_queries))
+
+    def get_subsidiary_book_data(self, date_from: str, date_to: str, group_type: str,
+                                 columnar: bool = False) -> List[Tuple] | ResultColumns:
+        """Fetches net Dr(+)/Cr(-) amounts per voucher for every account in a group."""
+        return self._fetch_report(self.iter_subsidiary_book_data(date_from, date_to, group_type), columnar)
+
+    # --- ACCOUNT GROUPS & BALANCES ---
+    # account_master.group_type names a node of the account_groups tree, whose
+    # nature (Asset/Liability/Income/Expense) is inherited from its primary group.
+    # account_group_closure lists every (ancestor, descendant) pair, so any group
+    # total is a single join. Balances come from account_day_totals, which
+    # triggers keep current on every voucher write;
+    # item vouchers post the bill to the party and the contra amounts to the
+    # SYSTEM_ACCOUNTS below.
+    GROUP_NATURES = ('Asset', 'Liability', 'Income', 'Expense')
+    DEFAULT_ACCOUNT_GROUPS = [  # (group, parent, nature), parents first
+        ('Capital Account', None, 'Liability'),
+        ('Reserves & Surplus', 'Capital Account', None),
+        ('Loans (Liability)', None, 'Liability'),
+        ('Bank OD A/c', 'Loans (Liability)', None),
+        ('Secured Loans', 'Loans (Liability)', None),
+        ('Unsecured Loans', 'Loans (Liability)', None),
+        ('Current Liabilities', None, 'Liability'),
+        ('Duties & Taxes', 'Current Liabilities', None),
+        ('Provisions', 'Current Liabilities', None),
+        ('Sundry Creditors', 'Current Liabilities', None),
+        ('Suspense A/c', None, 'Liability'),
+        ('Fixed Assets', None, 'Asset'),
+        ('Investments', None, 'Asset'),
+        ('Current Assets', None, 'Asset'),
+        ('Bank Accounts', 'Current Assets', None),
+        ('Cash-in-Hand', 'Current Assets', None),
+        ('Deposits (Asset)', 'Current Assets', None),
+        ('Loans & Advances (Asset)', 'Current Assets', None),
+        ('Stock-in-Hand', 'Current Assets', None),
+        ('Sundry Debtors', 'Current Assets', None),
+        ('Sales Accounts', None, 'Income'),
+        ('Direct Incomes', None, 'Income'),
+        ('Indirect Incomes', None, 'Income'),
+        ('Purchase Accounts', None, 'Expense'),
+        ('Direct Expenses', None, 'Expense'),
+        ('Indirect Expenses', None, 'Expense'),
+    ]
+    UNFILED_GROUP_PARENT = 'Suspense A/c'  # group_type values not in the tree are filed here
+    SYSTEM_ACCOUNTS = {
+        'sales': ('Sales Account', 'Sales Accounts'),
+        'purchase': ('Purchase Account', 'Purchase Accounts'),
+        'tax': ('GST Account', 'Duties & Taxes'),
+        'profit': ('Profit & Loss A/c', 'Reserves & Surplus'),
+    }
+    # Item voucher contra account: sales and sales returns hit Sales, purchases and purchase returns hit Purchase.
+    ITEM_CONTRA_ACCOUNT = {'sales': 'sales', 'creditnote': 'sales', 'purchase': 'purchase', 'debitnote': 'purchase'}
+
+    def _insert_account_group(self, name: str, parent_name: str = None, nature: str = None) -> int:
+        parent_id = None
+        if parent_name:
+            row = self.cursor.execute("SELECT id, nature FROM account_groups WHERE group_name = ?", (parent_name,)).fetchone()
+            if not row:
+                raise ValueError(f"Parent group '{parent_name}' does not exist.")
+            parent_id, parent_nature = row
+            nature = nature or parent_nature
+        if nature not in self.GROUP_NATURES:
+            raise ValueError(f"Group nature must be one of {', '.join(self.GROUP_NATURES)}.")
+        self.cursor.execute("INSERT INTO account_groups (group_name, parent_id, nature) VALUES (?, ?, ?)",
+                            (name, parent_id, nature))
+        group_id = self.cursor.lastrowid
+        self.cursor.execute("""
+            INSERT INTO account_group_closure (ancestor_id, descendant_id, depth)
+            SELECT ancestor_id, ?, depth + 1 FROM account_group_closure WHERE descendant_id = ?
+            UNION ALL SELECT ?, ?, 0
+        """, (group_id, parent_id, group_id, group_id))
+        return group_id
+
+    def _file_account_group(self, group_name: str):
+        """Adds an unknown group_type to the tree under UNFILED_GROUP_PARENT (no commit)."""
+        if not self.cursor.execute("SELECT 1 FROM account_groups WHERE group_name = ?", (group_name,)).fetchone():
+            self._insert_account_group(group_name, self.UNFILED_GROUP_PARENT)
+
+    def _seed_account_groups(self):
+        """Creates the default tree and system accounts on a new file and files every group_type in use."""
+        if not self.cursor.execute("SELECT 1 FROM account_groups LIMIT 1").fetchone():
+            for name, parent, nature in self.DEFAULT_ACCOUNT_GROUPS:
+                self._insert_account_group(name, parent, nature)
+        self.cursor.executemany("INSERT OR IGNORE INTO account_master (master_name, group_type) VALUES (?, ?)",
+                                self.SYSTEM_ACCOUNTS.values())
+        unfiled = self.cursor.execute("""
+            SELECT group_type FROM account_master
+            WHERE group_type COLLATE NOCASE NOT IN (SELECT group_name FROM account_groups)
+            GROUP BY group_type COLLATE NOCASE
+        """).fetchall()
+        for (group_name,) in unfiled:
+            self._insert_account_group(group_name, self.UNFILED_GROUP_PARENT)
+
+    def add_account_group(self, name: str, parent_name: str = None, nature: str = None) -> int:
+        """Adds a group; sub-groups inherit the parent's nature, primary groups (no parent) need one."""
+        try:
+            group_id = self._insert_account_group(name, parent_name, nature)
+            self.conn.commit()
+            return group_id
+        except sqlite3.IntegrityError:
+            self.conn.rollback()
+            raise ValueError(f"Account group '{name}' already exists.")
+        except ValueError:
+            self.conn.rollback()
+            raise
+
+    def move_account_group(self, name: str, new_parent_name: str) -> bool:
+        """Re-parents a group (and its sub-tree) under new_parent_name, taking on the new parent's nature."""
+        row = self.cursor.execute("SELECT id FROM account_groups WHERE group_name = ?", (name,)).fetchone()
+        parent = self.cursor.execute("SELECT id, nature FROM account_groups WHERE group_name = ?", (new_parent_name,)).fetchone()
+        if not row or not parent:
+            return False
+        group_id, (parent_id, nature) = row[0], parent
+        if self.cursor.execute("SELECT 1 FROM account_group_closure WHERE ancestor_id = ? AND descendant_id = ?",
+                               (group_id, parent_id)).fetchone():
+            raise ValueError(f"Cannot move '{name}' under its own sub-group '{new_parent_name}'.")
+        try:
+            subtree = "SELECT descendant_id FROM account_group_closure WHERE ancestor_id = :group_id"
+            self.cursor.execute(f"""
+                DELETE FROM account_group_closure
+                WHERE descendant_id IN ({subtree}) AND ancestor_id NOT IN ({subtree})
+            """, {'group_id': group_id})
+            self.cursor.execute("""
+                INSERT INTO account_group_closure (ancestor_id, descendant_id, depth)
+                SELECT up.ancestor_id, down.descendant_id, up.depth + down.depth + 1
+                FROM account_group_closure up, account_group_closure down
+                WHERE up.descendant_id = :parent_id AND down.ancestor_id = :group_id
+            """, {'parent_id': parent_id, 'group_id': group_id})
+            self.cursor.execute("UPDATE account_groups SET parent_id = ? WHERE id = ?", (parent_id, group_id))
+            self.cursor.execute(f"UPDATE account_groups SET nature = :nature WHERE id IN ({subtree})",
+                                {'nature': nature, 'group_id': group_id})
+            self.conn.commit()
+            return True
+        except Exception as e:
+            self.conn.rollback()
+            raise ValueError(f"DB Error moving account group '{name}': {e}")
+
+    def get_account_group_tree(self) -> List[Tuple]:
+        """(id, group_name, parent_id, nature, depth) for every group, parents before children."""
+        rows = self.cursor.execute("""
+            SELECT g.id, g.group_name, g.parent_id, g.nature,
+                   (SELECT MAX(depth) FROM account_group_closure WHERE descendant_id = g.id) AS depth
+            FROM account_groups g ORDER BY g.id
+        """).fetchall()
+        children = {}
+        for row in rows:
+            children.setdefault(row[2], []).append(row)
+        ordered = []
+        stack = list(reversed(children.get(None, [])))
+        while stack:
+            row = stack.pop()
+            ordered.append(row)
+            stack.extend(reversed(children.get(row[0], [])))
+        return ordered
+
+    # Posting generators: SELECTs of (account_id, day, dr, cr) used by the
+    # triggers (ref = NEW/OLD, no source) and by rebuild_account_totals /
+    # pre-totals archives (ref = a table alias, source = FROM ... clause).
+    def _line_postings(self, ref: str, day: str, source: str, sign: int = 1) -> str:
+        return f"""
+            SELECT {ref}.master_account_id AS account_id, {day} AS day,
+                   CASE WHEN {ref}.dr_cr = 'Dr' THEN {sign} * {ref}.amount ELSE 0 END AS dr,
+                   CASE WHEN {ref}.dr_cr = 'Cr' THEN {sign} * {ref}.amount ELSE 0 END AS cr
+            {source}"""
+
+    def _item_postings(self, base: str, ref: str, day: str, source: str = '', sign: int = 1, master: str = '') -> str:
+        party_dr = self.PARTY_POSTING_SIGN[base] > 0
+        system_id = lambda key: f"(SELECT id FROM {master}account_master WHERE master_name = '{self.SYSTEM_ACCOUNTS[key][0]}')"
+        legs = [
+            (f"{ref}.party_mas_id", f"COALESCE({ref}.final_bill_amt, 0)", party_dr),
+            (system_id(self.ITEM_CONTRA_ACCOUNT[base]),
+             f"COALESCE({ref}.final_bill_amt, 0) - COALESCE({ref}.total_tax_amt, 0)", not party_dr),
+            (system_id('tax'), f"COALESCE({ref}.total_tax_amt, 0)", not party_dr),
+        ]
+        return " UNION ALL ".join(f"""
+            SELECT {account} AS account_id, {day} AS day,
+                   {f'{sign} * ({amount})' if is_dr else 0} AS dr, {0 if is_dr else f'{sign} * ({amount})'} AS cr
+            {source}""" for account, amount, is_dr in legs)
+
+    def _account_postings_sql(self, schema: str) -> str:
+        """Every posting in a schema, for rebuilding totals or reading archives closed before totals existed."""
+        master = 'main.' if schema != 'main' else ''
+        parts = [self._line_postings('l', 'h.vouch_date', f"FROM {schema}.{base}_header h JOIN {schema}.{base}_lines l ON h.id = l.vouch_header_id")
+                 for base in self.ACCOUNT_VOUCH_BASES.values()]
+        parts += [self._item_postings(base, 'h', 'h.trans_date', f"FROM {schema}.{base}_header h", master=master)
+                  for base in self.ITEM_VOUCH_BASES.values()]
+        return " UNION ALL ".join(parts)
+
+    @staticmethod
+    def _totals_upsert(postings: str) -> str:
+        """
+        Trigger statements adding the (account_id, day, dr, cr) rows of postings to
+        account_day_totals: the day row (created with the previous day's balance if
+        new) and the running balance of every later day of the same account.
+        """
+        delta = f"SELECT account_id, day, SUM(dr) AS dr, SUM(cr) AS cr FROM ({postings}) WHERE account_id IS NOT NULL GROUP BY account_id, day"
+        return f"""
+            INSERT INTO account_day_totals (account_id, day, dr, cr, balance)
+                SELECT p.account_id, p.day, p.dr, p.cr,
+                       COALESCE((SELECT t.balance FROM account_day_totals t WHERE t.account_id = p.account_id AND t.day < p.day
+                                 ORDER BY t.day DESC LIMIT 1), 0) + p.dr - p.cr
+                FROM ({delta}) p WHERE true
+                ON CONFLICT (account_id, day) DO UPDATE SET
+                    dr = dr + excluded.dr, cr = cr + excluded.cr, balance = balance + excluded.dr - excluded.cr;
+            UPDATE account_day_totals SET balance = balance + p.dr - p.cr
+                FROM ({delta}) p
+                WHERE account_day_totals.account_id = p.account_id AND account_day_totals.day > p.day;"""
+
+    def _create_balance_triggers(self):
+        triggers = {}
+        for base in self.ACCOUNT_VOUCH_BASES.values():
+            header = f"FROM {base}_header h WHERE h.id = {{ref}}.vouch_header_id"
+            lines = f"FROM {base}_lines l WHERE l.vouch_header_id = {{ref}}.id"
+            triggers[f"{base}_lines_totals_ai", f"AFTER INSERT ON {base}_lines"] = \
+                self._totals_upsert(self._line_postings('NEW', 'h.vouch_date', header.format(ref='NEW')))
+            triggers[f"{base}_lines_totals_ad", f"AFTER DELETE ON {base}_lines"] = \
+                self._totals_upsert(self._line_postings('OLD', 'h.vouch_date', header.format(ref='OLD'), -1))
+            triggers[f"{base}_lines_totals_au", f"AFTER UPDATE ON {base}_lines"] = \
+                self._totals_upsert(self._line_postings('OLD', 'h.vouch_date', header.format(ref='OLD'), -1)) + \
+                self._totals_upsert(self._line_postings('NEW', 'h.vouch_date', header.format(ref='NEW')))
+            # Deleting a header takes its lines out of the totals (lines deleted afterwards find no header).
+            triggers[f"{base}_header_totals_bd", f"BEFORE DELETE ON {base}_header"] = \
+                self._totals_upsert(self._line_postings('l', 'OLD.vouch_date', lines.format(ref='OLD'), -1))
+            triggers[f"{base}_header_totals_au", f"AFTER UPDATE OF vouch_date ON {base}_header"] = \
+                self._totals_upsert(self._line_postings('l', 'OLD.vouch_date', lines.format(ref='OLD'), -1)) + \
+                self._totals_upsert(self._line_postings('l', 'NEW.vouch_date', lines.format(ref='OLD')))
+        for base in self.ITEM_VOUCH_BASES.values():
+            triggers[f"{base}_header_totals_ai", f"AFTER INSERT ON {base}_header"] = \
+                self._totals_upsert(self._item_postings(base, 'NEW', 'NEW.trans_date'))
+            triggers[f"{base}_header_totals_ad", f"AFTER DELETE ON {base}_header"] = \
+                self._totals_upsert(self._item_postings(base, 'OLD', 'OLD.trans_date', sign=-1))
+            triggers[f"{base}_header_totals_au", f"AFTER UPDATE ON {base}_header"] = \
+                self._totals_upsert(self._item_postings(base, 'OLD', 'OLD.trans_date', sign=-1)) + \
+                self._totals_upsert(self._item_postings(base, 'NEW', 'NEW.trans_date'))
+        for (name, event), body in triggers.items():
+            self.cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{name} {event} FOR EACH ROW BEGIN {body} END")
+
+    def rebuild_account_totals(self, commit: bool = True):
+        """Recomputes account_day_totals from the vouchers in the live file."""
+        self.cursor.execute("DELETE FROM account_day_totals")
+        self.cursor.execute(f"""
+            INSERT INTO account_day_totals (account_id, day, dr, cr, balance)
+            SELECT account_id, day, SUM(dr), SUM(cr),
+                   SUM(SUM(dr) - SUM(cr)) OVER (PARTITION BY account_id ORDER BY day)
+            FROM ({self._account_postings_sql('main')})
+            WHERE account_id IS NOT NULL GROUP BY account_id, day
+        """)
+        if commit:
+            self.conn.commit()
+
+    def _period_totals_sql(self, conn: sqlite3.Connection, schema: str, natures=None, closing: bool = False,
+                           subtree: bool = False, bounds: Tuple[str, str] = (':date_from', ':date_to')) -> str:
+        """
+        SELECT of (account_id, amount): each account's net movement (Dr +, Cr -)
+        from :date_from to :date_to in one schema - two running-balance lookups per
+        account - or, if closing, its opening balance in that schema plus everything
+        up to :date_to (one lookup). Optionally only accounts of some natures, or
+        (subtree) only accounts filed under the group :group_id. bounds renames the
+        two date parameters, for embedding next to another date range.
+        """
+        date_from, date_to = bounds
+        accounts = "main.account_master am"
+        opening = "am"
+        if schema != 'main':
+            accounts += f" LEFT JOIN {schema}.account_master o ON o.id = am.id"
+            opening = "o"
+        if natures or subtree:
+            accounts += " JOIN main.account_groups g ON g.group_name = am.group_type"
+        if subtree:
+            accounts += " JOIN main.account_group_closure sub ON sub.descendant_id = g.id AND sub.ancestor_id = :group_id"
+        if natures:
+            accounts += f""" WHERE g.nature IN ({', '.join(f"'{n}'" for n in natures)})"""
+        opening_amount = f"COALESCE(CASE WHEN {opening}.ob_type = 'Cr' THEN -{opening}.opening_balance ELSE {opening}.opening_balance END, 0)"
+
+        if not conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = 'account_day_totals'").fetchone():
+            # archive closed before the totals table existed
+            movement = f"""
+                SELECT account_id, dr - cr AS amount FROM ({self._account_postings_sql(schema)})
+                WHERE account_id IS NOT NULL AND day BETWEEN {date_from} AND {date_to}"""
+            if closing:
+                movement += f" UNION ALL SELECT am.id, {opening_amount} FROM {accounts}"
+            return movement
+
+        balance_at = lambda op, bound: f"""COALESCE((SELECT t.balance FROM {schema}.account_day_totals t
+            WHERE t.account_id = am.id AND t.day {op} {bound} ORDER BY t.day DESC LIMIT 1), 0)"""
+        if closing:
+            amount = f"{opening_amount} + {balance_at('<=', date_to)}"
+        else:
+            amount = f"{balance_at('<=', date_to)} - {balance_at('<', date_from)}"
+        return f"SELECT am.id AS account_id, {amount} AS amount FROM {accounts}"
+
+    def _statement_rows(self, conn: sqlite3.Connection, balances: str, params: dict, natures,
+                        detailed: bool = False) -> List[StatementRow]:
+        """Group totals (through the closure table) for the given natures, in tree order; detailed adds the accounts."""
+        natures_sql = ', '.join(f"'{n}'" for n in natures)
+        accounts = "" if not detailed else """
+                UNION ALL
+                SELECT 'A', id, master_name, group_id, nature, NULL, amount FROM acct WHERE round(amount, 2) != 0"""
+        query = f"""
+            WITH bal AS (
+                SELECT account_id, SUM(amount) AS amount FROM ({balances}) GROUP BY account_id
+            ),
+            acct AS (
+                SELECT am.id, am.master_name, g.id AS group_id, g.nature, bal.amount
+                FROM bal
+                JOIN main.account_master am ON am.id = bal.account_id
+                JOIN main.account_groups g ON g.group_name = am.group_type
+                WHERE g.nature IN ({natures_sql})
+            )
+            SELECT * FROM (
+                SELECT 'G' AS kind, g.id AS id, g.group_name AS name, g.parent_id, g.nature,
+                       (SELECT MAX(depth) FROM main.account_group_closure WHERE descendant_id = g.id), SUM(acct.amount)
+                FROM acct
+                JOIN main.account_group_closure c ON c.descendant_id = acct.group_id
+                JOIN main.account_groups g ON g.id = c.ancestor_id
+                GROUP BY g.id{accounts}
+            ) ORDER BY kind DESC, CASE WHEN kind = 'G' THEN id END, name
+        """
+        children, depths = {}, {}
+        for row in conn.execute(query, params):
+            if row[0] == 'G':
+                depths[row[1]] = row[5]
+            children.setdefault(row[3], []).append(row)
+        ordered = []
+        stack = children.get(None, [])[::-1]
+        while stack:
+            kind, row_id, name, parent_id, nature, depth, amount = stack.pop()
+            if kind == 'G':
+                stack.extend(children.get(row_id, [])[::-1])
+            else:
+                depth = depths[parent_id] + 1
+            ordered.append(StatementRow(kind, row_id, name, parent_id, nature, depth, amount))
+        # Drop groups that net to zero and have nothing shown under them.
+        shown, needed = [], set()
+        for row in reversed(ordered):
+            if row.kind == 'A' or round(row.amount, 2) or row.id in needed:
+                shown.append(row)
+                needed.add(row.parent_id)
+        return shown[::-1]
+
+    def get_profit_and_loss(self, date_from: str, date_to: str, detailed: bool = False) -> List[StatementRow]:
+        """Income and Expense groups (and accounts if detailed) with their movement (Dr +, Cr -) in the date range."""
+        conn = self._report_conn()
+        params = {'date_from': date_from, 'date_to': date_to}
+        natures = ('Income', 'Expense')
+        balances = " UNION ALL ".join(self._period_totals_sql(conn, schema, natures)
+                                      for schema in self._voucher_sources(conn, date_from, date_to))
+        return self._statement_rows(conn, balances, params, natures, detailed)
+
+    def _year_schema(self, conn: sqlite3.Connection, as_of: str) -> str:
+        """Schema of the year holding as_of, whose opening balances plus vouchers up to as_of give the closing position."""
+        for archive_id, path, a_from, a_to in self._archives:
+            if as_of <= a_to:
+                return self._attach_archive(conn, archive_id, path)
+        return 'main'
+
+    def _opening_balances_sql(self, conn: sqlite3.Connection, date_from: str) -> Tuple[str, dict]:
+        """
+        SELECT of (account_id, amount) for each account's balance (Dr +, Cr -) as
+        the day date_from begins, and its parameters: the opening balances of the
+        year holding date_from plus that year's postings before it. After a close
+        the new year's opening balances are the carried-forward ones, with the
+        Income/Expense balances moved to Profit & Loss A/c, so this is not the
+        closing position of the day before when date_from starts a year.
+        """
+        start = datetime.date.fromisoformat(date_from)
+        opening_to = (start - datetime.timedelta(days=1)).isoformat() if start > datetime.date.min else '0000-12-31'
+        balances = self._period_totals_sql(conn, self._year_schema(conn, date_from), closing=True,
+                                           bounds=(':opening_from', ':opening_to'))
+        return balances, {'opening_from': '0001-01-01', 'opening_to': opening_to}
+
+    def get_balance_sheet(self, as_of: str, detailed: bool = False) -> List[StatementRow]:
+        """
+        Asset and Liability groups (and accounts if detailed) with their closing balance (Dr +, Cr -)
+        as of the date, plus a 'P' row carrying the Income/Expense balances of the
+        year, i.e. the profit (Cr) or loss (Dr) not yet closed to capital.
+        """
+        conn = self._report_conn()
+        schema = self._year_schema(conn, as_of)
+        params = {'date_from': '0001-01-01', 'date_to': as_of}
+        balances = self._period_totals_sql(conn, schema, closing=True)
+        rows = self._statement_rows(conn, balances, params, self.GROUP_NATURES, detailed)
+        profit = sum(row.amount for row in rows if row.kind == 'G' and row.parent_id is None and row.nature in ('Income', 'Expense'))
+        rows = [row for row in rows if row.nature in ('Asset', 'Liability')]
+        rows.append(StatementRow('P', None, self.SYSTEM_ACCOUNTS['profit'][0], None, 'Liability', 0, profit))
+        return rows
+
+    def get_trial_balance_level(self, as_of: str, group_id: int = None) -> List[StatementRow]:
+        """
+        One level of the trial balance tree as on a date: the sub-groups of group_id
+        (the primary groups if None) with their closing balances (Dr +, Cr -), then
+        the accounts filed directly under it. Only the subtree's accounts are
+        evaluated and accounts with a nil balance are left out, so expanding a
+        group costs in proportion to its size.
+        """
+        conn = self._report_conn()
+        schema = self._year_schema(conn, as_of)
+        params = {'date_from': '0001-01-01', 'date_to': as_of, 'group_id': group_id}
+        balances = self._period_totals_sql(conn, schema, closing=True, subtree=group_id is not None)
+        query = f"""
+            WITH bal AS (
+                SELECT account_id, SUM(amount) AS amount FROM ({balances}) GROUP BY account_id
+            ),
+            acct AS (
+                SELECT am.id, am.master_name, g.id AS group_id, g.nature, bal.amount
+                FROM bal
+                JOIN main.account_master am ON am.id = bal.account_id
+                JOIN main.account_groups g ON g.group_name = am.group_type
+                WHERE round(bal.amount, 2) != 0
+            )
+            SELECT 'G', g.id, g.group_name, g.parent_id, g.nature,
+                   (SELECT MAX(depth) FROM main.account_group_closure WHERE descendant_id = g.id), SUM(acct.amount)
+            FROM main.account_groups g
+            JOIN main.account_group_closure c ON c.ancestor_id = g.id
+            JOIN acct ON acct.group_id = c.descendant_id
+            WHERE g.parent_id IS :group_id
+            GROUP BY g.id
+            UNION ALL
+            SELECT 'A', id, master_name, group_id, nature,
+                   (SELECT MAX(depth) + 1 FROM main.account_group_closure WHERE descendant_id = :group_id), amount
+            FROM acct WHERE group_id = :group_id
+            ORDER BY 1 DESC, 3
+        """
+        return [StatementRow(*row) for row in conn.execute(query, params)]
+
+    def iter_trial_balance_tree(self, as_of: str) -> sqlite3.Cursor:
+        """
+        Streams (kind, level, particulars, debit, credit): the whole trial balance
+        tree as on a date, fully expanded in the order TrialBalanceModel shows it
+        (at each level the sub-groups, then the accounts, by name), with the same
+        closing balances as get_trial_balance_level. For export.
+        """
+        conn = self._report_conn()
+        schema = self._year_schema(conn, as_of)
+        params = {'date_from': '0001-01-01', 'date_to': as_of}
+        balances = self._period_totals_sql(conn, schema, closing=True)
+        # path sorts a node right after its parent; char(1) sorts below any character of a name
+        query = f"""
+            WITH RECURSIVE bal AS (
+                SELECT account_id, SUM(amount) AS amount FROM ({balances}) GROUP BY account_id
+            ),
+            acct AS (
+                SELECT am.id, am.master_name, g.id AS group_id, bal.amount
+                FROM bal
+                JOIN main.account_master am ON am.id = bal.account_id
+                JOIN main.account_groups g ON g.group_name = am.group_type
+                WHERE round(bal.amount, 2) != 0
+            ),
+            grp AS (
+                SELECT g.id, g.group_name, g.parent_id, SUM(acct.amount) AS amount
+                FROM main.account_groups g
+                JOIN main.account_group_closure c ON c.ancestor_id = g.id
+                JOIN acct ON acct.group_id = c.descendant_id
+                GROUP BY g.id
+            ),
+            tree AS (
+                SELECT id, group_name, 0 AS level, amount, char(1) || '0' || group_name AS path
+                FROM grp WHERE parent_id IS NULL
+                UNION ALL
+                SELECT grp.id, grp.group_name, tree.level + 1, grp.amount, tree.path || char(1) || '0' || grp.group_name
+                FROM grp JOIN tree ON grp.parent_id = tree.id
+            )
+            SELECT kind, level, particulars,
+                   CASE WHEN round(amount, 2) > 0 THEN amount END AS debit,
+                   CASE WHEN round(amount, 2) < 0 THEN -amount END AS credit
+            FROM (
+                SELECT 'G' AS kind, level, group_name AS particulars, amount, path FROM tree
+                UNION ALL
+                SELECT 'A', tree.level + 1, acct.master_name, acct.amount, tree.path || char(1) || '1' || acct.master_name
+                FROM acct JOIN tree ON tree.id = acct.group_id
+            )
+            ORDER BY path
+        """
+        return conn.execute(query, params)
+
+    # --- GST SUMMARY ---
+    # gst_month_totals holds one row per month, direction, HSN and rate. Credit
+    # notes (sales returns) are netted into Outward and debit notes (purchase
+    # returns) into Inward. The rate is the line's own tax_amt / taxable_amt, to
+    # two decimals. Triggers on the line tables keep it current, as
+    # account_day_totals is kept above.
+    GST_DIRECTION = {'sales': ('Outward', 1), 'creditnote': ('Outward', -1),
+                     'purchase': ('Inward', 1), 'debitnote': ('Inward', -1)}
+
+    def _gst_line_rows(self, base: str, ref: str, day: str, source: str, sign: int = 1) -> str:
+        """SELECT of (month, direction, hsn_code, rate, qty, taxable_amt, tax_amt) for item voucher lines."""
+        direction, base_sign = self.GST_DIRECTION[base]
+        sign *= base_sign
+        return f"""
+            SELECT substr({day}, 1, 7) AS month, '{direction}' AS direction, COALESCE({ref}.hsn_code, '') AS hsn_code,
+                   CASE WHEN {ref}.taxable_amt != 0 THEN round(100.0 * {ref}.tax_amt / {ref}.taxable_amt, 2) ELSE 0 END AS rate,
+                   {sign} * COALESCE({ref}.qty, 0) AS qty, {sign} * COALESCE({ref}.taxable_amt, 0) AS taxable_amt,
+                   {sign} * COALESCE({ref}.tax_amt, 0) AS tax_amt
+            {source}"""
+
+    def _gst_lines_sql(self, schema: str) -> str:
+        """Every item voucher line in a schema, for rebuilding gst_month_totals or reading older archives."""
+        return " UNION ALL ".join(
+            self._gst_line_rows(base, 'l', 'h.trans_date', f"FROM {schema}.{base}_header h JOIN {schema}.{base}_lines l ON h.id = l.trans_header_id")
+            for base in self.ITEM_VOUCH_BASES.values())
+
+    @staticmethod
+    def _gst_upsert(rows: str) -> str:
+        return f"""
+            INSERT INTO gst_month_totals (month, direction, hsn_code, rate, qty, taxable_amt, tax_amt)
+                SELECT month, direction, hsn_code, rate, SUM(qty), SUM(taxable_amt), SUM(tax_amt)
+                FROM ({rows}) WHERE month IS NOT NULL GROUP BY month, direction, hsn_code, rate
+                ON CONFLICT (month, direction, hsn_code, rate) DO UPDATE SET
+                    qty = qty + excluded.qty, taxable_amt = taxable_amt + excluded.taxable_amt, tax_amt = tax_amt + excluded.tax_amt;"""
+
+    def _create_gst_triggers(self):
+        triggers = {}
+        for base in self.ITEM_VOUCH_BASES.values():
+            header = f"FROM {base}_header h WHERE h.id = {{ref}}.trans_header_id"
+            lines = f"FROM {base}_lines l WHERE l.trans_header_id = {{ref}}.id"
+            triggers[f"{base}_lines_gst_ai", f"AFTER INSERT ON {base}_lines"] = \
+                self._gst_upsert(self._gst_line_rows(base, 'NEW', 'h.trans_date', header.format(ref='NEW')))
+            triggers[f"{base}_lines_gst_ad", f"AFTER DELETE ON {base}_lines"] = \
+                self._gst_upsert(self._gst_line_rows(base, 'OLD', 'h.trans_date', header.format(ref='OLD'), -1))
+            triggers[f"{base}_lines_gst_au", f"AFTER UPDATE ON {base}_lines"] = \
+                self._gst_upsert(self._gst_line_rows(base, 'OLD', 'h.trans_date', header.format(ref='OLD'), -1)) + \
+                self._gst_upsert(self._gst_line_rows(base, 'NEW', 'h.trans_date', header.format(ref='NEW')))
+            # Deleting a header takes its lines out of the totals (lines deleted afterwards find no header).
+            triggers[f"{base}_header_gst_bd", f"BEFORE DELETE ON {base}_header"] = \
+                self._gst_upsert(self._gst_line_rows(base, 'l', 'OLD.trans_date', lines.format(ref='OLD'), -1))
+            triggers[f"{base}_header_gst_au", f"AFTER UPDATE OF trans_date ON {base}_header"] = \
+                self._gst_upsert(self._gst_line_rows(base, 'l', 'OLD.trans_date', lines.format(ref='OLD'), -1)) + \
+                self._gst_upsert(self._gst_line_rows(base, 'l', 'NEW.trans_date', lines.format(ref='OLD')))
+        for (name, event), body in triggers.items():
+            self.cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{name} {event} FOR EACH ROW BEGIN {body} END")
+
+    def rebuild_gst_totals(self, commit: bool = True):
+        """Recomputes gst_month_totals from the item vouchers in the live file."""
+        self.cursor.execute("DELETE FROM gst_month_totals")
+        self.cursor.execute(self._gst_upsert(self._gst_lines_sql('main')))
+        if commit:
+            self.conn.commit()
+
+    def iter_gst_summary(self, date_from: str, date_to: str, by: str = 'hsn') -> sqlite3.Cursor:
+        """
+        Streams (month, direction, hsn_code, rate, qty, taxable_amt, tax_amt) for the
+        months from date_from to date_to, HSN and rate-wise (by='hsn') or rate-wise
+        only (by='rate', hsn_code NULL). Whole months are reported.
+        """
+        if by not in ('hsn', 'rate'):
+            raise ValueError("GST summary must be by 'hsn' or 'rate'.")
+        conn = self._report_conn()
+        sources = []
+        for schema in self._voucher_sources(conn, date_from, date_to):
+            if conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = 'gst_month_totals'").fetchone():
+                sources.append(f"SELECT * FROM {schema}.gst_month_totals")
+            else:  # archive closed before the GST totals existed
+                sources.append(self._gst_lines_sql(schema))
+        hsn = "hsn_code" if by == 'hsn' else "NULL"
+        query = f"""
+            SELECT month, direction, {hsn} AS hsn_code, rate,
+                   SUM(qty) AS qty, SUM(taxable_amt) AS taxable_amt, SUM(tax_amt) AS tax_amt
+            FROM ({" UNION ALL ".join(sources)})
+            WHERE month BETWEEN ? AND ?
+            GROUP BY month, direction, {hsn}, rate
+            HAVING round(SUM(taxable_amt), 2) != 0 OR round(SUM(tax_amt), 2) != 0
+            ORDER BY month, direction DESC, {hsn}, rate
+        """
+        return conn.execute(query, (date_from[:7], date_to[:7]))
+
+    def get_gst_summary(self, date_from: str, date_to: str, by: str = 'hsn',
+                        columnar: bool = False) -> List[Tuple] | ResultColumns:
+        """Fetches the monthly GST summary (Outward/Inward, HSN and rate-wise or rate-wise)."""
+        return self._fetch_report(self.iter_gst_summary(date_from, date_to, by), columnar)
+
+    # --- PERIOD ANALYSIS ---
+    # Period analysis reads the running balance of account_day_totals at each
+    # month end - one index seek per account and month, however many postings
+    # there are - and leaves the differencing into monthly movement to NumPy
+    # (period_matrix.build_period_matrix); archives closed before the totals
+    # existed sum their postings up to each month end instead. The opening
+    # balance is the position as the range begins in the year holding its first
+    # day (see _opening_balances_sql), so a range starting a year opens with the
+    # balances carried forward by its close. Income and Expense accounts run on
+    # across a year-end inside the range: their transfer to profit is not a
+    # posting.
+
+    def _period_accounts(self, conn: sqlite3.Connection, group_name: str = None) -> Tuple[str, Optional[int]]:
+        """SELECT of the account_id of every account, or of those filed under a group (:group_id), and the group id."""
+        if group_name is None:
+            return "SELECT id AS account_id FROM main.account_master", None
+        row = conn.execute("SELECT id FROM main.account_groups WHERE group_name = ?", (group_name,)).fetchone()
+        if row is None:
+            raise ValueError(f"Account group '{group_name}' not found.")
+        return """
+            SELECT am.id AS account_id FROM main.account_master am
+            JOIN main.account_groups g ON g.group_name = am.group_type
+            JOIN main.account_group_closure c ON c.descendant_id = g.id AND c.ancestor_id = :group_id""", row[0]
+
+    def _period_balances_sql(self, conn: sqlite3.Connection, date_from: str, date_to: str, accounts: str) -> str:
+        """
+        SELECT of (account_id, month_no, balance): per year file, each account's
+        net postings (Dr +, Cr -) in that file up to the day before date_from
+        (month_no of date_from less one) and up to the end of each month of the
+        range, the last one ending at date_to. Accounts with nothing posted in a
+        file by a month end may have no row for it.
+        """
+        first, last = month_index(date_key(date_from)), month_index(date_key(date_to))
+        opening_to = (datetime.date.fromisoformat(date_from) - datetime.timedelta(days=1)).isoformat()
+        bounds = [(first - 1, opening_to)] + [(m, f"{m // 12:04d}-{m % 12 + 1:02d}-31") for m in range(first, last)] + [(last, date_to)]
+        bounds_sql = " UNION ALL ".join(f"SELECT {m} AS month_no, '{day}' AS last_day" for m, day in bounds)
+        parts = []
+        for schema in self._voucher_sources(conn, date_from, date_to):
+            if conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = 'account_day_totals'").fetchone():
+                parts.append(f"""
+                    SELECT a.account_id, b.month_no,
+                           COALESCE((SELECT t.balance FROM {schema}.account_day_totals t
+                                     WHERE t.account_id = a.account_id AND t.day <= b.last_day ORDER BY t.day DESC LIMIT 1), 0) AS balance
+                    FROM ({accounts}) a CROSS JOIN ({bounds_sql}) b""")
+            else:  # archive closed before the totals existed
+                parts.append(f"""
+                    SELECT p.account_id, b.month_no, SUM(p.dr - p.cr) AS balance
+                    FROM ({self._account_postings_sql(schema)}) p JOIN ({bounds_sql}) b ON p.day <= b.last_day
+                    WHERE p.account_id IN ({accounts})
+                    GROUP BY p.account_id, b.month_no""")
+        return " UNION ALL ".join(parts)
+
+    def iter_period_balances(self, date_from, date_to, group_name: str = None) -> sqlite3.Cursor:
+        """
+        Streams (account_id, month_no, balance) for period analysis: the opening
+        balance of every account as date_from begins (month_no 0),
+        then the month-end rows of _period_balances_sql, month_no counting months
+        from January of year 0 (see period_matrix.month_index). Optionally only
+        the accounts filed under a group.
+        """
+        date_from, date_to = date_key_to_iso(date_key(date_from)), date_key_to_iso(date_key(date_to))
+        conn = self._report_conn()
+        accounts, group_id = self._period_accounts(conn, group_name)
+        openings, params = self._opening_balances_sql(conn, date_from)
+        query = f"""
+            SELECT account_id, 0 AS month_no, SUM(amount) AS balance FROM ({openings})
+            WHERE account_id IN ({accounts}) GROUP BY account_id
+            UNION ALL
+            {self._period_balances_sql(conn, date_from, date_to, accounts)}
+        """
+        params['group_id'] = group_id
+        return conn.execute(query, params)
+
+    def get_period_balances(self, date_from, date_to, group_name: str = None,
+                            columnar: bool = False) -> List[Tuple] | ResultColumns:
+        """Fetches the period analysis rows; columnar=True gives the NumPy-ready form build_period_matrix takes."""
+        return self._fetch_report(self.iter_period_balances(date_from, date_to, group_name), columnar)
+
+    def iter_period_movements(self, date_from, date_to, group_name: str = None) -> sqlite3.Cursor:
+        """Streams (account, month, movement) - the period analysis in long form, for export."""
+        date_from, date_to = date_key_to_iso(date_key(date_from)), date_key_to_iso(date_key(date_to))
+        conn = self._report_conn()
+        accounts, group_id = self._period_accounts(conn, group_name)
+        query = f"""
+            SELECT am.master_name AS account, printf('%04d-%02d', p.month_no / 12, p.month_no % 12 + 1) AS month, p.movement
+            FROM (
+                SELECT account_id, month_no, balance - LAG(balance, 1, 0) OVER (PARTITION BY account_id ORDER BY month_no) AS movement
+                FROM (SELECT account_id, month_no, SUM(balance) AS balance
+                      FROM ({self._period_balances_sql(conn, date_from, date_to, accounts)}) GROUP BY account_id, month_no)
+            ) p
+            JOIN main.account_master am ON am.id = p.account_id
+            WHERE p.month_no >= {month_index(date_key(date_from))} AND round(p.movement, 2) != 0
+            ORDER BY am.master_name, p.month_no
+        """
+        return conn.execute(query, {'group_id': group_id})
+
+    # --- CASH / BANK BOOK ---
+    # account_day_totals is the daily balance table: the voucher triggers keep
+    # one row per account and day with its receipts (dr), payments (cr) and the
+    # running balance, so the cash book is a range read per cash/bank account and
+    # any day's cash position one index seek per account. Archives closed before
+    # the totals existed replay their postings instead.
+    CASH_BANK_GROUPS = ('Cash-in-Hand', 'Bank Accounts')
+
+    def _cash_bank_accounts_sql(self) -> str:
+        """SELECT of the account_id of every account filed under the cash and bank groups."""
+        return f"""
+            SELECT am.id AS account_id FROM main.account_master am
+            JOIN main.account_groups g ON g.group_name = am.group_type
+            JOIN main.account_group_closure c ON c.descendant_id = g.id
+            JOIN main.account_groups top ON top.id = c.ancestor_id
+            WHERE top.group_name IN ({', '.join(f"'{name}'" for name in self.CASH_BANK_GROUPS)})"""
+
+    def iter_cash_bank_book(self, date_from, date_to) -> sqlite3.Cursor:
+        """
+        Streams (account, date, receipts, payments, balance) for every cash and
+        bank account: an opening row (date NULL, balance as of the day before
+        date_from), then one row per day with entries up to date_to, carrying
+        the day's receipts (Dr), payments (Cr) and closing balance (Dr +, Cr -).
+        """
+        date_from, date_to = date_key_to_iso(date_key(date_from)), date_key_to_iso(date_key(date_to))
+        conn = self._report_conn()
+        accounts = self._cash_bank_accounts_sql()
+        opening_to = (datetime.date.fromisoformat(date_from) - datetime.timedelta(days=1)).isoformat()
+        openings = self._period_totals_sql(conn, self._year_schema(conn, opening_to), closing=True,
+                                           bounds=(':opening_from', ':opening_to'))
+        sub_queries = [f"""
+            SELECT account_id, NULL AS day, NULL AS dr, NULL AS cr, SUM(amount) AS balance FROM ({openings})
+            WHERE account_id IN ({accounts}) GROUP BY account_id"""]
+        for schema in self._voucher_sources(conn, date_from, date_to):
+            opening = "COALESCE(CASE WHEN o.ob_type = 'Cr' THEN -o.opening_balance ELSE o.opening_balance END, 0)"
+            if conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = 'account_day_totals'").fetchone():
+                days = f"""
+                    SELECT t.account_id, t.day, t.dr, t.cr, {opening} + t.balance AS balance
+                    FROM ({accounts}) a
+                    JOIN {schema}.account_day_totals t ON t.account_id = a.account_id AND t.day BETWEEN :date_from AND :date_to
+                    LEFT JOIN {schema}.account_master o ON o.id = t.account_id"""
+            else:  # archive closed before the totals existed
+                days = f"""
+                    SELECT * FROM (
+                        SELECT p.account_id, p.day, p.dr, p.cr,
+                               {opening} + SUM(p.dr - p.cr) OVER (PARTITION BY p.account_id ORDER BY p.day) AS balance
+                        FROM (SELECT account_id, day, SUM(dr) AS dr, SUM(cr) AS cr FROM ({self._account_postings_sql(schema)})
+                              WHERE account_id IN ({accounts}) GROUP BY account_id, day) p
+                        LEFT JOIN {schema}.account_master o ON o.id = p.account_id)
+                    WHERE day BETWEEN :date_from AND :date_to"""
+            sub_queries.append(f"SELECT * FROM ({days}) WHERE round(dr, 2) != 0 OR round(cr, 2) != 0")
+        query = f"""
+            SELECT am.master_name AS account, b.day AS date, b.dr AS receipts, b.cr AS payments, b.balance
+            FROM ({" UNION ALL ".join(sub_queries)}) b
+            JOIN main.account_master am ON am.id = b.account_id
+            ORDER BY am.master_name, b.day
+        """
+        params = {'date_from': date_from, 'date_to': date_to, 'opening_from': '0001-01-01', 'opening_to': opening_to}
+        return conn.execute(query, params)
+
+    def get_cash_bank_book(self, date_from, date_to, columnar: bool = False) -> List[Tuple] | ResultColumns:
+        """Fetches the day-wise cash/bank book of every cash and bank account."""
+        return self._fetch_report(self.iter_cash_bank_book(date_from, date_to), columnar)
+
+    def get_cash_bank_position(self, as_of) -> Dict[str, float]:
+        """Closing balance (Dr +, Cr -) of every cash and bank account as of a date, by account name."""
+        as_of = date_key_to_iso(date_key(as_of))
+        conn = self._report_conn()
+        balances = self._period_totals_sql(conn, self._year_schema(conn, as_of), closing=True)
+        query = f"""
+            SELECT am.master_name, SUM(b.amount) FROM ({balances}) b
+            JOIN main.account_master am ON am.id = b.account_id
+            WHERE b.account_id IN ({self._cash_bank_accounts_sql()})
+            GROUP BY am.id ORDER BY am.master_name
+        """
+        return {name: round(amount or 0.0, 2) for name, amount in conn.execute(query, {'date_from': '0001-01-01', 'date_to': as_of})}
+
+    # --- BILL-WISE OUTSTANDING ---
+    # A sales or purchase voucher opens a bill (its vouch_no) for the party.
+    # Receipts, payments and journals settle bills through against_ref_no on the
+    # party's line, credit and debit notes through against_ref on the header.
+    # Entries with no reference, or a reference matching no bill of that party,
+    # are on account. The opening balance of the oldest year on file is one
+    # more bill, 'Opening Balance', of unknown date.
+    BILL_VOUCH_BASES = ('sales', 'purchase')
+    OPENING_BILL_REF = 'Opening Balance'
+    AGEING_BUCKETS = (30, 60, 90)  # upper bounds in days; older bills fall in the last bucket
+
+    def _party_entries(self, conn: sqlite3.Connection, as_of: str, group_name: str, party_id: int = None) -> sqlite3.Cursor:
+        """
+        Streams (party_id, ref, date, amount, is_bill) up to as_of for the accounts
+        under a group (Dr +, Cr -), ordered by party and reference with each
+        bill ahead of its settlements.
+        """
+        parties = """
+            SELECT am.id FROM main.account_master am
+            JOIN main.account_groups g ON g.group_name = am.group_type
+            JOIN main.account_group_closure c ON c.descendant_id = g.id
+            JOIN main.account_groups top ON top.id = c.ancestor_id
+            WHERE top.group_name = :group_name"""
+        if party_id is not None:
+            parties += " AND am.id = :party_id"
+        sources = self._voucher_sources(conn, '0001-01-01', as_of)
+        entries = [f"""
+            SELECT o.id, '{self.OPENING_BILL_REF}', NULL,
+                   CASE WHEN o.ob_type = 'Cr' THEN -o.opening_balance ELSE o.opening_balance END, 1
+            FROM {sources[0]}.account_master o
+            WHERE o.id IN parties AND o.opening_balance != 0"""]
+        for schema in sources:
+            for base in self.ITEM_VOUCH_BASES.values():
+                is_bill = base in self.BILL_VOUCH_BASES
+                entries.append(f"""
+                    SELECT h.party_mas_id, {'h.vouch_no' if is_bill else "NULLIF(h.against_ref, '')"}, h.trans_date,
+                           {self.PARTY_POSTING_SIGN[base]} * COALESCE(h.final_bill_amt, 0), {int(is_bill)}
+                    FROM {schema}.{base}_header h
+                    WHERE h.party_mas_id IN parties AND {self._date_key_sql(conn, schema, 'trans_date')} <= :as_of_key""")
+            for base in self.ACCOUNT_VOUCH_BASES.values():
+                entries.append(f"""
+                    SELECT l.master_account_id, NULLIF(l.against_ref_no, ''), h.vouch_date,
+                           CASE WHEN l.dr_cr = 'Dr' THEN l.amount ELSE -l.amount END, 0
+                    FROM {schema}.{base}_lines l
+                    JOIN {schema}.{base}_header h ON h.id = l.vouch_header_id
+                    WHERE l.master_account_id IN parties AND {self._date_key_sql(conn, schema, 'vouch_date')} <= :as_of_key""")
+        query = f"""
+            WITH parties AS ({parties})
+            SELECT * FROM ({" UNION ALL ".join(entries)})
+            ORDER BY 1, 2, 5 DESC, 3
+        """
+        return conn.execute(query, {'as_of_key': date_key(as_of), 'group_name': group_name, 'party_id': party_id})
+
+    def _open_bills(self, as_of: str, group_name: str, party_id: int = None):
+        """
+        One ordered pass over the party entries: yields (party_id, on_account, bills)
+        per party, bills being (ref, date, bill_amount, open_amount) with amounts
+        positive on the group's own side (Dr for Asset groups, Cr otherwise).
+        """
+        conn = self._report_conn()
+        nature = conn.execute("SELECT nature FROM main.account_groups WHERE group_name = ?", (group_name,)).fetchone()
+        if not nature:
+            raise ValueError(f"Account group '{group_name}' does not exist.")
+        side = 1 if nature[0] == 'Asset' else -1
+        for party, entries in groupby(self._party_entries(conn, as_of, group_name, party_id), key=itemgetter(0)):
+            on_account = 0.0
+            bills = []
+            for ref, ref_entries in groupby(entries, key=itemgetter(1)):
+                ref_entries = list(ref_entries)
+                total = side * sum(entry[3] for entry in ref_entries)
+                if ref is None or not ref_entries[0][4]:
+                    on_account += total
+                    continue
+                bill_amount = side * sum(entry[3] for entry in ref_entries if entry[4])
+                bills.append((ref, ref_entries[0][2], bill_amount, total))
+            yield party, on_account, bills
+
+    def get_group_accounts(self, group_name: str = None) -> Dict[int, str]:
+        """Accounts filed anywhere under a group (every account if None), as {id: name}."""
+        if group_name is None:
+            return dict(self._report_conn().execute("SELECT id, master_name FROM main.account_master"))
+        return dict(self._report_conn().execute("""
+            SELECT am.id, am.master_name FROM main.account_master am
+            JOIN main.account_groups g ON g.group_name = am.group_type
+            JOIN main.account_group_closure c ON c.descendant_id = g.id
+            JOIN main.account_groups top ON top.id = c.ancestor_id
+            WHERE top.group_name = ?""", (group_name,)))
+
+    @staticmethod
+    def _bill_age(as_of_day: int, date: str, ordinals: Dict[str, int]) -> int | None:
+        if date is None:
+            return None
+        day = ordinals.get(date)
+        if day is None:
+            day = ordinals[date] = datetime.date.fromisoformat(date).toordinal()
+        return as_of_day - day
+
+    def get_outstanding_bills(self, as_of: str, group_name: str = 'Sundry Debtors', party_name: str = None) -> List[OutstandingBill]:
+        """Open bills as on a date of every party under a group (or of one party), oldest first per party."""
+        party_id = None
+        if party_name:
+            party_id = self.get_id_by_name(party_name, 'account')
+            if party_id is None:
+                return []
+        names = self.get_group_accounts(group_name)
+        as_of_day = datetime.date.fromisoformat(as_of).toordinal()
+        ordinals = {}
+        result = []
+        for party, on_account, bills in self._open_bills(as_of, group_name, party_id):
+            for ref, date, bill_amount, open_amount in bills:
+                if round(open_amount, 2):
+                    result.append(OutstandingBill(party, names.get(party), ref, date, bill_amount, open_amount,
+                                                  self._bill_age(as_of_day, date, ordinals)))
+        result.sort(key=lambda bill: (bill.party, bill.date or ''))
+        return result
+
+    def get_ageing(self, as_of: str, group_name: str = 'Sundry Debtors') -> List[AgeingRow]:
+        """Per-party outstanding as on a date, open bills split into AGEING_BUCKETS by bill date."""
+        names = self.get_group_accounts(group_name)
+        as_of_day = datetime.date.fromisoformat(as_of).toordinal()
+        last_bucket = len(self.AGEING_BUCKETS)
+        ordinals = {}
+        result = []
+        for party, on_account, bills in self._open_bills(as_of, group_name):
+            buckets = [0.0] * (last_bucket + 1)
+            for ref, date, bill_amount, open_amount in bills:
+                days = self._bill_age(as_of_day, date, ordinals)
+                buckets[last_bucket if days is None else bisect_left(self.AGEING_BUCKETS, days)] += open_amount
+            outstanding = on_account + sum(buckets)
+            if round(outstanding, 2) or round(on_account, 2):
+                result.append(AgeingRow(party, names.get(party), outstanding, on_account, *buckets))
+        result.sort(key=lambda row: row.party)
+        return result
+
+    # --- BANK RECONCILIATION ---
+    # Statement lines are imported from CSV (bank_statement.read_statement_csv)
+    # and matched to the bank account's lines on PAY/REC/JNL vouchers, deposits
+    # to Dr lines and withdrawals to Cr lines. The voucher reference is its
+    # mode_of_payment_ref (cheque/UTR), else ref_no. A match is stored on the
+    # statement line; deleting the book line or its voucher releases it.
+    def _create_bank_match_triggers(self):
+        for code, base in self.ACCOUNT_VOUCH_BASES.items():
+            release = "UPDATE bank_statement_lines SET vouch_type = NULL, line_id = NULL, match_kind = NULL"
+            self.cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{base}_lines_bank_ad AFTER DELETE ON {base}_lines
+                FOR EACH ROW BEGIN {release} WHERE vouch_type = '{code}' AND line_id = OLD.id; END""")
+            self.cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{base}_header_bank_bd BEFORE DELETE ON {base}_header
+                FOR EACH ROW BEGIN {release} WHERE vouch_type = '{code}'
+                    AND line_id IN (SELECT id FROM {base}_lines WHERE vouch_header_id = OLD.id); END""")
+
+    def _bank_account_id(self, account_name: str) -> int:
+        account_id = self.get_id_by_name(account_name, 'account')
+        if account_id is None:
+            raise ValueError(f"Bank account '{account_name}' does not exist.")
+        return account_id
+
+    def import_bank_statement(self, account_name: str, path: str) -> int:
+        """Adds the lines of a statement CSV to the account's statement; rows already imported are skipped. Returns the count added."""
+        account_id = self._bank_account_id(account_name)
+        entries = read_statement_csv(path)
+        before = self.conn.total_changes
+        try:
+            self.cursor.executemany("""
+                INSERT OR IGNORE INTO bank_statement_lines (account_id, txn_date, description, ref_no, amount, row_hash)
+                VALUES (?, ?, ?, ?, ?, ?)""",
+                [(account_id, e.date, e.description, e.ref_no, e.amount, e.row_hash) for e in entries])
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            raise ValueError(f"DB Error importing bank statement: {e}")
+        return self.conn.total_changes - before
+
+    def _unreconciled_book_sql(self) -> str:
+        return " UNION ALL ".join(f"""
+            SELECT '{code}' AS vouch_type, l.id AS line_id, h.vouch_date AS date, h.vouch_no AS vouch_no,
+                   COALESCE(NULLIF(h.mode_of_payment_ref, ''), h.ref_no, '') AS ref_no,
+                   CASE WHEN l.dr_cr = 'Dr' THEN l.amount ELSE -l.amount END AS amount, h.narrative AS narrative
+            FROM {base}_lines l
+            JOIN {base}_header h ON h.id = l.vouch_header_id
+            WHERE l.master_account_id = :account_id AND h.vouch_day <= :as_of_key
+              AND NOT EXISTS (SELECT 1 FROM bank_statement_lines s WHERE s.vouch_type = '{code}' AND s.line_id = l.id)"""
+            for code, base in self.ACCOUNT_VOUCH_BASES.items())
+
+    def get_unreconciled_book(self, account_name: str, as_of: str = '9999-12-31') -> List[Tuple]:
+        """(vouch_type, line_id, date, vouch_no, ref_no, amount, narrative) of the account's unmatched book entries (deposit +)."""
+        params = {'account_id': self._bank_account_id(account_name), 'as_of_key': date_key(as_of)}
+        return self.conn.execute(f"SELECT * FROM ({self._unreconciled_book_sql()}) ORDER BY date, vouch_no", params).fetchall()
+
+    def get_unreconciled_statement(self, account_name: str) -> List[Tuple]:
+        """(id, date, description, ref_no, amount) of the account's unmatched statement lines (deposit +)."""
+        return self.conn.execute("""
+            SELECT id, txn_date, description, ref_no, amount FROM bank_statement_lines
+            WHERE account_id = ? AND line_id IS NULL ORDER BY txn_date, id""",
+            (self._bank_account_id(account_name),)).fetchall()
+
+    def reconcile_bank_statement(self, account_name: str, window_days: int = DEFAULT_WINDOW_DAYS) -> int:
+        """Auto-matches unmatched statement lines to unmatched book entries (see bank_statement.match_entries). Returns the count matched."""
+        statement = [(sid, date, amount, ref) for sid, date, _, ref, amount in self.get_unreconciled_statement(account_name)]
+        book = [((vouch_type, line_id), date, amount, ref)
+                for vouch_type, line_id, date, _, ref, amount, _ in self.get_unreconciled_book(account_name)]
+        pairs = match_entries(statement, book, window_days)
+        try:
+            self.cursor.executemany(
+                "UPDATE bank_statement_lines SET vouch_type = ?, line_id = ?, match_kind = 'auto' WHERE id = ?",
+                [(vouch_type, line_id, statement_id) for statement_id, (vouch_type, line_id) in pairs])
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            raise ValueError(f"DB Error reconciling bank statement: {e}")
+        return len(pairs)
+
+    def reconcile_bank_line(self, statement_id: int, vouch_type: str, line_id: int) -> bool:
+        """Manually matches one statement line to one book entry."""
+        try:
+            self.cursor.execute("""
+                UPDATE bank_statement_lines SET vouch_type = ?, line_id = ?, match_kind = 'manual'
+                WHERE id = ? AND line_id IS NULL""", (vouch_type, line_id, statement_id))
+            self.conn.commit()
+        except sqlite3.IntegrityError:
+            self.conn.rollback()
+            raise ValueError("That book entry is already matched to another statement line.")
+        return self.cursor.rowcount > 0
+
+    def unreconcile_bank_line(self, statement_id: int) -> bool:
+        self.cursor.execute("UPDATE bank_statement_lines SET vouch_type = NULL, line_id = NULL, match_kind = NULL WHERE id = ?",
+                            (statement_id,))
+        self.conn.commit()
+        return self.cursor.rowcount > 0
+
+    # --- CHANGE LOG ---
+    # Triggers append (table, rowid, op) to change_log under an increasing
+    # version. They live in the database file, so writes from any process or
+    # tool are captured. A consumer (a derived index, cache or export) registers
+    # a name, reads the changes after its watermark, applies them and
+    # acknowledges the last version it applied; compact_change_log() then drops
+    # what every consumer has acknowledged. Idle maintenance compacts the log the
+    # same way, so it stays small whether or not anything consumes it.
+    def _change_tables(self) -> List[str]:
+        bases = list(self.ACCOUNT_VOUCH_BASES.values()) + list(self.ITEM_VOUCH_BASES.values())
+        return ['account_master', 'item_master'] + [f"{base}_{part}" for base in bases for part in ('header', 'lines')]
+
+    def _create_change_triggers(self):
+        for table in self._change_tables():
+            for suffix, event, row, op in (('ai', 'INSERT', 'NEW', 'I'), ('au', 'UPDATE', 'NEW', 'U'), ('ad', 'DELETE', 'OLD', 'D')):
+                self.cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_cdc_{suffix} AFTER {event} ON {table}
+                    FOR EACH ROW BEGIN
+                        INSERT INTO change_log (table_name, row_id, op) VALUES ('{table}', {row}.id, '{op}');
+                    END""")
+
+    def get_change_version(self) -> int:
+        """The latest version written to change_log (0 if nothing was ever logged)."""
+        row = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+        return row[0] if row else 0
+
+    def register_change_consumer(self, name: str, from_start: bool = False) -> int:
+        """
+        Adds a consumer and returns its watermark. A new consumer starts at the
+        current version (it is expected to build its initial state from the
+        tables), or with from_start at the oldest change still in the log.
+        """
+        watermark = 0 if from_start else self.get_change_version()
+        self.cursor.execute("INSERT OR IGNORE INTO change_consumers (name, watermark) VALUES (?, ?)", (name, watermark))
+        self.conn.commit()
+        return self.conn.execute("SELECT watermark FROM change_consumers WHERE name = ?", (name,)).fetchone()[0]
+
+    def delete_change_consumer(self, name: str) -> bool:
+        self.cursor.execute("DELETE FROM change_consumers WHERE name = ?", (name,))
+        self.conn.commit()
+        return self.cursor.rowcount > 0
+
+    def get_changes(self, consumer: str, limit: int = 10000) -> List[ChangeRecord]:
+        """Up to limit changes after the consumer's watermark, oldest first. Reading does not move the watermark."""
+        cursor = self._typed_cursor(ChangeRecord)
+        cursor.execute("""
+            SELECT version, table_name, row_id, op FROM change_log
+            WHERE version > (SELECT watermark FROM change_consumers WHERE name = ?)
+            ORDER BY version LIMIT ?""", (consumer, limit))
+        return cursor.fetchall()
+
+    def ack_changes(self, consumer: str, version: int) -> bool:
+        """Moves the consumer's watermark up to version (never back)."""
+        self.cursor.execute("UPDATE change_consumers SET watermark = MAX(watermark, ?) WHERE name = ?", (version, consumer))
+        self.conn.commit()
+        return self.cursor.rowcount > 0
+
+    def compact_change_log(self) -> int:
+        """Deletes the changes every consumer has acknowledged (all of them if there are no consumers). Returns the count."""
+        self.cursor.execute("""
+            DELETE FROM change_log
+            WHERE version <= COALESCE((SELECT MIN(watermark) FROM change_consumers), (SELECT MAX(version) FROM change_log))""")
+        self.conn.commit()
+        return self.cursor.rowcount
+
+    # --- FINANCIAL YEAR CLOSE ---
+    # Item vouchers post the bill total to the party: SAL/DN debit it, PUR/CN credit it.
+    PARTY_POSTING_SIGN = {'sales': 1, 'debitnote': 1, 'purchase': -1, 'creditnote': -1}
+    # Stock movement: PUR in, SAL out, CN (sales return) in, DN (purchase return) out.
+    STOCK_MOVEMENT_SIGN = {'purchase': 1, 'creditnote': 1, 'sales': -1, 'debitnote': -1}
+
+    def get_closing_balances(self, date_to: str) -> Dict[int, float]:
+        """Signed closing balance (Dr +, Cr -) per account id as of date_to, from the opening balance plus live vouchers."""
+        query = self._period_totals_sql(self.conn, 'main', closing=True)
+        params = {'date_from': '0001-01-01', 'date_to': date_to}
+        return {account_id: round(total or 0.0, 2) for account_id, total in self.conn.execute(query, params)}
+
+    def get_closing_stock(self, date_to: str) -> Dict[int, Tuple[float, float]]:
+        """(closing qty, weighted average purchase rate) per item id as of date_to."""
+        sub_queries = ["SELECT id AS item_id, opening_stock AS qty, opening_stock * opening_rate AS cost, opening_stock AS cost_qty FROM main.item_master"]
+        for base, sign in self.STOCK_MOVEMENT_SIGN.items():
+            cost = "l.qty * l.rate, l.qty" if base == 'purchase' else "0, 0"
+            sub_queries.append(f"""
+                SELECT l.item_mas_id, {sign} * l.qty, {cost}
+                FROM main.{base}_header h JOIN main.{base}_lines l ON h.id = l.trans_header_id
+                WHERE h.trans_day <= :date_to_key
+            """)
+        query = f"SELECT item_id, SUM(qty), SUM(cost), SUM(cost_qty) FROM ({' UNION ALL '.join(sub_queries)}) GROUP BY item_id"
+        stock = {}
+        for item_id, qty, cost, cost_qty in self.conn.execute(query, {'date_to_key': date_key(date_to)}):
+            stock[item_id] = (round(qty or 0.0, 3), round(cost / cost_qty, 2) if cost_qty else 0.0)
+        return stock
+
+    def close_financial_year(self, fy_label: str, fy_end: str, archive_path: str = None) -> str:
+        """
+        Year-end close: moves every voucher dated up to fy_end into a new archive
+        database and carries closing balances/stock forward as the opening
+        balances of the live file, which then holds only the new year.
+        The archive is registered in fy_archives and ATTACHed read-only by reports.
+        """
+        if self._archives and fy_end <= self._archives[-1][3]:
+            raise ValueError(f"Financial year ending {fy_end} is already closed.")
+        if archive_path is None:
+            stem = os.path.splitext(os.path.basename(self.db_path))[0]
+            archive_path = f"{stem}_{fy_label}.db"
+        folder = os.path.dirname(os.path.abspath(self.db_path))
+        full_path = os.path.join(folder, archive_path)
+        if os.path.exists(full_path):
+            raise ValueError(f"Archive file '{archive_path}' already exists.")
+
+        balances = self.get_closing_balances(fy_end)
+        stock = self.get_closing_stock(fy_end)
+        # Income/Expense accounts start the new year at zero; their net goes to Profit & Loss A/c.
+        nominal = {account_id for (account_id,) in self.cursor.execute("""
+            SELECT am.id FROM account_master am JOIN account_groups g ON g.group_name = am.group_type
+            WHERE g.nature IN ('Income', 'Expense')
+        """)}
+        profit_id = self.get_id_by_name(self.SYSTEM_ACCOUNTS['profit'][0], 'account')
+        for account_id in nominal & balances.keys():
+            balances[profit_id] = round(balances.get(profit_id, 0.0) + balances[account_id], 2)
+            balances[account_id] = 0.0
+
+        # Create the archive with the same schema, then fill it through ATTACH.
+        DBManager(full_path).conn.close()
+        self.conn.commit()
+        self.cursor.execute("ATTACH DATABASE ? AS fy_close", (full_path,))
+        try:
+            date_from = fy_end
+            for table in ('account_master', 'item_master', 'utilities_settings'):
+                cols = ', '.join(row[1] for row in self.cursor.execute(f"PRAGMA main.table_info({table})"))
+                self.cursor.execute(f"DELETE FROM fy_close.{table}")  # rows seeded when the archive was created
+                self.cursor.execute(f"INSERT INTO fy_close.{table} ({cols}) SELECT {cols} FROM main.{table}")
+
+            bases = [(base, 'vouch_date', 'vouch_header_id') for base in self.ACCOUNT_VOUCH_BASES.values()]
+            bases += [(base, 'trans_date', 'trans_header_id') for base in self.ITEM_VOUCH_BASES.values()]
+            in_year = {'fy_end_key': date_key(fy_end)}
+            for base, date_col, fk_col in bases:
+                year_headers = f"SELECT id FROM main.{base}_header WHERE {self.DATE_KEY_COLUMNS[date_col]} <= :fy_end_key"
+                for table, where in ((f"{base}_header", f"id IN ({year_headers})"),
+                                     (f"{base}_lines", f"{fk_col} IN ({year_headers})")):
+                    cols = ', '.join(row[1] for row in self.cursor.execute(f"PRAGMA main.table_info({table})"))
+                    self.cursor.execute(f"INSERT INTO fy_close.{table} ({cols}) SELECT {cols} FROM main.{table} WHERE {where}", in_year)
+                first = self.cursor.execute(f"SELECT MIN({date_col}) FROM main.{base}_header WHERE id IN ({year_headers})", in_year).fetchone()[0]
+                if first and first < date_from:
+                    date_from = first
+                if base in self.ACCOUNT_VOUCH_BASES.values():
+                    # Statement lines reconciled against this year's vouchers go with them, not back to unmatched.
+                    code = next(c for c, b in self.ACCOUNT_VOUCH_BASES.items() if b == base)
+                    matched = f"""FROM main.bank_statement_lines WHERE vouch_type = '{code}' AND line_id IN (
+                        SELECT id FROM main.{base}_lines WHERE {fk_col} IN ({year_headers}))"""
+                    self.cursor.execute(f"INSERT INTO fy_close.bank_statement_lines SELECT * {matched}", in_year)
+                    self.cursor.execute(f"DELETE {matched}", in_year)
+                self.cursor.execute(f"DELETE FROM main.{base}_lines WHERE {fk_col} IN ({year_headers})", in_year)
+                self.cursor.execute(f"DELETE FROM main.{base}_header WHERE id IN ({year_headers})", in_year)
+
+            self.cursor.executemany(
+                "UPDATE main.account_master SET opening_balance = ?, ob_type = ? WHERE id = ?",
+                [(abs(amt), 'Dr' if amt >= 0 else 'Cr', account_id) for account_id, amt in balances.items()])
+            self.cursor.executemany(
+                "UPDATE main.item_master SET opening_stock = ?, opening_rate = ? WHERE id = ?",
+                [(qty, rate, item_id) for item_id, (qty, rate) in stock.items()])
+            self.cursor.execute("INSERT INTO main.fy_archives (fy_label, path, date_from, date_to) VALUES (?, ?, ?, ?)",
+                                (fy_label, archive_path, date_from, fy_end))
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            self.cursor.execute("DETACH DATABASE fy_close")
+            os.remove(full_path)
+            raise ValueError(f"DB Error closing financial year {fy_label}: {e}")
+        self.cursor.execute("DETACH DATABASE fy_close")
+        self._archives = self.cursor.execute("SELECT id, path, date_from, date_to FROM fy_archives ORDER BY date_to").fetchall()
+        self._replica = None  # stale copy still holds the archived vouchers; reports use the live file until refreshed
+        return archive_path
+
+    # --- REPORTING REPLICA ---
+    # Optional read-only copy of the live file (in memory or a temp file) for the
+    # report methods, so month-end reporting never holds locks against voucher
+    # saves. A background thread watches PRAGMA data_version on a probe
+    # connection and, at most once per min_interval, copies the database with the
+    # backup API in small page steps, then swaps the finished copy in. Reports
+    # only use the copy while the probe's data_version is the one it was copied
+    # at: after a commit they read the live file until the next copy is in.
+    REPLICA_PAGES_PER_STEP = 256
+    REPLICA_STEP_SLEEP = 0.002
+    replica_error = ""  # why the last replica refresh failed ('' once one succeeds)
+
+    def enable_report_replica(self, target: str = ':memory:', min_interval: float = 5.0, poll_interval: float = 0.5):
+        """Starts the replica refresher. target is ':memory:' or a folder for temp-file replicas."""
+        if self._replica_thread:
+            return
+        self._replica_stop = threading.Event()
+        self._replica_thread = threading.Thread(target=self._replica_loop, args=(target, min_interval, poll_interval),
+                                                name="report-replica", daemon=True)
+        self._replica_thread.start()
+
+    def disable_report_replica(self):
+        if not self._replica_thread:
+            return
+        self._replica_stop.set()
+        self._replica_thread.join()
+        self._replica_thread = None
+        self._replica = None
+
+    def close(self):
+        """Stops the replica refresher and the scheduled backup, and closes the live connection."""
+        self.disable_report_replica()
+        self.disable_scheduled_backup()
+        if self._maintenance is not None:
+            self._maintenance.interrupt()
+            self._maintenance.join()
+        self.conn.close()
+
+    def _report_conn(self) -> sqlite3.Connection:
+        """
+        Connection for report queries: the replica once it exists, else the live
+        connection. Other threads (e.g. background prefetches) get a read-only
+        connection of their own, opened on first use.
+        """
+        if threading.get_ident() != self._owner_thread:
+            conn = getattr(self._thread_conns, 'conn', None)
+            if conn is None:
+                uri = pathlib.Path(os.path.abspath(self.db_path)).as_uri() + "?mode=ro"
+                conn = self._thread_conns.conn = sqlite3.connect(uri, uri=True)
+            return conn
+        replica = self._replica
+        if replica is not None and not self.conn.in_transaction and self._replica_version == self._data_version():
+            return replica
+        return self.conn
+
+    def _data_version(self) -> Optional[int]:
+        """PRAGMA data_version of the replica probe, which changes whenever any other connection commits."""
+        with self._replica_lock:
+            probe = self._replica_probe
+            return probe.execute("PRAGMA data_version").fetchone()[0] if probe is not None else None
+
+    def _replica_loop(self, target: str, min_interval: float, poll_interval: float):
+        source = sqlite3.connect(self.db_path, uri=True)
+        self._replica_probe = sqlite3.connect(self.db_path, uri=True, check_same_thread=False)  # never writes
+        last_version = None
+        last_refresh = 0.0
+        replica_file = None
+        try:
+            while not self._replica_stop.is_set():
+                version = self._data_version()
+                stale = version != last_version or self._replica is None
+                if stale and time.monotonic() - last_refresh >= min_interval:
+                    if target == ':memory:':
+                        dest_file, dest = None, sqlite3.connect(':memory:', uri=True, check_same_thread=False)
+                    else:
+                        fd, dest_file = tempfile.mkstemp(suffix='.db', prefix='replica_', dir=target)
+                        os.close(fd)
+                        dest = sqlite3.connect(dest_file, uri=True, check_same_thread=False)
+                    try:
+                        source.backup(dest, pages=self.REPLICA_PAGES_PER_STEP, sleep=self.REPLICA_STEP_SLEEP)
+                        dest.execute("PRAGMA query_only=ON")
+                    except sqlite3.Error as e:
+                        self.replica_error = str(e)
+                        dest.close()
+                        if dest_file:
+                            os.remove(dest_file)
+                    else:
+                        # Replica before version: a report in between sees the old version and uses the live file.
+                        self._replica = dest
+                        self._replica_version = version
+                        self.replica_error = ""
+                        if replica_file:
+                            os.remove(replica_file)  # open cursors keep the unlinked file readable
+                        replica_file = dest_file
+                        last_version = version
+                    last_refresh = time.monotonic()
+                self._replica_stop.wait(poll_interval)
+        finally:
+            source.close()
+            self._replica = None
+            with self._replica_lock:
+                self._replica_probe.close()
+                self._replica_probe = None
+            if replica_file:
+                os.remove(replica_file)
+
+    # --- SCHEDULED BACKUP ---
+    # Verified, rotated generations of the live file in a backup folder (see
+    # backup.py). A background thread takes one every interval while the file
+    # has changed since the newest generation, copying it BACKUP_PAGES_PER_STEP
+    # pages at a time on its own connection so voucher saves are never held up
+    # for longer than one step.
+    BACKUP_FOLDER = "backups"
+    BACKUP_PAGES_PER_STEP = 1024
+    BACKUP_STEP_SLEEP = 0.01
+    backup_folder = BACKUP_FOLDER
+    backup_error = ""  # why the last scheduled backup failed ('' once one succeeds)
+
+    def enable_scheduled_backup(self, folder: str = BACKUP_FOLDER, interval: float = 3600.0, keep: int = 7,
+                                poll_interval: float = 30.0):
+        """Starts the backup thread; folder is relative to the company file unless absolute."""
+        if self._backup_thread:
+            return
+        self.backup_folder = folder
+        self._backup_stop = threading.Event()
+        self._backup_thread = threading.Thread(target=self._backup_loop, args=(folder, interval, keep, poll_interval),
+                                               name="scheduled-backup", daemon=True)
+        self._backup_thread.start()
+
+    def disable_scheduled_backup(self):
+        """Stops the backup thread; a copy in progress is abandoned."""
+        if not self._backup_thread:
+            return
+        self._backup_stop.set()
+        self._backup_thread.join()
+        self._backup_thread = None
+
+    def backup_now(self, folder: str = None, keep: int = 7) -> BackupInfo:
+        """Takes a generation now (blocking the caller, not other connections). Raises ValueError on failure."""
+        return backup_database(self.db_path, folder or self.backup_folder, keep,
+                               self.BACKUP_PAGES_PER_STEP, self.BACKUP_STEP_SLEEP)
+
+    def get_backups(self, folder: str = None) -> List[BackupInfo]:
+        """The verified generations, newest first."""
+        return list_backups(self.db_path, folder or self.backup_folder)
+
+    def get_last_backup(self, folder: str = None) -> Optional[BackupInfo]:
+        backups = self.get_backups(folder)
+        return backups[0] if backups else None
+
+    def _backup_loop(self, folder: str, interval: float, keep: int, poll_interval: float):
+        while not self._backup_stop.wait(poll_interval):
+            newest = self.get_last_backup(folder)
+            if newest is not None and (time.time() - newest.taken < interval or last_modified(self.db_path) < newest.taken):
+                continue
+            try:
+                backup_database(self.db_path, folder, keep, self.BACKUP_PAGES_PER_STEP, self.BACKUP_STEP_SLEEP,
+                                stop=self._backup_stop)
+            except ValueError as e:
+                if not self._backup_stop.is_set():
+                    self.backup_error = str(e)
+            else:
+                self.backup_error = ""
+
+    # --- IDLE MAINTENANCE ---
+    # ANALYZE of tables whose statistics are stale, PRAGMA optimize, change_log
+    # compaction and incremental vacuum (see maintenance.py), run on a background
+    # connection while the user is idle; interrupt_maintenance stops it
+    # mid-statement as soon as they are back. A run that finished is not
+    # repeated for MAINTENANCE_INTERVAL seconds.
+    MAINTENANCE_INTERVAL = 3600.0
+
+    def start_maintenance(self, min_interval: float = MAINTENANCE_INTERVAL) -> bool:
+        """Starts a run unless one is going or the last finished within min_interval; returns whether it started."""
+        if self._maintenance is None:
+            self._maintenance = MaintenanceRunner(self.db_path)
+        if self._maintenance.running or time.monotonic() - self._maintenance_done < min_interval:
+            return False
+        return self._maintenance.start()
+
+    def interrupt_maintenance(self):
+        if self._maintenance is not None:
+            self._maintenance.interrupt()
+
+    def finish_maintenance(self) -> Optional[MaintenanceReport]:
+        """
+        Collects a run that has ended (None while one runs, or if there is
+        nothing new) and loads the statistics it gathered into the live
+        connection, which otherwise keeps planning with the ones it started with.
+        """
+        runner = self._maintenance
+        if runner is None or runner.running or runner.report is None:
+            return None
+        report, runner.report = runner.report, None
+        if report.analyzed:
+            self.conn.execute("ANALYZE sqlite_schema")
+        if not report.interrupted and not report.error:
+            self._maintenance_done = time.monotonic()
+        return report
+
+
+def open_company_db(db_path: str):
+    """DBManager for a file, or a thin client for a server address, with the company's replica setting applied."""
+    # A server address (tcp://host:port or unix:/path) makes this a thin client of db_server.py
+    if is_server_address(db_path):
+        return RemoteDBManager(db_path)
+    db_manager = DBManager(db_path)
+    # Optional reporting replica: setting 'ReportReplica' = 'memory' or a folder for temp files
+    replica_target = db_manager.get_setting("ReportReplica")
+    if replica_target:
+        db_manager.enable_report_replica(':memory:' if replica_target == 'memory' else replica_target)
+    # Scheduled backup: 'BackupIntervalMinutes' (default 60, 0 turns it off), 'BackupFolder', 'BackupKeep'
+    interval = float(db_manager.get_setting("BackupIntervalMinutes") or 60)
+    if interval > 0:
+        db_manager.enable_scheduled_backup(db_manager.get_setting("BackupFolder") or DBManager.BACKUP_FOLDER,
+                                           interval * 60, int(db_manager.get_setting("BackupKeep") or 7))
+    return db_manager
+
+
+class CompanyRegistry:
+    """
+    Known companies (name -> database path or server address), kept in a small
+    SQLite file, and a pool of their open managers.
+
+    A company's manager is opened on first use and then kept, with its statement
+    cache, typed cursors and report replica, so switching back to it costs a
+    dictionary lookup. At most max_open managers stay open: opening one more
+    closes the least recently used, and evict_idle() closes any unused for
+    idle_seconds. The most recently used manager (the one on screen) is never
+    evicted. File paths are stored and pooled by their real absolute path, so a
+    file entered as 'accounting.db', './accounting.db' or in full is one
+    company with one manager. Used from the GUI thread only.
+    """
+    def __init__(self, registry_path: str = "companies.db", max_open: int = 4, idle_seconds: float = 900.0):
+        self.max_open = max_open
+        self.idle_seconds = idle_seconds
+        self._open = OrderedDict()  # company_path -> [manager, last_used], least recently used first
+        self.conn = sqlite3.connect(registry_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS companies (
+                name TEXT PRIMARY KEY COLLATE NOCASE,
+                db_path TEXT NOT NULL UNIQUE
+            )
+        """)
+        self.conn.commit()
+
+    @staticmethod
+    def company_path(db_path: str) -> str:
+        """A server address as it is, a file by its real absolute path."""
+        return db_path if is_server_address(db_path) else os.path.realpath(db_path)
+
+    def get_companies(self) -> List[Tuple[str, str]]:
+        return self.conn.execute("SELECT name, db_path FROM companies ORDER BY name").fetchall()
+
+    def add_company(self, name: str, db_path: str) -> str:
+        """Registers a company and returns its name; a path already registered keeps its existing name."""
+        db_path = self.company_path(db_path)
+        for existing, path in self.get_companies():
+            if self.company_path(path) == db_path:  # also matches paths registered before they were normalised
+                return existing
+        try:
+            self.conn.execute("INSERT INTO companies (name, db_path) VALUES (?, ?)", (name, db_path))
+            self.conn.commit()
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Company '{name}' already exists.")
+        return name
+
+    def remove_company(self, name: str) -> bool:
+        row = self.conn.execute("SELECT db_path FROM companies WHERE name = ?", (name,)).fetchone()
+        if row:
+            self._close(self.company_path(row[0]))
+        cursor = self.conn.execute("DELETE FROM companies WHERE name = ?", (name,))
+        self.conn.commit()
+        return cursor.rowcount > 0
+
+    def get(self, name: str):
+        """The company's manager, opened now if it is not in the pool."""
+        row = self.conn.execute("SELECT db_path FROM companies WHERE name = ?", (name,)).fetchone()
+        if not row:
+            raise ValueError(f"Company '{name}' is not registered.")
+        path = self.company_path(row[0])
+        entry = self._open.get(path)
+        if entry is None:
+            entry = self._open[path] = [open_company_db(path), 0.0]
+            while len(self._open) > self.max_open:
+                self._close(next(iter(self._open)))
+        self._open.move_to_end(path)
+        entry[1] = time.monotonic()
+        return entry[0]
+
+    def is_open(self, name: str) -> bool:
+        row = self.conn.execute("SELECT db_path FROM companies WHERE name = ?", (name,)).fetchone()
+        return row is not None and self.company_path(row[0]) in self._open
+
+    def evict_idle(self) -> int:
+        """Closes pooled managers unused for idle_seconds, except the most recent. Returns the count closed."""
+        cutoff = time.monotonic() - self.idle_seconds
+        idle = [path for path, (_, last_used) in list(self._open.items())[:-1] if last_used < cutoff]
+        for path in idle:
+            self._close(path)
+        return len(idle)
+
+    def _close(self, path: str):
+        entry = self._open.pop(path, None)
+        if entry:
+            entry[0].close()
+
+    def close(self):
+        for path in list(self._open):
+            self._close(path)
+        self.conn.close()
 
 
 # ==============================================================================
@@ -850,6 +2953,30 @@ class MasterViewWindow(QDialog):
 # 3. VOUCHER DIALOGS (Fixed self.account_names initialization and False ID loading)
 # ==============================================================================
 
+class MasterListModels(QObject):
+    """
+    The voucher combos' account, party and item names as QStringListModels.
+    The combos of every pooled voucher dialog share these three models instead
+    of each copying thousands of names into a model of its own. refresh()
+    resets a model only when DBManager.get_master_lists() returns a different list.
+    """
+    def __init__(self, db_manager: DBManager, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.accounts = QStringListModel(self)
+        self.parties = QStringListModel(self)
+        self.items = QStringListModel(self)
+        self._lists = None
+        self.refresh()
+
+    def refresh(self):
+        lists = self.db_manager.get_master_lists()
+        for model, names, old in zip((self.accounts, self.parties, self.items), lists,
+                                     self._lists or (None, None, None)):
+            if names != old:
+                model.setStringList(names)
+        self._lists = lists
+
 class VoucherEntryDialog(QDialog):
     
     VOUCHER_TYPES = {
@@ -857,7 +2984,8 @@ class VoucherEntryDialog(QDialog):
         'SAL': 'Sales', 'PUR': 'Purchase', 'CN': 'Credit Note', 'DN': 'Debit Note'
     }
 
-    def __init__(self, db_manager: DBManager, vouch_type_code: str, parent=None, voucher_id: int = None):
+    def __init__(self, db_manager: DBManager, vouch_type_code: str, parent=None, voucher_id: int = None,
+                 masters: MasterListModels = None):
         super().__init__(parent)
         self.db_manager = db_manager
         self.vouch_type_code = vouch_type_code
@@ -865,19 +2993,8 @@ class VoucherEntryDialog(QDialog):
 
         self.is_item_voucher = vouch_type_code in ['SAL', 'PUR', 'CN', 'DN']
         
-        # --- Data Sources (Fetch once) ---
-        self.item_names = self.db_manager.get_item_names()
-        
-        # Determine the group type for Party/Account selection
-        party_master_type = self.db_manager.get_setting("PartyMasterType")
-        if party_master_type:
-            # Exclude the party group itself from the line item selection for safety/logic
-            self.account_names = self.db_manager.get_account_names(exclude_groups=[party_master_type])
-            self.party_names = self.db_manager.get_account_names(exclude_groups=[])
-        else:
-            # Default to all accounts if setting is missing (Party Combo uses all, Line Combo excludes nothing)
-            self.account_names = self.db_manager.get_account_names(exclude_groups=[]) 
-            self.party_names = self.account_names
+        # --- Data Sources (shared with the other dialogs of a DialogPool) ---
+        self.masters = masters or MasterListModels(db_manager, self)
 
         # --- Header Widgets ---
         self.vouch_no_edit = QLineEdit()
@@ -887,12 +3004,6 @@ class VoucherEntryDialog(QDialog):
         self.narration_edit = QTextEdit()
         self.narration_edit.setPlaceholderText("Enter transaction details/remarks here...")
 
-        # --- Footer Widgets (Account Voucher only) ---
-        self.total_dr_label = QLabel("Total Dr: 0.00")
-        self.total_cr_label = QLabel("Total Cr: 0.00")
-        self.total_dr_label.setStyleSheet("font-weight: bold;") 
-        self.total_cr_label.setStyleSheet("font-weight: bold;")
-        
         # Layout structure setup
         main_layout = QVBoxLayout(self)
         self.header_area = QGroupBox("Header Details") 
@@ -906,34 +3017,53 @@ class VoucherEntryDialog(QDialog):
         
         self.trans_area = QStackedWidget() 
         
-        # NOTE: Both creation methods are called to initialize the widgets in the stacked widget
-        self._create_account_voucher_area()
-        self._create_item_voucher_area()
-
+        # Only the area this voucher type uses is built
         if self.is_item_voucher:
+            self._create_item_voucher_area()
             self.trans_area.addWidget(self.item_area)
-            self.trans_area.setCurrentWidget(self.item_area)
         else:
+            self._create_account_voucher_area()
             self.trans_area.addWidget(self.account_area)
-            self.trans_area.setCurrentWidget(self.account_area)
 
         main_layout.addWidget(self.header_area)
         main_layout.addWidget(self.trans_area)
 
         self.save_button = QPushButton("Save Entry")
-        self.save_button.clicked.connect(self._save_voucher)
+        self.save_button.clicked.connect(self._on_save)
         main_layout.addWidget(self.save_button)
 
-        # Modification Mode Setup
-        type_name = self.VOUCHER_TYPES.get(vouch_type_code, "Voucher")
-        if self.voucher_id is not None:
-            self.setWindowTitle(f"Modify {type_name} Voucher ID: {self.voucher_id}")
-            self.save_button.setText("Update/Modify")
-            self.save_button.clicked.disconnect()
-            self.save_button.clicked.connect(self._modify_voucher)
-            self._load_voucher_data()
+        self.reset(voucher_id)
+
+    def reset(self, voucher_id: int = None) -> bool:
+        """
+        Clears the form for a new entry, or loads voucher_id for modification,
+        so that a pooled dialog can be shown again. Returns False if the voucher
+        is not found.
+        """
+        self.voucher_id = voucher_id
+        self.masters.refresh()
+        self.vouch_no_edit.clear()
+        self.date_edit.setDate(QDate.currentDate())
+        self.ref_no_edit.clear()
+        self.narration_edit.clear()
+        if self.is_item_voucher:
+            self.party_combo.setCurrentIndex(0)
+            self.item_table.setRowCount(0)
+            self._add_item_row()
         else:
+            self.account_table.setRowCount(0)
+            self._add_account_row()
+            self._recalculate_account_totals()
+
+        # Modification Mode Setup
+        type_name = self.VOUCHER_TYPES.get(self.vouch_type_code, "Voucher")
+        if voucher_id is None:
             self.setWindowTitle(f"New {type_name} Entry")
+            self.save_button.setText("Save Entry")
+            return True
+        self.setWindowTitle(f"Modify {type_name} Voucher ID: {voucher_id}")
+        self.save_button.setText("Update/Modify")
+        return self._load_voucher_data()
 
     # --- WIDGET CREATION METHODS ---
     def _create_account_voucher_area(self):
@@ -949,10 +3079,11 @@ class VoucherEntryDialog(QDialog):
         self.account_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
         self.account_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
         
-        # Add a default starting row
-        self._add_account_row()
-        
         # Footer
+        self.total_dr_label = QLabel("Total Dr: 0.00")
+        self.total_cr_label = QLabel("Total Cr: 0.00")
+        self.total_dr_label.setStyleSheet("font-weight: bold;") 
+        self.total_cr_label.setStyleSheet("font-weight: bold;")
         footer_layout = QHBoxLayout()
         footer_layout.addWidget(self.total_dr_label)
         footer_layout.addWidget(self.total_cr_label)
@@ -970,7 +3101,7 @@ class VoucherEntryDialog(QDialog):
         
         # Party Selection
         party_layout = QHBoxLayout()
-        self.party_combo = AutoCompleteComboBox(self.party_names)
+        self.party_combo = AutoCompleteComboBox(self.masters.parties)
         party_layout.addWidget(QLabel("Party/Account:"))
         party_layout.addWidget(self.party_combo)
         
@@ -982,9 +3113,6 @@ class VoucherEntryDialog(QDialog):
         for i in range(1, 7):
             self.item_table.horizontalHeader().setSectionResizeMode(i, QHeaderView.ResizeMode.ResizeToContents)
             
-        # Add a default starting row
-        self._add_item_row()
-        
         main_layout.addLayout(party_layout)
         main_layout.addWidget(self.item_table)
         
@@ -992,11 +3120,10 @@ class VoucherEntryDialog(QDialog):
         self.item_table.itemChanged.connect(self._check_and_add_item_row)
 
     # --- ITEM VOUCHER ROW LOGIC ---
-    def _add_item_row_widgets(self, row: int, line_data: Dict = 
- None):
+    def _add_item_row_widgets(self, row: int, line_data: 'ItemVoucherLine' = None):
         """Helper to create and populate item row widgets."""
         # New row widgets
-        self.item_table.setCellWidget(row, 0, AutoCompleteComboBox(self.item_names))
+        self.item_table.setCellWidget(row, 0, AutoCompleteComboBox(self.masters.items))
         self.item_table.setCellWidget(row, 1, DecimalLineEdit())
         self.item_table.setCellWidget(row, 2, DecimalLineEdit())
         self.item_table.setCellWidget(row, 3, DecimalLineEdit())
@@ -1013,12 +3140,12 @@ class VoucherEntryDialog(QDialog):
             
         # If data is provided, populate the widgets
         if line_data:
-            self.item_table.cellWidget(row, 0).setCurrentText(line_data['item_name'])
-            self.item_table.cellWidget(row, 1).set_value(line_data['qty'])
-            self.item_table.cellWidget(row, 2).set_value(line_data['rate'])
-            self.item_table.cellWidget(row, 3).set_value(line_data['discount'])
-            self.item_table.cellWidget(row, 4).set_value(line_data['taxable_amt'])
-            self.item_table.cellWidget(row, 5).set_value(line_data['tax_amt'])
+            self.item_table.cellWidget(row, 0).setCurrentText(line_data.item_name)
+            self.item_table.cellWidget(row, 1).set_value(line_data.qty)
+            self.item_table.cellWidget(row, 2).set_value(line_data.rate)
+            self.item_table.cellWidget(row, 3).set_value(line_data.discount)
+            self.item_table.cellWidget(row, 4).set_value(line_data.taxable_amt)
+            self.item_table.cellWidget(row, 5).set_value(line_data.tax_amt)
             # The total is calculated automatically by the connected signal after populating inputs
 
     def _add_item_row(self):
@@ -1037,29 +3164,33 @@ class VoucherEntryDialog(QDialog):
                 self._add_item_row()
                 
     # --- VOUCHER DATA LOADING AND UTILITIES ---
-    def _load_voucher_data(self):
-        """Loads data for modification mode."""
+    def _load_voucher_data(self) -> bool:
+        """Loads data for modification mode; False if the voucher does not exist."""
         data = self.db_manager.get_voucher_data_by_id(self.voucher_id, self.vouch_type_code)
         
         if data is None:
             show_message(self, "Load Error", f"Voucher ID {self.voucher_id} not found in database.", QMessageBox.Icon.Critical)
             self.reject()
-            return
+            return False
 
         header_data, line_data = data
         
         # --- Load Header Data ---
-        vouch_date_str = header_data.get('vouch_date') or header_data.get('date') # Account vs Item key
+        # ItemVoucherHeader has date/narration, AccountVoucherHeader has vouch_date/narrative
+        if self.is_item_voucher:
+            vouch_date_str, narration = header_data.date, header_data.narration
+        else:
+            vouch_date_str, narration = header_data.vouch_date, header_data.narrative
         if vouch_date_str:
-            self.date_edit.setDate(QDate.fromString(vouch_date_str, Qt.DateFormat.ISODate))
-        self.vouch_no_edit.setText(header_data['vouch_no'])
-        self.ref_no_edit.setText(header_data.get('ref_no', ''))
-        self.narration_edit.setText(header_data.get('narrative') or header_data.get('narration', ''))
+            self.date_edit.setDate(date_key_to_qdate(date_key(vouch_date_str)))
+        self.vouch_no_edit.setText(header_data.vouch_no)
+        self.ref_no_edit.setText(header_data.ref_no or '')
+        self.narration_edit.setText(narration or '')
 
         # --- Load Line Data ---
         if self.is_item_voucher:
             # Item Voucher Lines
-            self.party_combo.setCurrentText(header_data['party_name'])
+            self.party_combo.setCurrentText(header_data.party_name)
             
             # Clear and resize table
             self.item_table.setRowCount(0)
@@ -1075,8 +3206,7 @@ class VoucherEntryDialog(QDialog):
             # Clear and resize table
             self.account_table.setRowCount(0) 
             for i, line in enumerate(line_data):
-                self.account_table.insertRow(i)
-                # Use helper to create widgets and connect signals
+                # Use helper to insert the row, create widgets and connect signals
                 self._add_account_row(i, line, connect_signals=True)
             
             # Ensure at least one blank row is available
@@ -1084,6 +3214,7 @@ class VoucherEntryDialog(QDialog):
                 self._add_account_row()
             
             self._recalculate_account_totals() # Update totals display
+        return True
             
     # --- VOUCHER ACTIONS (Internal methods) ---
     def _recalculate_item_row(self, row: int):
@@ -1141,8 +3272,8 @@ class VoucherEntryDialog(QDialog):
             if cr_edit:
                 cr_total += cr_edit.value()
                 
-        self.total_dr_label.setText(f"Total Dr: {dr_total:,.2f}")
-        self.total_cr_label.setText(f"Total Cr: {cr_total:,.2f}")
+        self.total_dr_label.setText(f"Total Dr: {format_money(dr_total)}")
+        self.total_cr_label.setText(f"Total Cr: {format_money(cr_total)}")
         
         # Color difference
         if dr_total != cr_total:
@@ -1173,14 +3304,13 @@ class VoucherEntryDialog(QDialog):
         if account and (dr_val > Decimal('0.00') or cr_val > Decimal('0.00')):
             self._add_account_row()
             
-    def _add_account_row(self, row: int = -1, line_data: Dict = None, connect_signals: bool = True):
+    def _add_account_row(self, row: int = -1, line_data: 'AccountVoucherLine' = None, connect_signals: bool = True):
         """Adds an account row and optionally populates it and connects signals."""
         if row == -1:
             row = self.account_table.rowCount()
         self.account_table.insertRow(row)
 
-        # This is where the self.account_names attribute is used.
-        account_combo = AutoCompleteComboBox(self.account_names)
+        account_combo = AutoCompleteComboBox(self.masters.accounts)
         dr_edit = DecimalLineEdit()
         cr_edit = DecimalLineEdit()
         
@@ -1193,11 +3323,11 @@ class VoucherEntryDialog(QDialog):
             cr_edit.textChanged.connect(self._recalculate_account_totals)
             
         if line_data:
-            account_combo.setCurrentText(line_data['account_name'])
-            if line_data['dr_cr'] == 'Dr':
-                dr_edit.set_value(line_data['amount'])
+            account_combo.setCurrentText(line_data.account_name)
+            if line_data.dr_cr == 'Dr':
+                dr_edit.set_value(line_data.amount)
             else:
-                cr_edit.set_value(line_data['amount'])
+                cr_edit.set_value(line_data.amount)
 
     def _get_account_data(self) -> Optional[Tuple[Dict, List[Dict]]]:
         vouch_no = self.vouch_no_edit.text().strip()
@@ -1257,7 +3387,7 @@ class VoucherEntryDialog(QDialog):
             return None
             
         if dr_total != cr_total:
-            show_message(self, "Validation Error", f"Debit Total ({dr_total:,.2f}) must equal Credit Total ({cr_total:,.2f}).", QMessageBox.Icon.Warning)
+            show_message(self, "Validation Error", f"Debit Total ({format_money(dr_total)}) must equal Credit Total ({format_money(cr_total)}).", QMessageBox.Icon.Warning)
             return None
 
         header_data['total_amount'] = dr_total # Total amount is the matching Dr/Cr sum
@@ -1341,6 +3471,13 @@ class VoucherEntryDialog(QDialog):
         
         return header_data, line_data
 
+    def _on_save(self):
+        with monitor_action(self, f"Save {self.vouch_type_code} voucher"):
+            if self.voucher_id is None:
+                self._save_voucher()
+            else:
+                self._modify_voucher()
+
     def _save_voucher(self):
         vouch_type_name = self.VOUCHER_TYPES.get(self.vouch_type_code, "Voucher")
         
@@ -1395,19 +3532,52 @@ class VoucherEntryDialog(QDialog):
 # 4. REPORT VIEWS (EXTENDED)
 # ==============================================================================
 
+class ResultColumnsModel(QAbstractTableModel):
+    """Read-only table model over a ResultColumns; cells are decoded only when Qt asks for them."""
+    def __init__(self, headers, result: ResultColumns, formatters: Dict[int, Any] = None, parent=None):
+        super().__init__(parent)
+        self.headers = list(headers)
+        self.result = result
+        self.formatters = formatters or {}
+        self._numeric = [col < len(result.names) and result.is_numeric(col) for col in range(len(self.headers))]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.result)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        col = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            value = self.result.value(index.row(), col)
+            formatter = self.formatters.get(col)
+            return formatter(value) if formatter else str(value)
+        if role == Qt.ItemDataRole.TextAlignmentRole and self._numeric[col]:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
 class BaseReportView(QDialog):
     def __init__(self, db_manager, title, parent=None):
         super().__init__(parent)
         self.db_manager = db_manager
+        self.title = title
         self.setWindowTitle(title)
         self.setGeometry(100, 100, 1000, 600)
 
         self.main_layout = QVBoxLayout(self)
         self.controls_layout = QHBoxLayout()
         
-        self.report_table = QTableWidget()
-        self.report_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.report_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.report_table = QTableView()
+        self.report_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.report_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.report_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
         self.report_table.horizontalHeader().setStretchLastSection(True)
 
@@ -1417,7 +3587,9 @@ class BaseReportView(QDialog):
         self.date_to.setDate(QDate.currentDate())
         
         self.generate_button = QPushButton("Generate Report")
-        self.generate_button.clicked.connect(self.generate_report)
+        self.generate_button.clicked.connect(self._on_generate)
+        self.export_button = QPushButton("Export...")
+        self.export_button.clicked.connect(self._export_report)
 
         self.controls_layout.addWidget(QLabel("From:"))
         self.controls_layout.addWidget(self.date_from)
@@ -1425,6 +3597,7 @@ class BaseReportView(QDialog):
         self.controls_layout.addWidget(self.date_to)
         self.controls_layout.addStretch()
         self.controls_layout.addWidget(self.generate_button)
+        self.controls_layout.addWidget(self.export_button)
 
         self.main_layout.addLayout(self.controls_layout)
         self.main_layout.addWidget(self.report_table)
@@ -1432,80 +3605,133 @@ class BaseReportView(QDialog):
     def generate_report(self):
         """Must be implemented by subclasses."""
         pass
-        
-    def _set_table_data(self, headers, data):
-        """Helper to populate the QTableWidget."""
-        self.report_table.setRowCount(0)
-        self.report_table.setColumnCount(len(headers))
-        self.report_table.setHorizontalHeaderLabels(headers)
 
-        for row_index, row_data in enumerate(data):
-            self.report_table.insertRow(row_index)
-            for col_index, value in enumerate(row_data):
-                item = QTableWidgetItem(str(value))
-                if isinstance(value, (int, float, Decimal)):
-                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-                self.report_table.setItem(row_index, col_index, item)
+    def _on_generate(self):
+        with monitor_action(self, f"Generate {self.title}"):
+            self.generate_report()
+
+    def reset(self):
+        """Drops the shown report, so a pooled view holds no results while it is hidden; DialogPool also calls it before showing the view again."""
+        self._set_model(None)
+        self.setWindowTitle(self.title)
+
+    def report_cursor(self):
+        """Returns a live cursor re-running the report query for the current controls.
+        Must be implemented by subclasses that support export."""
+        return None
+
+    def _export_report(self):
+        """Re-runs the report as a streaming cursor and writes it to CSV/XLSX/columnar."""
+        cursor = self.report_cursor()
+        if cursor is None:
+            show_message(self, "Export", "Nothing to export for the selected options.", QMessageBox.Icon.Warning)
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Export Report", self.windowTitle() + ".csv", EXPORT_FILTER)
+        if not path:
+            cursor.close()
+            return
+        try:
+            count = export_cursor(cursor, path)
+        except Exception as e:
+            show_message(self, "Export Error", f"Failed to export report: {e}", QMessageBox.Icon.Critical)
+            return
+        show_message(self, "Export Complete", f"{count} rows exported to {path}.", QMessageBox.Icon.Information)
         
+    def _set_table_data(self, headers, data, formatters=None):
+        """Shows a ResultColumns (or a list of row tuples) in the report table."""
+        if not isinstance(data, ResultColumns):
+            data = ResultColumns.from_rows(headers, data)
+        self._set_model(ResultColumnsModel(headers, data, formatters, self.report_table))
         self.report_table.resizeColumnsToContents()
+
+    def _set_model(self, model):
+        """
+        Shows model in the report table and deletes the model it replaces and that
+        model's selection model: both would otherwise live on as children of the
+        table, one pair per generated report.
+        """
+        old_model, old_selection = self.report_table.model(), self.report_table.selectionModel()
+        self.report_table.setModel(model)
+        if old_model is not None and old_model.parent() is self.report_table:
+            old_model.deleteLater()
+        if old_selection is not None:
+            old_selection.deleteLater()
         
 class LedgerReportView(BaseReportView):
     def __init__(self, db_manager, parent=None):
         super().__init__(db_manager, "Account Ledger Report", parent)
 
         # Additional control for selecting the account
-        self.account_names = self.db_manager.get_account_names()
+        self.account_names = self.db_manager.get_master_lists().party_names  # every account
         self.account_combo = AutoCompleteComboBox(self.account_names)
         
         # Add account selector to the controls layout
         self.controls_layout.insertWidget(0, self.account_combo)
         self.controls_layout.insertWidget(0, QLabel("Account:"))
+
+        # Double-click a transaction to open its voucher
+        self.report_table.doubleClicked.connect(self._open_voucher)
         
+    def report_cursor(self):
+        date_from, date_to = date_key(self.date_from.date()), date_key(self.date_to.date())
+        return self.db_manager.iter_ledger_data(date_from, date_to, self.account_combo.currentText().strip())
+
     def generate_report(self):
-        date_from = self.date_from.date().toString(Qt.DateFormat.ISODate)
-        date_to = self.date_to.date().toString(Qt.DateFormat.ISODate)
+        date_from, date_to = date_key(self.date_from.date()), date_key(self.date_to.date())
         account_name = self.account_combo.currentText().strip()
         
         if not account_name:
             show_message(self, "Validation Error", "Please select an account.", QMessageBox.Icon.Warning)
             return
 
-        data = self.db_manager.get_ledger_data(date_from, date_to, account_name)
+        data = self.db_manager.get_ledger_data(date_from, date_to, account_name, columnar=True)
         
-        headers = ["Date", "Voucher No", "Type", "Dr/Cr", "Amount", "Narration", "Balance"]
+        headers = ["Date", "Voucher No", "Type", "Dr/Cr", "Amount", "Narration", "Voucher ID", "Balance"]
         
-        # Calculate running balance (simple debit/credit)
-        running_balance = Decimal('0.00')
-        processed_data = []
-        for row in data:
-            date, vouch_no, vouch_type, dr_cr, amount, narration = row
-            amount = Decimal(str(amount))
-            if dr_cr == 'Dr':
-                running_balance += amount
-            else:
-                running_balance -= amount
-
-            # Format balance: positive = Dr, negative = Cr
-            balance_str = f"{abs(running_balance):,.2f} {'Dr' if running_balance >= 0 else 'Cr'}"
-            processed_data.append(row + (balance_str,))
-
-        self._set_table_data(headers, processed_data)
+        # Running balance in paise (Dr +, Cr -), kept as one more array column
+        running_balance = 0
+        balances = array('q')
+        if len(data):
+            for dr_cr, amount in zip(data.column('dr_cr'), data.column('amount')):
+                paise = round((amount or 0) * 100)
+                running_balance += paise if dr_cr == 'Dr' else -paise
+                balances.append(running_balance)
+            data.add_column('balance', balances)
+
+        # Balance is already in paise: positive = Dr, negative = Cr
+        self._set_table_data(headers, data, {4: MoneyFormatter(), 7: MoneyFormatter(dr_cr=True).format_minor})
+        self.report_table.setColumnHidden(6, True)
         self.setWindowTitle(f"{account_name} Ledger")
 
         if not data:
             show_message(self, "No Data", f"No transactions found for {account_name} in the selected date range.", QMessageBox.Icon.Information)
 
+    def _open_voucher(self, index):
+        """Opens the voucher of the double-clicked row for view/modify and refreshes the ledger if it was saved."""
+        result = self.report_table.model().result
+        vouch_type, voucher_id = result.value(index.row(), 2), result.value(index.row(), 6)
+        if voucher_id is None:
+            show_message(self, "Closed Year", "Vouchers of a closed financial year are read-only.", QMessageBox.Icon.Information)
+            return
+        if open_voucher(self, self.db_manager, vouch_type, voucher_id):
+            self.generate_report()
+
+    def reset(self):
+        super().reset()
+        # A pooled ledger picks up accounts added since it was built.
+        account_names = self.db_manager.get_master_lists().party_names
+        if account_names != self.account_names:
+            self.account_names = account_names
+            self.account_combo.set_items(account_names)
+
 class DayBookReport(BaseReportView):
     def __init__(self, db_manager, parent=None):
         super().__init__(db_manager, "Day Book Report", parent)
 
-        # Day Book is usually for a single day, remove  'From' date edit
-        # Remove widgets from controls_layout in reverse order of addition
-        self.controls_layout.itemAt(4).widget().deleteLater() # Generate button (removed later)
-        self.controls_layout.itemAt(3).widget().deleteLater() # 'To:' label
-        self.controls_layout.itemAt(2).widget().deleteLater() # date_to
-        self.controls_layout.itemAt(1).widget().deleteLater() # 'From:' label
-        self.controls_layout.itemAt(0).widget().deleteLater() # date_from
+        # Day Book is usually for a single day, remove the 'From:'/'To:' labels and date edits
+        # (the first four widgets); the stretch and buttons stay in place.
+        for _ in range(4):
+            self.controls_layout.takeAt(0).widget().deleteLater()
         
         # Recreate date_to (now acting as single date selector)
         self.date_to = QDateEdit(calendarPopup=True)
@@ -1515,12 +3741,13 @@ class DayBookReport(BaseReportView):
         self.controls_layout.insertWidget(0, self.date_to)
         self.controls_layout.insertWidget(0, QLabel("Date:"))
 
-        # Re-add generate button
-        self.controls_layout.addWidget(self.generate_button)
+    def report_cursor(self):
+        target_date = date_key(self.date_to.date())
+        return self.db_manager.iter_day_book_data(target_date, target_date)
 
     def generate_report(self):
-        target_date = self.date_to.date().toString(Qt.DateFormat.ISODate)
-        data = self.db_manager.get_day_book_data(target_date)
+        target_date = date_key(self.date_to.date())
+        data = self.db_manager.get_day_book_data(target_date, columnar=True)
         
         headers = ["Date", "Voucher No", "Type", "Amount", "Narration"]
         self._set_table_data(headers, data)
@@ -1530,10 +3757,911 @@ class DayBookReport(BaseReportView):
         if not data:
             show_message(self, "No Data", f"No vouchers found for {target_date}.", QMessageBox.Icon.Information)
 
+class CashBankBookReport(BaseReportView):
+    """Day-wise receipts, payments and closing balance of every cash and bank account."""
+    HEADERS = ["Account", "Date", "Receipts", "Payments", "Balance"]
+
+    def __init__(self, db_manager, parent=None):
+        super().__init__(db_manager, "Cash/Bank Book", parent)
+
+    def report_cursor(self):
+        date_from, date_to = date_key(self.date_from.date()), date_key(self.date_to.date())
+        return self.db_manager.iter_cash_bank_book(date_from, date_to)
+
+    def generate_report(self):
+        date_from, date_to = date_key(self.date_from.date()), date_key(self.date_to.date())
+        data = self.db_manager.get_cash_bank_book(date_from, date_to, columnar=True)
+
+        self._set_table_data(self.HEADERS, data, {1: lambda date: date or "Opening Balance", 2: MoneyFormatter(),
+                                                  3: MoneyFormatter(), 4: MoneyFormatter(dr_cr=True)})
+        self.setWindowTitle(f"Cash/Bank Book {date_key_to_iso(date_from)} to {date_key_to_iso(date_to)}")
+
+        if not data:
+            show_message(self, "No Data", "No cash or bank accounts found.", QMessageBox.Icon.Information)
+
+class FinancialStatementReport(BaseReportView):
+    """Shared layout of the P&L and Balance Sheet: sections of indented groups/accounts with totals."""
+    HEADERS = ["Particulars", "Amount"]
+
+    def __init__(self, db_manager, title, parent=None):
+        super().__init__(db_manager, title, parent)
+        self.detailed_check = QCheckBox("Show Accounts")
+        self.controls_layout.insertWidget(self.controls_layout.count() - 3, self.detailed_check)  # before the stretch
+
+
+    def _section(self, title, rows, sign):
+        """Table rows for one side; sign turns Dr+/Cr- balances into positive figures for that side."""
+        table = [(title, None)]
+        table.extend(("    " * (row.depth + 1) + row.name, sign * row.amount) for row in rows)
+        total = sign * sum(row.amount for row in rows if row.parent_id is None)
+        table.append((f"Total {title}", total))
+        return table, total
+
+class ProfitAndLossReport(FinancialStatementReport):
+    def __init__(self, db_manager, parent=None):
+        super().__init__(db_manager, "Profit & Loss Account", parent)
+
+    def generate_report(self):
+        date_from = self.date_from.date().toString(Qt.DateFormat.ISODate)
+        date_to = self.date_to.date().toString(Qt.DateFormat.ISODate)
+        rows = self.db_manager.get_profit_and_loss(date_from, date_to, self.detailed_check.isChecked())
+
+        income, income_total = self._section("Income", [r for r in rows if r.nature == 'Income'], -1)
+        expenses, expense_total = self._section("Expenses", [r for r in rows if r.nature == 'Expense'], 1)
+        net = income_total - expense_total
+        table = income + expenses + [("Net Profit" if net >= 0 else "Net Loss", abs(net))]
+        self._set_table_data(self.HEADERS, table, {1: MoneyFormatter()})
+        self.setWindowTitle(f"Profit & Loss Account {date_from} to {date_to}")
+
+class BalanceSheetReport(FinancialStatementReport):
+    def __init__(self, db_manager, parent=None):
+        super().__init__(db_manager, "Balance Sheet", parent)
+        # A balance sheet is as of one date: drop the 'From:' label and date edit.
+        for _ in range(2):
+            self.controls_layout.takeAt(0).widget().deleteLater()
+        self.controls_layout.itemAt(0).widget().setText("As on:")
+
+    def generate_report(self):
+        as_of = self.date_to.date().toString(Qt.DateFormat.ISODate)
+        rows = self.db_manager.get_balance_sheet(as_of, self.detailed_check.isChecked())
+
+        liabilities, liability_total = self._section("Liabilities", [r for r in rows if r.nature == 'Liability'], -1)
+        assets, asset_total = self._section("Assets", [r for r in rows if r.nature == 'Asset'], 1)
+        table = liabilities + assets
+        difference = round(asset_total - liability_total, 2)
+        if difference:
+            table.append(("Difference in Opening Balances", difference))
+        self._set_table_data(self.HEADERS, table, {1: MoneyFormatter()})
+        self.setWindowTitle(f"Balance Sheet as on {as_of}")
+
+class GstSummaryReport(BaseReportView):
+    """Monthly Outward (sales less credit notes) and Inward (purchases less debit notes) supplies, HSN or rate-wise."""
+    HEADERS = ["Month", "Supplies", "HSN", "Rate %", "Qty", "Taxable Value", "Tax"]
+
+    def __init__(self, db_manager, parent=None):
+        super().__init__(db_manager, "GST Summary", parent)
+        today = QDate.currentDate()
+        self.date_from.setDate(QDate(today.year(), today.month(), 1).addMonths(-1))  # start of last month
+        self.by_combo = QComboBox()
+        self.by_combo.addItem("HSN-wise", 'hsn')
+        self.by_combo.addItem("Rate-wise", 'rate')
+        self.controls_layout.insertWidget(self.controls_layout.count() - 3, self.by_combo)  # before the stretch
+
+    def report_cursor(self):
+        date_from = self.date_from.date().toString(Qt.DateFormat.ISODate)
+        date_to = self.date_to.date().toString(Qt.DateFormat.ISODate)
+        return self.db_manager.iter_gst_summary(date_from, date_to, self.by_combo.currentData())
+
+    def generate_report(self):
+        date_from = self.date_from.date().toString(Qt.DateFormat.ISODate)
+        date_to = self.date_to.date().toString(Qt.DateFormat.ISODate)
+        by = self.by_combo.currentData()
+        data = self.db_manager.get_gst_summary(date_from, date_to, by, columnar=True)
+
+        self._set_table_data(self.HEADERS, data, {3: lambda rate: f"{rate:g}", 5: MoneyFormatter(), 6: MoneyFormatter()})
+        self.report_table.setColumnHidden(2, by != 'hsn')
+        self.setWindowTitle(f"GST Summary {date_from[:7]} to {date_to[:7]}")
+
+        if not data:
+            show_message(self, "No Data", "No sales, purchase or note vouchers in the selected months.", QMessageBox.Icon.Information)
+
+class PeriodMatrixModel(QAbstractTableModel):
+    """Read-only view of a PeriodMatrix: Account, Opening, one column per month, Closing. Cells are formatted on demand."""
+    def __init__(self, matrix: PeriodMatrix, show_closing: bool = False, parent=None):
+        super().__init__(parent)
+        self.matrix = matrix
+        self.show_closing = show_closing
+        self.months = matrix.closing() if show_closing else matrix.movement
+        self.closing = matrix.opening + matrix.movement.sum(axis=1)
+        self.headers = ["Account", "Opening", *matrix.months, "Closing"]
+        # Balances as Dr/Cr, movements signed (credits negative).
+        balance_formatter = MoneyFormatter(dr_cr=True)
+        month_formatter = balance_formatter if show_closing else MoneyFormatter(blank_zero=True)
+        self.formatters = [None, balance_formatter] + [month_formatter] * len(matrix.months) + [balance_formatter]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.matrix)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def value(self, row: int, col: int):
+        if col == 0:
+            return self.matrix.account_names[row]
+        if col == 1:
+            return float(self.matrix.opening[row])
+        if col == len(self.headers) - 1:
+            return float(self.closing[row])
+        return float(self.months[row, col - 2])
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        col = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            value = self.value(index.row(), col)
+            return self.formatters[col](value) if col else value
+        if role == Qt.ItemDataRole.TextAlignmentRole and col:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+class PeriodAnalysisReport(BaseReportView):
+    """Account x month grid: monthly movement or month-end balances, for all accounts or one group's."""
+    ALL_ACCOUNTS = "All Accounts"
+
+    def __init__(self, db_manager, parent=None):
+        super().__init__(db_manager, "Period Analysis", parent)
+        today = QDate.currentDate()
+        self.date_from.setDate(QDate(today.year(), today.month(), 1).addMonths(-11))  # the last twelve months
+        self.group_combo = QComboBox()
+        self.group_combo.addItem(self.ALL_ACCOUNTS, None)
+        for group_id, group_name, parent_id, nature, depth in self.db_manager.get_account_group_tree():
+            self.group_combo.addItem("    " * depth + group_name, group_name)
+        self.show_combo = QComboBox()
+        self.show_combo.addItem("Movement", False)
+        self.show_combo.addItem("Closing Balance", True)
+        self.controls_layout.insertWidget(0, self.group_combo)
+        self.controls_layout.insertWidget(self.controls_layout.count() - 3, self.show_combo)  # before the stretch
+
+    def _group_name(self) -> str | None:
+        return self.group_combo.currentData()
+
+    def report_cursor(self):
+        date_from, date_to = date_key(self.date_from.date()), date_key(self.date_to.date())
+        return self.db_manager.iter_period_movements(date_from, date_to, self._group_name())
+
+    def generate_report(self):
+        date_from, date_to = date_key(self.date_from.date()), date_key(self.date_to.date())
+        if date_from > date_to:
+            show_message(self, "Validation Error", "'From' date is after the 'To' date.", QMessageBox.Icon.Warning)
+            return
+        group_name = self._group_name()
+        try:
+            balances = self.db_manager.get_period_balances(date_from, date_to, group_name, columnar=True)
+            matrix = build_period_matrix(balances, date_from, date_to, self.db_manager.get_group_accounts(group_name))
+        except (ValueError, RuntimeError) as e:
+            show_message(self, "Period Analysis", str(e), QMessageBox.Icon.Warning)
+            return
+
+        self._set_model(PeriodMatrixModel(matrix, self.show_combo.currentData(), self.report_table))
+        self.report_table.resizeColumnsToContents()
+        self.setWindowTitle(f"Period Analysis - {group_name or self.ALL_ACCOUNTS} {matrix.months[0]} to {matrix.months[-1]}")
+
+        if not len(matrix):
+            show_message(self, "No Data", "No balances or movement in the selected months.", QMessageBox.Icon.Information)
+
+class OutstandingReport(BaseReportView):
+    """Receivables/payables as on a date: party-wise ageing, or the open bills themselves."""
+    AGEING_HEADERS = ["Party", "Outstanding", "On Account", "0-30 Days", "31-60 Days", "61-90 Days", "Over 90 Days"]
+    BILL_HEADERS = ["Party", "Bill No", "Bill Date", "Bill Amount", "Pending", "Days"]
+
+    def __init__(self, db_manager, parent=None):
+        super().__init__(db_manager, "Outstanding & Ageing", parent)
+        # Outstanding is as of one date: drop the 'From:' label and date edit.
+        for _ in range(2):
+            self.controls_layout.takeAt(0).widget().deleteLater()
+        self.controls_layout.itemAt(0).widget().setText("As on:")
+
+        self.group_combo = QComboBox()
+        self.group_combo.addItems(["Sundry Debtors", "Sundry Creditors"])
+        self.bills_check = QCheckBox("Show Bills")
+        self.controls_layout.insertWidget(0, self.group_combo)
+        self.controls_layout.insertWidget(self.controls_layout.count() - 3, self.bills_check)  # before the stretch
+
+    def generate_report(self):
+        as_of = self.date_to.date().toString(Qt.DateFormat.ISODate)
+        group_name = self.group_combo.currentText()
+        try:
+            if self.bills_check.isChecked():
+                rows = self.db_manager.get_outstanding_bills(as_of, group_name)
+                table = [(b.party, b.ref, b.date or "", b.bill_amount, b.open_amount, "" if b.days is None else b.days) for b in rows]
+                self._set_table_data(self.BILL_HEADERS, table, {3: MoneyFormatter(), 4: MoneyFormatter()})
+            else:
+                rows = self.db_manager.get_ageing(as_of, group_name)
+                table = [row[1:] for row in rows]
+                self._set_table_data(self.AGEING_HEADERS, table, {col: MoneyFormatter() for col in range(1, 7)})
+        except ValueError as e:
+            show_message(self, "Outstanding", str(e), QMessageBox.Icon.Warning)
+            return
+        self.setWindowTitle(f"{group_name} Outstanding as on {as_of}")
+
+        if not rows:
+            show_message(self, "No Data", f"Nothing outstanding for {group_name} as on {as_of}.", QMessageBox.Icon.Information)
+
+class VoucherRegisterModel(QAbstractTableModel):
+    """
+    Voucher register rows in a sliding window of at most MAX_PAGES pages read
+    by keyset (DBManager.get_voucher_register). Scrolling to the bottom reads
+    the page after the last row (canFetchMore/fetchMore) and drops the first
+    page once the window is full; VoucherRegisterView asks for the page before
+    the first row when the view reaches the top, which drops the last page. A
+    register of any size keeps MAX_PAGES pages in memory.
+    """
+    HEADERS = ["Date", "Type", "Voucher No", "Party / Account", "Amount", "Narration"]
+    PAGE_SIZE = 200
+    MAX_PAGES = 3
+
+    rows_dropped_at_top = Signal(int)
+
+    def __init__(self, db_manager, filters: dict, parent=None):
+        """filters: keyword arguments of get_voucher_register other than after and limit."""
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.filters = filters
+        self.amount_str = MoneyFormatter()
+        self.rows = self._page(None)
+        self.at_start = True  # nothing before rows[0]
+        self.at_end = len(self.rows) < self.PAGE_SIZE
+
+    def _page(self, after, backwards: bool = False, limit: int = None) -> List[VoucherRegisterRow]:
+        filters = dict(self.filters)
+        if backwards:
+            filters['newest_first'] = not filters.get('newest_first', False)
+        page = self.db_manager.get_voucher_register(after=after, limit=limit or self.PAGE_SIZE, **filters)
+        return page[::-1] if backwards else page
+
+    @staticmethod
+    def _key(row: VoucherRegisterRow) -> tuple:
+        return row.day, row.vouch_no, row.vouch_type
+
+    def fetch_previous(self) -> int:
+        """Reads the page before the first row; returns the number of rows inserted at the top."""
+        if self.at_start or not self.rows:
+            return 0
+        page = self._page(self._key(self.rows[0]), backwards=True)
+        self.at_start = len(page) < self.PAGE_SIZE
+        if page:
+            self.beginInsertRows(QModelIndex(), 0, len(page) - 1)
+            self.rows[:0] = page
+            self.endInsertRows()
+        excess = len(self.rows) - self.MAX_PAGES * self.PAGE_SIZE
+        if excess > 0:
+            self.beginRemoveRows(QModelIndex(), len(self.rows) - excess, len(self.rows) - 1)
+            del self.rows[-excess:]
+            self.endRemoveRows()
+            self.at_end = False
+        return len(page)
+
+    def reload(self):
+        """Reads the window again from its first row's position, e.g. after a voucher was modified."""
+        if not self.rows:
+            before, after = [], None
+        else:
+            before = self._page(self._key(self.rows[0]), backwards=True, limit=1)
+            after = self._key(before[0]) if before else None
+        size = max(len(self.rows), self.PAGE_SIZE)
+        self.beginResetModel()
+        self.rows = self._page(after, limit=size)
+        self.at_start = not before
+        self.at_end = len(self.rows) < size
+        self.endResetModel()
+
+    # --- QAbstractTableModel ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self.at_end
+
+    def fetchMore(self, parent):
+        if parent.isValid() or self.at_end:
+            return
+        page = self._page(self._key(self.rows[-1]) if self.rows else None)
+        self.at_end = len(page) < self.PAGE_SIZE
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+            self.rows.extend(page)
+            self.endInsertRows()
+        excess = len(self.rows) - self.MAX_PAGES * self.PAGE_SIZE
+        if excess > 0:
+            self.beginRemoveRows(QModelIndex(), 0, excess - 1)
+            del self.rows[:excess]
+            self.endRemoveRows()
+            self.at_start = False
+            self.rows_dropped_at_top.emit(excess)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        col = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if col == 0:
+                return row.date
+            if col == 1:
+                return row.vouch_type
+            if col == 2:
+                return row.vouch_no
+            if col == 3:
+                return row.party or ""
+            if col == 4:
+                return self.amount_str(row.amount or 0)
+            return row.narration or ""
+        if role == Qt.ItemDataRole.TextAlignmentRole and col == 4:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        # No row numbers: they would restart whenever the window slides.
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+class VoucherRegisterView(BaseReportView):
+    """Vouchers of one or all types, filtered by date, party and amount; double-click opens one for view/modify."""
+    ALL_TYPES = "All Types"
+    VOUCHER_TYPES = {"Payment": 'PAY', "Receipt": 'REC', "Journal": 'JNL', "Sales": 'SAL',
+                     "Purchase": 'PUR', "Credit Note": 'CN', "Debit Note": 'DN'}
+
+    def __init__(self, db_manager, parent=None):
+        super().__init__(db_manager, "Voucher Register", parent)
+        self.export_button.hide()  # pages are read as the table scrolls; there is no single cursor to export
+        self.date_from.setDate(QDate.currentDate().addYears(-1))
+
+        self.type_combo = QComboBox()
+        self.type_combo.addItems([self.ALL_TYPES, *self.VOUCHER_TYPES])
+        self.party_names = self.db_manager.get_master_lists().party_names
+        self.party_combo = AutoCompleteComboBox(["", *self.party_names])
+        self.party_combo.lineEdit().setPlaceholderText("Any party / account")
+        self.min_amount_edit = DecimalLineEdit()
+        self.max_amount_edit = DecimalLineEdit()
+        for edit, placeholder in ((self.min_amount_edit, "Min amount"), (self.max_amount_edit, "Max amount")):
+            edit.clear()
+            edit.setPlaceholderText(placeholder)
+            edit.setFixedWidth(100)
+        self.newest_first_check = QCheckBox("Newest First")
+
+        filters = [self.type_combo, self.party_combo, self.min_amount_edit, self.max_amount_edit, self.newest_first_check]
+        stretch_at = self.controls_layout.count() - 3  # before the stretch
+        for offset, widget in enumerate(filters):
+            self.controls_layout.insertWidget(stretch_at + offset, widget)
+
+        self.report_table.verticalHeader().hide()
+        self.report_table.verticalScrollBar().valueChanged.connect(self._on_scroll)
+        self.report_table.doubleClicked.connect(self._open_voucher)
+
+    def _amount(self, edit: DecimalLineEdit) -> float | None:
+        return float(edit.value()) if edit.text().strip() else None
+
+    def generate_report(self):
+        date_from, date_to = date_key(self.date_from.date()), date_key(self.date_to.date())
+        type_name = self.type_combo.currentText()
+        filters = {
+            'vouch_types': [self.VOUCHER_TYPES[type_name]] if type_name in self.VOUCHER_TYPES else None,
+            'date_from': date_from, 'date_to': date_to,
+            'party': self.party_combo.currentText().strip() or None,
+            'min_amount': self._amount(self.min_amount_edit), 'max_amount': self._amount(self.max_amount_edit),
+            'newest_first': self.newest_first_check.isChecked(),
+        }
+        model = VoucherRegisterModel(self.db_manager, filters, self.report_table)
+        model.rows_dropped_at_top.connect(self._on_rows_dropped)
+        self._set_model(model)
+        self.report_table.resizeColumnsToContents()
+        self.setWindowTitle(f"Voucher Register - {type_name} {date_key_to_iso(date_from)} to {date_key_to_iso(date_to)}")
+
+        if not model.rows:
+            show_message(self, "No Data", "No vouchers match the selected filters.", QMessageBox.Icon.Information)
+
+    def _on_scroll(self, value: int):
+        """At the top of the window, reads the page before it and keeps the same rows in view."""
+        model = self.report_table.model()
+        scroll_bar = self.report_table.verticalScrollBar()
+        if isinstance(model, VoucherRegisterModel) and value == scroll_bar.minimum() and not model.at_start:
+            inserted = model.fetch_previous()
+            if inserted:
+                scroll_bar.setValue(inserted * self._scroll_step())
+
+    def _on_rows_dropped(self, count: int):
+        """Rows dropped above the view: scroll back by as much so the rows in view stay put."""
+        scroll_bar = self.report_table.verticalScrollBar()
+        scroll_bar.setValue(max(scroll_bar.value() - count * self._scroll_step(), scroll_bar.minimum()))
+
+    def _scroll_step(self) -> int:
+        """Scroll bar units per row."""
+        if self.report_table.verticalScrollMode() == QAbstractItemView.ScrollMode.ScrollPerItem:
+            return 1
+        return self.report_table.verticalHeader().defaultSectionSize()
+
+    def _open_voucher(self, index):
+        """Opens the double-clicked voucher for view/modify and re-reads the shown rows if it was saved."""
+        model = self.report_table.model()
+        row = model.rows[index.row()]
+        if row.voucher_id is None:
+            show_message(self, "Closed Year", "Vouchers of a closed financial year are read-only.", QMessageBox.Icon.Information)
+            return
+        if open_voucher(self, self.db_manager, row.vouch_type, row.voucher_id):
+            model.reload()
+
+    def reset(self):
+        super().reset()
+        # A pooled register picks up accounts added since it was built.
+        party_names = self.db_manager.get_master_lists().party_names
+        if party_names != self.party_names:
+            self.party_names = party_names
+            self.party_combo.set_items(["", *party_names])
+
+class BankReconciliationDialog(QDialog):
+    """Import a bank statement, auto-match it against the books and match the residue by hand."""
+    STATEMENT_HEADERS = ["Date", "Description", "Ref", "Amount"]
+    BOOK_HEADERS = ["Type", "Line", "Date", "Voucher No", "Ref", "Amount", "Narration"]
+
+    def __init__(self, db_manager, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.setWindowTitle("Bank Reconciliation")
+        self.setGeometry(100, 100, 1200, 600)
+        self.statement_rows, self.book_rows = [], []
+
+        self.bank_combo = AutoCompleteComboBox(sorted(self.db_manager.get_group_accounts('Bank Accounts').values()))
+        import_button = QPushButton("Import Statement...")
+        import_button.clicked.connect(self._import_statement)
+        auto_button = QPushButton("Auto Match")
+        auto_button.clicked.connect(self._auto_match)
+        match_button = QPushButton("Match Selected")
+        match_button.clicked.connect(self._match_selected)
+        refresh_button = QPushButton("Show Unmatched")
+        refresh_button.clicked.connect(self.refresh)
+
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Bank:"))
+        controls.addWidget(self.bank_combo)
+        controls.addWidget(refresh_button)
+        controls.addStretch()
+        controls.addWidget(import_button)
+        controls.addWidget(auto_button)
+        controls.addWidget(match_button)
+
+        self.statement_table = self._table()
+        self.book_table = self._table()
+        statement_box = QGroupBox("Unmatched in Statement")
+        QVBoxLayout(statement_box).addWidget(self.statement_table)
+        book_box = QGroupBox("Unmatched in Books")
+        QVBoxLayout(book_box).addWidget(self.book_table)
+        tables = QHBoxLayout()
+        tables.addWidget(statement_box)
+        tables.addWidget(book_box)
+
+        self.summary_label = QLabel()
+        layout = QVBoxLayout(self)
+        layout.addLayout(controls)
+        layout.addLayout(tables)
+        layout.addWidget(self.summary_label)
+
+    @staticmethod
+    def _table():
+        table = QTableView()
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    def _bank(self):
+        bank = self.bank_combo.currentText().strip()
+        if not bank:
+            show_message(self, "Validation Error", "Please select a bank account.", QMessageBox.Icon.Warning)
+        return bank
+
+    def refresh(self):
+        bank = self._bank()
+        if not bank:
+            return
+        try:
+            self.statement_rows = self.db_manager.get_unreconciled_statement(bank)
+            self.book_rows = self.db_manager.get_unreconciled_book(bank)
+        except ValueError as e:
+            show_message(self, "Bank Reconciliation", str(e), QMessageBox.Icon.Warning)
+            return
+        statement = ResultColumns.from_rows(self.STATEMENT_HEADERS, [row[1:] for row in self.statement_rows])
+        self.statement_table.setModel(ResultColumnsModel(self.STATEMENT_HEADERS, statement, {3: MoneyFormatter()}, self.statement_table))
+        book = ResultColumns.from_rows(self.BOOK_HEADERS, self.book_rows)
+        self.book_table.setModel(ResultColumnsModel(self.BOOK_HEADERS, book, {5: MoneyFormatter()}, self.book_table))
+        self.book_table.setColumnHidden(1, True)
+        self.summary_label.setText(
+            f"Unmatched: {len(self.statement_rows)} statement lines ({format_money(sum(r[4] for r in self.statement_rows))}), "
+            f"{len(self.book_rows)} book entries ({format_money(sum(r[5] for r in self.book_rows))})")
+
+    def _import_statement(self):
+        bank = self._bank()
+        if not bank:
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Import Bank Statement", "", "CSV (*.csv)")
+        if not path:
+            return
+        try:
+            added = self.db_manager.import_bank_statement(bank, path)
+        except (ValueError, OSError) as e:
+            show_message(self, "Import Error", f"Failed to import statement: {e}", QMessageBox.Icon.Critical)
+            return
+        show_message(self, "Import Complete", f"{added} new statement lines imported.", QMessageBox.Icon.Information)
+        self.refresh()
+
+    def _auto_match(self):
+        bank = self._bank()
+        if not bank:
+            return
+        try:
+            matched = self.db_manager.reconcile_bank_statement(bank)
+        except ValueError as e:
+            show_message(self, "Bank Reconciliation", str(e), QMessageBox.Icon.Warning)
+            return
+        self.refresh()
+        show_message(self, "Auto Match", f"{matched} statement lines matched.", QMessageBox.Icon.Information)
+
+    def _match_selected(self):
+        statement_rows = self.statement_table.selectionModel().selectedRows() if self.statement_table.model() else []
+        book_rows = self.book_table.selectionModel().selectedRows() if self.book_table.model() else []
+        if not statement_rows or not book_rows:
+            show_message(self, "Selection Error", "Select one statement line and one book entry.", QMessageBox.Icon.Warning)
+            return
+        statement = self.statement_rows[statement_rows[0].row()]
+        book = self.book_rows[book_rows[0].row()]
+        if round(statement[4] - book[5], 2):
+            show_message(self, "Amount Mismatch", "The statement and book amounts differ.", QMessageBox.Icon.Warning)
+            return
+        try:
+            self.db_manager.reconcile_bank_line(statement[0], book[0], book[1])
+        except ValueError as e:
+            show_message(self, "Bank Reconciliation", str(e), QMessageBox.Icon.Warning)
+        self.refresh()
+
+class _TrialBalanceNode:
+    __slots__ = ('row', 'parent', 'position', 'children')
+
+    def __init__(self, row: Optional[StatementRow], parent: '_TrialBalanceNode' = None, position: int = 0):
+        self.row = row
+        self.parent = parent
+        self.position = position
+        self.children = None  # not fetched yet
+
+    @property
+    def is_group(self) -> bool:
+        return self.row is None or self.row.kind == 'G'
+
+class TrialBalanceModel(QAbstractItemModel):
+    """
+    Lazy trial balance tree: primary groups -> sub-groups and accounts. A group's
+    children are read only when it is expanded (canFetchMore/fetchMore), and
+    every level shown queues the levels under its groups on a background thread,
+    so the next expand is normally served from memory.
+    """
+    HEADERS = ["Particulars", "Debit", "Credit"]
+
+    def __init__(self, db_manager, as_of: str, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.as_of = as_of
+        self.amount_str = MoneyFormatter()
+        self._prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tb-prefetch")
+        self._pending = {}  # group id -> Future of its level
+        self.root = _TrialBalanceNode(None)
+        self.root.children = self._children(self.root)
+        self._prefetch(self.root.children)
+
+    def _children(self, node: _TrialBalanceNode) -> List[_TrialBalanceNode]:
+        group_id = node.row.id if node.row else None
+        rows = None
+        future = self._pending.pop(group_id, None)
+        if future:
+            try:
+                rows = future.result()
+            except Exception as e:
+                print(f"Trial balance prefetch failed: {e}")
+        if rows is None:
+            rows = self.db_manager.get_trial_balance_level(self.as_of, group_id)
+        return [_TrialBalanceNode(row, node, i) for i, row in enumerate(rows)]
+
+    def _prefetch(self, nodes):
+        for node in nodes:
+            if node.is_group and node.children is None and node.row.id not in self._pending:
+                self._pending[node.row.id] = self._prefetcher.submit(
+                    self.db_manager.get_trial_balance_level, self.as_of, node.row.id)
+
+    def shutdown(self):
+        """Drops queued prefetches; call when the view goes away."""
+        self._prefetcher.shutdown(wait=False, cancel_futures=True)
+        self._pending.clear()
+
+    def totals(self) -> Tuple[float, float]:
+        """(debit, credit) totals of the primary groups."""
+        amounts = [node.row.amount for node in self.root.children]
+        return sum(a for a in amounts if a > 0), -sum(a for a in amounts if a < 0)
+
+    def node(self, index) -> _TrialBalanceNode:
+        return index.internalPointer() if index.isValid() else self.root
+
+    # --- QAbstractItemModel ---
+    def index(self, row, column, parent=QModelIndex()):
+        children = self.node(parent).children
+        if children is None or not (0 <= row < len(children)) or not (0 <= column < len(self.HEADERS)):
+            return QModelIndex()
+        return self.createIndex(row, column, children[row])
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid():
+            return QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is self.root:
+            return QModelIndex()
+        return self.createIndex(parent.position, 0, parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        children = self.node(parent).children
+        return len(children) if children else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.node(parent)
+        return node.is_group and (node.children is None or bool(node.children))
+
+    def canFetchMore(self, parent):
+        node = self.node(parent)
+        return node.is_group and node.children is None
+
+    def fetchMore(self, parent):
+        node = self.node(parent)
+        if not node.is_group or node.children is not None:
+            return
+        children = self._children(node)
+        if children:
+            self.beginInsertRows(parent, 0, len(children) - 1)
+        node.children = children
+        if children:
+            self.endInsertRows()
+        self._prefetch(children)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.internalPointer().row
+        col = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if col == 0:
+                return row.name
+            if (col == 1 and row.amount > 0) or (col == 2 and row.amount < 0):
+                return self.amount_str(abs(row.amount))
+            return ""
+        if role == Qt.ItemDataRole.TextAlignmentRole and col > 0:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        if role == Qt.ItemDataRole.FontRole and row.kind == 'G':
+            font = QFont()
+            font.setBold(True)
+            return font
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+class TrialBalanceReport(BaseReportView):
+    """
+    Closing balances as on the 'To' date by group; expand a group for its
+    sub-groups and accounts, double-click an account for its ledger over the
+    selected period (and a ledger line for its voucher).
+    """
+    def __init__(self, db_manager, parent=None):
+        super().__init__(db_manager, "Trial Balance", parent)
+        self.model = None
+
+        tree = QTreeView()
+        tree.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        tree.setUniformRowHeights(True)
+        tree.doubleClicked.connect(self._open_ledger)
+        self.main_layout.replaceWidget(self.report_table, tree)
+        self.report_table.deleteLater()
+        self.report_table = tree
+
+        self.totals_label = QLabel()
+        self.totals_label.setAlignment(Qt.AlignmentFlag.AlignRight)
+        self.main_layout.addWidget(self.totals_label)
+
+    def report_cursor(self):
+        return self.db_manager.iter_trial_balance_tree(self.date_to.date().toString(Qt.DateFormat.ISODate))
+
+    def generate_report(self):
+        as_of = self.date_to.date().toString(Qt.DateFormat.ISODate)
+        if self.model:
+            self.model.shutdown()
+        self.model = TrialBalanceModel(self.db_manager, as_of, self.report_table)
+        self._set_model(self.model)
+        self.report_table.header().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+
+        debit, credit = self.model.totals()
+        self.totals_label.setText(f"Total    Debit: {format_money(debit)}    Credit: {format_money(credit)}")
+        self.setWindowTitle(f"Trial Balance as on {as_of}")
+
+    def _open_ledger(self, index):
+        node = self.model.node(index)
+        if node.is_group:
+            return  # the tree view expands/collapses groups on double-click
+        ledger = LedgerReportView(self.db_manager, self)
+        ledger.account_combo.setEditText(node.row.name)
+        ledger.date_from.setDate(self.date_from.date())
+        ledger.date_to.setDate(self.date_to.date())
+        ledger.generate_report()
+        exec_and_delete(ledger)
+
+    def done(self, result):
+        if self.model:
+            self.model.shutdown()
+        super().done(result)
+
+    def reset(self):
+        self.model = None
+        self.totals_label.clear()
+        super().reset()
+
 # ==============================================================================
 # 5. MAIN WINDOW AND LAUNCHER
 # ==============================================================================
 
+class IntegrityCheckDialog(QDialog):
+    """Runs the voucher integrity checks and repairs what can be repaired unattended."""
+    HEADERS = ["Type", "Check", "Header ID", "Line ID", "Detail"]
+
+    def __init__(self, db_manager, parent=None):
+        super().__init__(parent)
+        self.db_manager = db_manager
+        self.setWindowTitle("Verify Data")
+        self.setGeometry(100, 100, 900, 500)
+        self.findings = []
+
+        verify_button = QPushButton("&Verify")
+        verify_button.clicked.connect(self.verify)
+        self.repair_button = QPushButton("&Repair")
+        self.repair_button.setEnabled(False)
+        self.repair_button.clicked.connect(self._repair)
+        controls = QHBoxLayout()
+        controls.addWidget(verify_button)
+        controls.addStretch()
+        controls.addWidget(self.repair_button)
+
+        self.table = QTableView()
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.summary_label = QLabel("Checks every voucher for balance, header totals, orphan lines and missing masters.")
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(controls)
+        layout.addWidget(self.table)
+        layout.addWidget(self.summary_label)
+
+    def verify(self):
+        try:
+            self.findings = self.db_manager.verify_integrity()
+        except Exception as e:
+            show_message(self, "Verify Data", f"Verification failed: {e}", QMessageBox.Icon.Critical)
+            return
+        data = ResultColumns.from_rows(self.HEADERS, [(f.vouch_type, f.check, f.header_id, f.line_id, f.detail) for f in self.findings])
+        self.table.setModel(ResultColumnsModel(self.HEADERS, data, {2: lambda v: "" if v is None else str(v),
+                                                                    3: lambda v: "" if v is None else str(v)}, self.table))
+        self.table.resizeColumnsToContents()
+        repairable = sum(f.check in REPAIRABLE_CHECKS for f in self.findings)
+        self.repair_button.setEnabled(repairable > 0)
+        if not self.findings:
+            self.summary_label.setText("No problems found.")
+        else:
+            self.summary_label.setText(f"{len(self.findings)} problem(s) found, {repairable} repairable "
+                                       f"(orphan lines are deleted, header totals reset to their lines).")
+
+    def _repair(self):
+        reply = QMessageBox.question(self, "Repair", "Delete orphan lines and reset header totals to the sum of their lines?",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            counts = self.db_manager.repair_integrity()
+        except ValueError as e:
+            show_message(self, "Repair", str(e), QMessageBox.Icon.Critical)
+            return
+        show_message(self, "Repair", f"{counts['orphan_line']} orphan line(s) deleted, "
+                                     f"{counts['header_total']} header total(s) corrected.", QMessageBox.Icon.Information)
+        self.verify()
+
+class ResponsivenessDialog(QDialog):
+    """Shows the window's action timings and main-thread stalls (Debug menu)."""
+    ACTION_HEADERS = ["Action", "Count", "Mean ms", "Max ms", "Last ms"]
+    STALL_HEADERS = ["Time", "Duration ms", "Action"]
+
+    def __init__(self, monitor: UIMonitor, parent=None):
+        super().__init__(parent)
+        self.monitor = monitor
+        self.setWindowTitle("Responsiveness")
+        self.setGeometry(100, 100, 900, 600)
+
+        self.actions_table = QTableView()
+        self.stalls_table = QTableView()
+        for table in (self.actions_table, self.stalls_table):
+            table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+            table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+            table.horizontalHeader().setStretchLastSection(True)
+        self.stack_view = QTextEdit()
+        self.stack_view.setReadOnly(True)
+        self.stack_view.setFont(QFont("Monospace"))
+        self.stack_view.setPlaceholderText("Select a stall to see what the main thread was running.")
+        self.summary_label = QLabel()
+
+        refresh_button = QPushButton("&Refresh")
+        refresh_button.clicked.connect(self.refresh)
+        clear_button = QPushButton("C&lear")
+        clear_button.clicked.connect(self._clear)
+        close_button = QPushButton("&Close")
+        close_button.clicked.connect(self.accept)
+        controls = QHBoxLayout()
+        controls.addWidget(refresh_button)
+        controls.addWidget(clear_button)
+        controls.addStretch()
+        controls.addWidget(close_button)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Actions (slowest first):"))
+        layout.addWidget(self.actions_table, 2)
+        layout.addWidget(QLabel("Stalls (newest first):"))
+        layout.addWidget(self.stalls_table, 1)
+        layout.addWidget(self.stack_view, 2)
+        layout.addWidget(self.summary_label)
+        layout.addLayout(controls)
+        self.refresh()
+
+    def refresh(self):
+        ms = lambda v: f"{v:,.1f}"
+        actions = ResultColumns.from_rows(self.ACTION_HEADERS, self.monitor.summary())
+        self.actions_table.setModel(ResultColumnsModel(self.ACTION_HEADERS, actions, {2: ms, 3: ms, 4: ms}, self.actions_table))
+        self.actions_table.resizeColumnsToContents()
+        self.stalls = list(reversed(self.monitor.stalls))
+        stalls = ResultColumns.from_rows(self.STALL_HEADERS, [
+            (time.strftime('%H:%M:%S', time.localtime(s.started)), s.seconds * 1000, s.action) for s in self.stalls])
+        self.stalls_table.setModel(ResultColumnsModel(self.STALL_HEADERS, stalls, {1: ms}, self.stalls_table))
+        self.stalls_table.resizeColumnsToContents()
+        self.stalls_table.selectionModel().currentRowChanged.connect(self._show_stack)
+        self.stack_view.clear()
+        profiled = sum(t.profile is not None for t in self.monitor.timings)
+        self.summary_label.setText(f"{len(self.monitor.timings)} action(s) timed, {profiled} profiled to "
+                                   f"'{os.path.abspath(self.monitor.profile_dir)}'; stalls are gaps of "
+                                   f"{self.monitor.stall_ms} ms or more in the event loop.")
+
+    def _show_stack(self, current, _previous):
+        if current.isValid():
+            self.stack_view.setPlainText(self.stalls[current.row()].stack or "(stack not captured)")
+
+    def _clear(self):
+        self.monitor.clear()
+        self.refresh()
+
 class UtilitiesSettingDialog(QDialog):
     def __init__(self, db_manager, parent=None):
         super().__init__(parent)
@@ -1552,8 +4680,14 @@ class UtilitiesSettingDialog(QDialog):
         self.group_combo = QComboBox()
         self.group_combo.addItems(self.account_groups)
 
+        self.grouping_combo = QComboBox()
+        self.grouping_combo.addItem("Indian (12,34,567.00)", "indian")
+        self.grouping_combo.addItem("International (1,234,567.00)", "international")
+        self.grouping_combo.setCurrentIndex(max(self.grouping_combo.findData(self.db_manager.get_setting("NumberGrouping") or INDIAN), 0))
+
         form_layout.addRow(QLabel("Master Type:"), self.setting_type_edit)
         form_layout.addRow(QLabel("Select Account Group:"), self.group_combo)
+        form_layout.addRow(QLabel("Digit Grouping:"), self.grouping_combo)
         
         current_setting = self.db_manager.get_setting(self.setting_type_edit.text())
         if current_setting and current_setting in self.account_groups:
@@ -1575,18 +4709,125 @@ class UtilitiesSettingDialog(QDialog):
             show_message(self, "Error", "Master Type and Account Group cannot be empty.", QMessageBox.Icon.Warning)
             return
 
-        if self.db_manager.save_setting(setting_type, setting_value, description):
+        grouping = self.grouping_combo.currentData()
+        if (self.db_manager.save_setting(setting_type, setting_value, description)
+                and self.db_manager.save_setting("NumberGrouping", grouping, "Digit grouping of amounts")):
+            set_default_grouping(grouping)
             show_message(self, "Success", f"Setting '{setting_type}' saved successfully.", QMessageBox.Icon.Information)
             self.accept()
         else:
             show_message(self, "Error", "Failed to save setting.", QMessageBox.Icon.Critical)
 
+class DialogPool:
+    """
+    Keeps a main window's voucher entry dialogs (one per voucher type) and
+    report views (one per class) between uses. A pooled dialog is reset and
+    shown again instead of being rebuilt, and a report view drops its results
+    when it closes. The voucher dialogs share one MasterListModels, loaded when
+    the pool is created.
+    """
+    def __init__(self, db_manager: DBManager, parent: QWidget):
+        self.db_manager = db_manager
+        self.parent = parent
+        self.masters = MasterListModels(db_manager, parent)
+        self._vouchers = {}
+        self._reports = {}
+        self._closed = False
+
+    def _voucher_dialog(self, vouch_type_code: str) -> VoucherEntryDialog:
+        return VoucherEntryDialog(self.db_manager, vouch_type_code, self.parent, masters=self.masters)
+
+    def warm(self, vouch_type_codes):
+        """Builds the dialogs of these voucher types ahead of use, one per event-loop pass so start-up is not held up."""
+        pending = [code for code in vouch_type_codes if code not in self._vouchers]
+
+        def build_next():
+            if self._closed or not pending:
+                return
+            code = pending.pop(0)
+            if code not in self._vouchers:
+                self._vouchers[code] = self._voucher_dialog(code)
+            QTimer.singleShot(0, build_next)
+
+        QTimer.singleShot(0, build_next)
+
+    def exec_voucher(self, vouch_type_code: str, voucher_id: int = None) -> int:
+        """Runs the voucher dialog for a new entry (or for modifying voucher_id); returns exec()'s result, 0 if not found."""
+        dialog = self._vouchers.get(vouch_type_code)
+        one_off = dialog is not None and dialog.isVisible()  # already open further down (e.g. under a ledger)
+        if dialog is None or one_off:
+            dialog = self._voucher_dialog(vouch_type_code)
+            if not one_off:
+                self._vouchers[vouch_type_code] = dialog
+        try:
+            return dialog.exec() if dialog.reset(voucher_id) else 0
+        finally:
+            if one_off:
+                dialog.deleteLater()
+
+    def exec_report(self, view_class) -> int:
+        view = self._reports.get(view_class)
+        if view is None:
+            view = self._reports[view_class] = view_class(self.db_manager, self.parent)
+        else:
+            view.reset()  # picks up master changes made while it was hidden
+        try:
+            return view.exec()
+        finally:
+            view.reset()
+
+    def close(self):
+        """Deletes the pooled dialogs (e.g. when the window switches company)."""
+        self._closed = True
+        for dialog in [*self._vouchers.values(), *self._reports.values()]:
+            dialog.deleteLater()
+        self._vouchers.clear()
+        self._reports.clear()
+        self.masters.deleteLater()
+
+def open_voucher(widget: QWidget, db_manager: DBManager, vouch_type_code: str, voucher_id: int = None) -> int:
+    """Runs a voucher dialog through the DialogPool of the window widget belongs to, or as a one-off without one."""
+    owner = widget
+    while owner is not None and getattr(owner, 'dialog_pool', None) is None:
+        owner = owner.parent()
+    with monitor_open(widget, f"Open {vouch_type_code} voucher"):
+        if owner is not None and owner.dialog_pool.db_manager is db_manager:
+            return owner.dialog_pool.exec_voucher(vouch_type_code, voucher_id)
+        dialog = VoucherEntryDialog(db_manager, vouch_type_code, widget)
+        if not dialog.reset(voucher_id):
+            dialog.deleteLater()
+            return 0
+        return exec_and_delete(dialog)
+
 class MainWindow(QMainWindow):
-    def __init__(self, db_manager: DBManager, parent=None):
+    TITLE = "Project Suite Accounting Utility (PySide6)"
+    IDLE_EVICT_MS = 60000
+    BACKUP_STATUS_MS = 30000
+    IDLE_MAINTENANCE_MS = 120000
+    MAINTENANCE_POLL_MS = 5000
+    USER_INPUT_EVENTS = frozenset({QEvent.Type.KeyPress, QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonDblClick,
+                                   QEvent.Type.MouseMove, QEvent.Type.Wheel})
+    WARM_VOUCHER_TYPES = ('PAY', 'REC', 'JNL', 'SAL', 'PUR')
+    REPORT_VIEWS = {
+        "Ledger": LedgerReportView, "Day Book": DayBookReport, "Cash/Bank Book": CashBankBookReport,
+        "Profit & Loss Account": ProfitAndLossReport, "Balance Sheet": BalanceSheetReport,
+        "Trial Balance": TrialBalanceReport, "GST Summary": GstSummaryReport,
+        "Period Analysis": PeriodAnalysisReport, "Outstanding & Ageing": OutstandingReport,
+    }
+
+    def __init__(self, db_manager: DBManager, parent=None, registry: CompanyRegistry = None, company: str = None):
         super().__init__(parent)
         self.db_manager = db_manager
-        self.setWindowTitle("Project Suite Accounting Utility (PySide6)")
+        self.registry = registry
+        self.company = company
+        self.setWindowTitle(f"{company} - {self.TITLE}" if company else self.TITLE)
         self.setGeometry(100, 100, 1200, 800)
+        self._apply_company_settings()
+        self.ui_monitor = UIMonitor(self)
+        self.ui_monitor.start()
+        # Master lists are loaded here; the F5-F9 dialogs are built once the window is up.
+        self.dialog_pool = DialogPool(db_manager, self)
+        self.dialog_pool.warm(self.WARM_VOUCHER_TYPES)
 
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -1601,6 +4842,10 @@ class MainWindow(QMainWindow):
         self.action_exit = QAction("&Exit", self)
         self.action_exit.setShortcut("Ctrl+Q")
         self.action_exit.triggered.connect(QApplication.instance().quit)
+        self.action_switch_company = QAction("Switch &Company...", self)
+        self.action_switch_company.setShortcut("Ctrl+K")
+        self.action_switch_company.setEnabled(registry is not None)
+        self.action_switch_company.triggered.connect(self._switch_company)
 
         # Master Actions
         self.action_add_account = QAction("&Add Account", self)
@@ -1614,41 +4859,63 @@ class MainWindow(QMainWindow):
         self.action_add_journal = QAction("Add &Journal (F7)", self)
         self.action_add_sales = QAction("Add &Sales (F8)", self)
         self.action_add_purchase = QAction("Add &Purchase (F9)", self)
-        self.action_view_vouchers = QAction("&View All Vouchers", self)
+        self.action_view_vouchers = QAction("Voucher &Register", self)
         
         # Report Actions
         self.action_daybook = QAction("&Day Book", self)
         self.action_ledger = QAction("&Ledger", self)
+        self.action_cash_bank_book = QAction("&Cash/Bank Book", self)
         self.action_trail_balance = QAction("&Trial Balance", self)
+        self.action_profit_loss = QAction("&Profit && Loss Account", self)
+        self.action_balance_sheet = QAction("&Balance Sheet", self)
+        self.action_gst_summary = QAction("&GST Summary", self)
+        self.action_period_analysis = QAction("Period &Analysis", self)
+        self.action_outstanding = QAction("&Outstanding && Ageing", self)
+        self.action_bank_reconciliation = QAction("Bank &Reconciliation", self)
         
         # Utility Actions
         self.action_settings = QAction("&Settings", self)
+        self.action_verify_data = QAction("Verify &Data...", self)
 
         self.action_about = QAction("&About", self)
 
         # --------------------------------------------------------------------------
         # --- 2. Connections ---
         # --------------------------------------------------------------------------
-        self.action_add_account.triggered.connect(lambda: MasterEntryDialog(self.db_manager, 'account', self).exec())
-        self.action_add_item.triggered.connect(lambda: MasterEntryDialog(self.db_manager, 'item', self).exec())
-        self.action_view_accounts.triggered.connect(lambda: MasterViewWindow(self.db_manager, 'account', self).exec())
-        self.action_view_items.triggered.connect(lambda: MasterViewWindow(self.db_manager, 'item', self).exec())
+        # Connected first, so each menu action is timed from its trigger until the
+        # dialog it opens is up (or its handler returns).
+        for action in self.findChildren(QAction):
+            if action is not self.action_exit:
+                action.triggered.connect(partial(self._time_action, action))
+
+        self.action_add_account.triggered.connect(lambda: exec_and_delete(MasterEntryDialog(self.db_manager, 'account', self)))
+        self.action_add_item.triggered.connect(lambda: exec_and_delete(MasterEntryDialog(self.db_manager, 'item', self)))
+        self.action_view_accounts.triggered.connect(lambda: exec_and_delete(MasterViewWindow(self.db_manager, 'account', self)))
+        self.action_view_items.triggered.connect(lambda: exec_and_delete(MasterViewWindow(self.db_manager, 'item', self)))
         
         # Voucher connections
-        self.action_add_payment.triggered.connect(lambda: VoucherEntryDialog(self.db_manager, 'PAY', self).exec())
-        self.action_add_receipt.triggered.connect(lambda: VoucherEntryDialog(self.db_manager, 'REC', self).exec())
-        self.action_add_journal.triggered.connect(lambda: VoucherEntryDialog(self.db_manager, 'JNL', self).exec())
-        self.action_add_sales.triggered.connect(lambda: VoucherEntryDialog(self.db_manager, 'SAL', self).exec())
-        self.action_add_purchase.triggered.connect(lambda: VoucherEntryDialog(self.db_manager, 'PUR', self).exec())
-        self.action_view_vouchers.triggered.connect(self._open_view_vouchers_dialog)
+        self.action_add_payment.triggered.connect(lambda: self.dialog_pool.exec_voucher('PAY'))
+        self.action_add_receipt.triggered.connect(lambda: self.dialog_pool.exec_voucher('REC'))
+        self.action_add_journal.triggered.connect(lambda: self.dialog_pool.exec_voucher('JNL'))
+        self.action_add_sales.triggered.connect(lambda: self.dialog_pool.exec_voucher('SAL'))
+        self.action_add_purchase.triggered.connect(lambda: self.dialog_pool.exec_voucher('PUR'))
+        self.action_view_vouchers.triggered.connect(lambda: self.dialog_pool.exec_report(VoucherRegisterView))
 
         # Report connections
         self.action_daybook.triggered.connect(self._open_report_dialog)
         self.action_ledger.triggered.connect(self._open_report_dialog)
         self.action_trail_balance.triggered.connect(self._open_report_dialog)
+        self.action_profit_loss.triggered.connect(self._open_report_dialog)
+        self.action_balance_sheet.triggered.connect(self._open_report_dialog)
+        self.action_gst_summary.triggered.connect(self._open_report_dialog)
+        self.action_cash_bank_book.triggered.connect(self._open_report_dialog)
+        self.action_period_analysis.triggered.connect(self._open_report_dialog)
+        self.action_outstanding.triggered.connect(self._open_report_dialog)
+        self.action_bank_reconciliation.triggered.connect(lambda: exec_and_delete(BankReconciliationDialog(self.db_manager, self)))
         
         # Utility connections
-        self.action_settings.triggered.connect(lambda: UtilitiesSettingDialog(self.db_manager, self).exec())
+        self.action_settings.triggered.connect(lambda: exec_and_delete(UtilitiesSettingDialog(self.db_manager, self)))
+        self.action_verify_data.triggered.connect(lambda: exec_and_delete(IntegrityCheckDialog(self.db_manager, self)))
         self.action_about.triggered.connect(self._show_about_dialog)
         
         # --------------------------------------------------------------------------
@@ -1658,8 +4925,32 @@ class MainWindow(QMainWindow):
         
         # File Menu
         file_menu = menu_bar.addMenu("&File")
+        file_menu.addAction(self.action_switch_company)
+        file_menu.addSeparator()
         file_menu.addAction(self.action_exit)
 
+        # Companies left in the pool are closed once idle
+        if registry is not None:
+            self.evict_timer = QTimer(self)
+            self.evict_timer.timeout.connect(registry.evict_idle)
+            self.evict_timer.start(self.IDLE_EVICT_MS)
+
+        # Last good backup in the status bar, refreshed while the backup thread runs
+        self.backup_label = QLabel()
+        self.statusBar().addPermanentWidget(self.backup_label)
+        self.backup_timer = QTimer(self)
+        self.backup_timer.timeout.connect(self._update_backup_status)
+        self.backup_timer.start(self.BACKUP_STATUS_MS)
+        self._update_backup_status()
+
+        # Database maintenance once the user has been idle for IDLE_MAINTENANCE_MS; any input stops it
+        self._last_input = time.monotonic()
+        self._maintaining = False
+        QApplication.instance().installEventFilter(self)
+        self.maintenance_timer = QTimer(self)
+        self.maintenance_timer.timeout.connect(self._idle_maintenance)
+        self.maintenance_timer.start(self.MAINTENANCE_POLL_MS)
+
         # Master Menu
         master_menu = menu_bar.addMenu("&Master")
         master_menu.addAction(self.action_add_account)
@@ -1669,6 +4960,7 @@ class MainWindow(QMainWindow):
         master_menu.addAction(self.action_view_items)
         master_menu.addSeparator()
         master_menu.addAction(self.action_settings)
+        master_menu.addAction(self.action_verify_data)
 
         # Voucher Menu
         voucher_menu = menu_bar.addMenu("&Voucher")
@@ -1684,84 +4976,132 @@ class MainWindow(QMainWindow):
         report_menu = menu_bar.addMenu("&Report")
         report_menu.addAction(self.action_daybook)
         report_menu.addAction(self.action_ledger)
+        report_menu.addAction(self.action_cash_bank_book)
         report_menu.addAction(self.action_trail_balance)
+        report_menu.addAction(self.action_profit_loss)
+        report_menu.addAction(self.action_balance_sheet)
+        report_menu.addSeparator()
+        report_menu.addAction(self.action_period_analysis)
+        report_menu.addAction(self.action_gst_summary)
+        report_menu.addAction(self.action_outstanding)
+        report_menu.addAction(self.action_bank_reconciliation)
 
         # Help Menu
         help_menu = menu_bar.addMenu("&Help")
         help_menu.addAction(self.action_about)
 
+        # Debug Menu, hidden until Ctrl+Shift+D
+        self.action_profile_next = QAction("&Profile Next Action", self)
+        self.action_profile_next.setCheckable(True)
+        self.action_profile_next.toggled.connect(self.ui_monitor.profile_next)
+        self.action_responsiveness = QAction("&Responsiveness...", self)
+        self.action_responsiveness.triggered.connect(lambda: exec_and_delete(ResponsivenessDialog(self.ui_monitor, self)))
+        self.ui_monitor.profile_saved.connect(self._profile_saved)
+        self.ui_monitor.stall_detected.connect(self._stall_detected)
+        self.debug_menu = menu_bar.addMenu("&Debug")
+        self.debug_menu.addAction(self.action_profile_next)
+        self.debug_menu.addAction(self.action_responsiveness)
+        self.debug_menu.menuAction().setVisible(False)
+        self.action_toggle_debug = QAction(self)
+        self.action_toggle_debug.setShortcut("Ctrl+Shift+D")
+        self.action_toggle_debug.triggered.connect(
+            lambda: self.debug_menu.menuAction().setVisible(not self.debug_menu.menuAction().isVisible()))
+        self.addAction(self.action_toggle_debug)
+
     # --------------------------------------------------------------------------
     # --- 4. Main Window Methods ---
     # --------------------------------------------------------------------------
-    def _open_view_vouchers_dialog(self):
-        """Displays a simple dialog for selecting a voucher type to view/modify."""
-        dialog = QDialog(self)
-        dialog.setWindowTitle("View/Modify Vouchers")
-        layout = QVBoxLayout(dialog)
-        
-        list_widget = QListWidget()
-        list_widget.addItems([
-            "Payment (PAY)", "Receipt (REC)", "Journal (JNL)", 
-            "Sales (SAL)", "Purchase (PUR)", "Credit Note (CN)", "Debit Note (DN)"
-        ])
-        layout.addWidget(list_widget)
-
-        h_layout = QHBoxLayout()
-        vouch_id_edit = QLineEdit()
-        vouch_id_edit.setPlaceholderText("Enter Voucher ID to Modify (Optional)")
-        view_button = QPushButton("View/Modify")
-        
-        h_layout.addWidget(vouch_id_edit)
-        h_layout.addWidget(view_button)
-        layout.addLayout(h_layout)
-
-        view_button.clicked.connect(lambda: self._launch_voucher_view(list_widget, vouch_id_edit.text().strip(), dialog))
-        dialog.exec()
-        
-    def _launch_voucher_view(self, list_widget: QListWidget, voucher_id_str: str, parent_dialog: QDialog):
-        selected_items = list_widget.selectedItems()
-        if not selected_items:
-            show_message(parent_dialog, "Selection Error", "Please select a voucher type.", QMessageBox.Icon.Warning)
+    def _switch_company(self):
+        names = [name for name, _ in self.registry.get_companies()]
+        current = names.index(self.company) if self.company in names else 0
+        name, ok = QInputDialog.getItem(self, "Switch Company", "Company:", names, current, False)
+        if ok and name and name != self.company:
+            self.set_company(name)
+
+    def set_company(self, name: str):
+        """Points every menu action at another company; its manager comes from the pool if already open."""
+        try:
+            db_manager = self.registry.get(name)
+        except Exception as e:
+            show_message(self, "Switch Company", f"Failed to open company '{name}': {e}", QMessageBox.Icon.Critical)
             return
+        self._stop_maintenance()
+        self.db_manager = db_manager
+        self.company = name
+        self.setWindowTitle(f"{name} - {self.TITLE}")
+        self._apply_company_settings()
+        self.dialog_pool.close()
+        self.dialog_pool = DialogPool(db_manager, self)
+        self.dialog_pool.warm(self.WARM_VOUCHER_TYPES)
+        self._update_backup_status()
+
+    def _apply_company_settings(self):
+        grouping = (self.db_manager.get_setting("NumberGrouping") or INDIAN).lower()
+        set_default_grouping(grouping if grouping in GROUPINGS else INDIAN)
+
+    def closeEvent(self, event):
+        self.ui_monitor.stop()
+        self.maintenance_timer.stop()
+        self._stop_maintenance()
+        if self.registry is not None:
+            self.registry.close()
+        super().closeEvent(event)
+
+    def _update_backup_status(self):
+        try:
+            last = self.db_manager.get_last_backup()
+        except Exception as e:
+            self.backup_label.setText("Last good backup: unknown")
+            self.backup_label.setToolTip(str(e))
+            return
+        text = "Last good backup: " + (time.strftime('%Y-%m-%d %H:%M', time.localtime(last.taken)) if last else "none")
+        error = self.db_manager.backup_error
+        self.backup_label.setText(f"{text} (last attempt failed)" if error else text)
+        self.backup_label.setToolTip(error or (last.path if last else "No backup has been taken yet."))
+        if self.db_manager.replica_error:
+            self.statusBar().showMessage(f"Report replica refresh failed: {self.db_manager.replica_error}",
+                                         self.BACKUP_STATUS_MS)
+
+    def eventFilter(self, watched, event):
+        if event.type() in self.USER_INPUT_EVENTS:
+            self._last_input = time.monotonic()
+            self._stop_maintenance()
+        return super().eventFilter(watched, event)
+
+    def _stop_maintenance(self):
+        if self._maintaining:
+            self._maintaining = False
+            self.db_manager.interrupt_maintenance()
+
+    def _idle_maintenance(self):
+        # Maintenance needs the file itself; a server's clients leave it to the server
+        if not isinstance(self.db_manager, DBManager):
+            return
+        report = self.db_manager.finish_maintenance()
+        if report is not None:
+            self._maintaining = False
+            self.statusBar().showMessage(format_report(report), 10000)
+        if not self._maintaining and time.monotonic() - self._last_input >= self.IDLE_MAINTENANCE_MS / 1000:
+            self._maintaining = self.db_manager.start_maintenance()
 
-        selected_text = selected_items[0].text()
-        vouch_type_code = selected_text.split('(')[-1].replace(')', '').strip()
-        
-        voucher_id = None
-        if voucher_id_str:
-            try:
-                voucher_id = int(voucher_id_str)
-            except ValueError:
-                show_message(parent_dialog, "Input Error", "Voucher ID must be a number.", QMessageBox.Icon.Warning)
-                return
+    def _time_action(self, action: QAction, *_):
+        self.ui_monitor.until_idle(action.iconText().strip())
+
+    def _profile_saved(self, path: str):
+        self.action_profile_next.setChecked(False)
+        self.statusBar().showMessage(f"Profile saved to {path}", 10000)
+
+    def _stall_detected(self, stall):
+        during = f" during '{stall.action}'" if stall.action else ""
+        print(f"UI stall of {stall.seconds * 1000:.0f} ms{during}")
 
-        # Close the selection dialog
-        parent_dialog.accept() 
-        
-        # Open the entry dialog in view/modify mode
-        dialog = VoucherEntryDialog(self.db_manager, vouch_type_code, self, voucher_id)
-        dialog.exec()
-        
     def _open_report_dialog(self):
         """Launches the appropriate report view based on the triggered action."""
         sender = self.sender()
-        selected_text = sender.text().replace('&', '').strip()
-        report_view = None
-        
-        if selected_text == "Ledger":
-            report_view = LedgerReportView(self.db_manager, self)
-        elif selected_text == "Day Book":
-            report_view = DayBookReport(self.db_manager, self)
-        elif selected_text in ["Trial Balance", "Profit & Loss Account", "Balance Sheet"]:
-            report_view = PlaceholderReport(self.db_manager, selected_text, self)
-            
-        if report_view:
-            report_view.exec()
-
-        def PlaceholderReport(db_manager, selected_text, self):
-            show_message(self, "placeholder", 
-                        "yet to do this part of prg.", 
-                        QMessageBox.Icon.Information)        
+        selected_text = sender.iconText().strip()  # text without '&' mnemonics ('&&' -> '&')
+        report_class = self.REPORT_VIEWS.get(selected_text)
+        if report_class:
+            self.dialog_pool.exec_report(report_class)
 
     def _show_about_dialog(self):
         show_message(self, "About", 
@@ -1770,13 +5110,15 @@ class MainWindow(QMainWindow):
 
 class LauncherWindow(QDialog):
     """
-    Simple initial dialog to select/create the SQLite database file path.
-    This also handles the main application startup logic.
+    Simple initial dialog to select a registered company or open/create a SQLite
+    database file. This also handles the main application startup logic.
     """
     def __init__(self, parent=None):
         super().__init__(parent)
         self.db_manager = None
         self.main_window = None
+        self.registry = CompanyRegistry()
+        self.companies = dict(self.registry.get_companies())
         
         self.setWindowTitle("Application Launcher")
         self.setGeometry(300, 300, 400, 150)
@@ -1784,8 +5126,15 @@ class LauncherWindow(QDialog):
         main_layout = QVBoxLayout(self)
         
         form_layout = QFormLayout()
+        self.company_combo = QComboBox()
+        self.company_combo.setEditable(True)
+        self.company_combo.addItems(sorted(self.companies))
+        self.company_combo.setEditText("")
+        self.company_combo.lineEdit().setPlaceholderText("Registered company, or a name for a new one")
+        self.company_combo.currentTextChanged.connect(self._company_changed)
+        form_layout.addRow(QLabel("Company:"), self.company_combo)
         self.db_path_edit = QLineEdit("accounting.db")
-        self.db_path_edit.setPlaceholderText("Enter database file path (e.g., accounting.db)")
+        self.db_path_edit.setPlaceholderText("Database file (e.g., accounting.db) or server (tcp://127.0.0.1:8765)")
         form_layout.addRow(QLabel("Database File:"), self.db_path_edit)
         main_layout.addLayout(form_layout)
         
@@ -1793,17 +5142,23 @@ class LauncherWindow(QDialog):
         button_box.accepted.connect(self._launch_app)
         button_box.rejected.connect(self.reject)
         main_layout.addWidget(button_box)
+
+    def _company_changed(self, name: str):
+        if name in self.companies:
+            self.db_path_edit.setText(self.companies[name])
         
     def _launch_app(self):
         db_path = self.db_path_edit.text().strip()
         if not db_path:
             show_message(self, "Error", "Please enter a database file path.", QMessageBox.Icon.Warning)
             return
+        name = self.company_combo.currentText().strip() or os.path.splitext(os.path.basename(db_path))[0] or db_path
 
         try:
-            self.db_manager = DBManager(db_path) 
+            company = self.registry.add_company(name, db_path)
+            self.db_manager = self.registry.get(company)
             
-            self.main_window = MainWindow(self.db_manager, parent=self) 
+            self.main_window = MainWindow(self.db_manager, parent=self, registry=self.registry, company=company) 
             self.main_window.show()
             
             self.accept()